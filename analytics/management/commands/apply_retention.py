@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from analytics.retention import TABLES, apply_retention, retention_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Агрегує, архівує у стиснені сегменти та видаляє застарілі рядки SearchHistory і ViewHistory; '
+        'годинні агрегати пошуку поза вікном зберігання також видаляються'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=sorted(TABLES), action='append',
+                            help='Обробити лише вказану таблицю (можна повторювати)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Кількість рядків, що видаляються однією транзакцією')
+        parser.add_argument('--segment-rows', type=int, default=50_000,
+                            help='Максимальна кількість рядків в одному сегменті архіву')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Пауза між транзакціями видалення, с')
+        parser.add_argument('--dry-run', action='store_true', help='Лише порахувати рядки')
+
+    def handle(self, *args, **options):
+        config = retention_settings()
+        for table in options['table'] or sorted(TABLES):
+            count = apply_retention(
+                table,
+                days=config[table]['days'],
+                segment_rows=options['segment_rows'],
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                dry_run=options['dry_run'],
+            )
+            action = 'До архівації' if options['dry_run'] else 'Заархівовано'
+            self.stdout.write(f"{table}: {action} {count} рядків (зберігання {config[table]['days']} дн.)")
@@ -0,0 +1,114 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.models import SearchQueryRollup
+from analytics.search_stats import SpaceSaving, day_bucket, normalize_query, popular_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк інкрементальних агрегатів і Space-Saving скетчу на синтетичному потоці '
+        'пошукових подій. Денні агрегати потоку записуються в БД, і popular_queries() міряється на них; '
+        'усе виконується в транзакції, що відкочується наприкінці'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=50_000_000)
+        parser.add_argument('--vocabulary', type=int, default=100_000,
+                            help='Кількість різних запитів у потоці')
+        parser.add_argument('--hours', type=int, default=24 * 30,
+                            help='Кількість годинних бакетів, між якими розподіляються події')
+        parser.add_argument('--capacity', type=int, default=1000, help='Розмір скетчу')
+        parser.add_argument('--repeat', type=int, default=5, help='Скільки разів міряти popular_queries()')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        events = options['events']
+        hours = options['hours']
+
+        # Zipf-подібний розподіл: кілька "гарячих" міст і довгий хвіст
+        vocabulary = [f'  City {i} ' if i % 3 else f'city {i}' for i in range(options['vocabulary'])]
+        weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+        per_hour = max(events // hours, 1)
+
+        days = -(-hours // 24)
+        today = day_bucket(timezone.now())
+        exact = Counter()
+        day_counts = Counter()
+        last_hour = Counter()
+        hourly_rows = daily_rows = 0
+        sketch = SpaceSaving(options['capacity'])
+        processed = 0
+        write_elapsed = 0.0
+
+        def flush_day(day):
+            # Денні рядки пишуться так само, як їх накопичує record_search: (period, bucket, query) -> count
+            nonlocal daily_rows, write_elapsed
+            bucket = today - timedelta(days=days - 1 - day)
+            started = time.perf_counter()
+            SearchQueryRollup.objects.bulk_create(
+                (SearchQueryRollup(period='day', bucket=bucket, query=query, count=count)
+                 for query, count in day_counts.items()),
+                batch_size=5000,
+            )
+            write_elapsed += time.perf_counter() - started
+            daily_rows += len(day_counts)
+            day_counts.clear()
+
+        with transaction.atomic():
+            # Наявні денні агрегати вікна не змішуються із синтетичними; видалення відкочується разом з усім
+            SearchQueryRollup.objects.filter(period='day', bucket__gte=today - timedelta(days=days)).delete()
+
+            started = time.perf_counter()
+            for hour in range(hours):
+                batch = min(per_hour, events - processed)
+                if batch <= 0:
+                    break
+                hour_counts = Counter(normalize_query(q) for q in rng.choices(vocabulary, weights, k=batch))
+                hourly_rows += len(hour_counts)
+                exact.update(hour_counts)
+                day_counts.update(hour_counts)
+                if hour % 24 == 23:
+                    flush_day(hour // 24)
+                if hour == hours - 1 or processed + batch >= events:
+                    # Скетч моделює лише поточну годину
+                    last_hour = hour_counts
+                    for query, count in hour_counts.items():
+                        sketch.offer(query, count)
+                processed += batch
+            if day_counts:
+                flush_day(min(hour, hours - 1) // 24)
+            elapsed = time.perf_counter() - started - write_elapsed
+
+            timings = []
+            for _ in range(max(options['repeat'], 1)):
+                started = time.perf_counter()
+                top_rollups = [(row['query'], row['count']) for row in popular_queries(days=days, limit=10)]
+                timings.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+
+        top_exact = sorted(exact.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+        started = time.perf_counter()
+        top_sketch = [row['query'] for row in sketch.top(10)]
+        sketch_elapsed = time.perf_counter() - started
+
+        top_last_hour = [query for query, _ in last_hour.most_common(10)]
+        recall = len(set(top_last_hour) & set(top_sketch)) / max(len(top_last_hour), 1)
+        self.stdout.write(f'Подій оброблено: {processed} за {elapsed:.1f} с ({processed / elapsed:,.0f} подій/с)')
+        self.stdout.write(f'Годинних рядків агрегатів: {hourly_rows} (сирих рядків: {processed})')
+        self.stdout.write(f'Денних рядків агрегатів у БД: {daily_rows}, запис {write_elapsed:.1f} с')
+        self.stdout.write(
+            f'Top-10 з агрегатів (popular_queries, {days} дн.): мін. {min(timings) * 1000:.1f} мс, '
+            f'макс. {max(timings) * 1000:.1f} мс; збігається з точним підрахунком: '
+            f'{"так" if top_rollups == top_exact else "ні"}'
+        )
+        self.stdout.write(f'Top-10 зі скетчу ({len(sketch)} лічильників): {sketch_elapsed * 1000:.2f} мс, '
+                          f'recall={recall:.0%}')
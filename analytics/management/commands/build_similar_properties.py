@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.recommendations import build_similar_properties
+
+
+class Command(BaseCommand):
+    help = 'Перераховує схожі оголошення ("також переглядали") на основі ViewHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Кількість схожих оголошень на одне')
+        parser.add_argument('--damping', type=float, default=0.2,
+                            help='Приглушення популярних оголошень (0 — чистий косинус)')
+        parser.add_argument('--chunk-size', type=int, default=500_000,
+                            help='Кількість рядків ViewHistory, що читаються за раз')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = build_similar_properties(
+            top=options['top'], damping=options['damping'], chunk_size=options['chunk_size']
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Записано {written} пар за {elapsed:.1f} с'))
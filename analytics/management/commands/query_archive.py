@@ -0,0 +1,34 @@
+import json
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from analytics.retention import TABLES, iter_archived_rows
+
+
+class Command(BaseCommand):
+    help = 'Виводить заархівовані рядки у форматі JSONL для офлайн-аналізу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(TABLES))
+        parser.add_argument('--since', help='Дата початку (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Дата кінця, не включно (YYYY-MM-DD)')
+        parser.add_argument('--count', action='store_true', help='Вивести лише кількість рядків')
+
+    def handle(self, *args, **options):
+        since = self._parse(options['since'])
+        until = self._parse(options['until'])
+
+        rows = iter_archived_rows(options['table'], since=since, until=until)
+        if options['count']:
+            self.stdout.write(str(sum(1 for _ in rows)))
+            return
+        for row in rows:
+            self.stdout.write(json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}, ensure_ascii=False))
+
+    def _parse(self, value):
+        if not value:
+            return None
+        return timezone.make_aware(datetime.combine(parse_date(value), time.min))
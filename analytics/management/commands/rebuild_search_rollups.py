@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics.search_stats import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Перераховує годинні та денні агрегати пошукових запитів з SearchHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Перерахувати лише останні N днів (за замовчуванням — всю історію)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days'] is not None:
+            since = timezone.now() - timedelta(days=options['days'])
+
+        written = rebuild_rollups(since=since)
+        self.stdout.write(self.style.SUCCESS(f'Записано агрегатів: {written}'))
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rental_project.traffic import (
+    HttpTarget, TestClientTarget, compare, load_requests, recording_path, replay, summarize,
+)
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Відтворює записані TrafficRecordingMiddleware запити через тестовий клієнт Django або на '
+        'запущеному сервері й звітує по маршрутах: пропускна здатність, p50/p95/p99, частка помилок, '
+        'запити до БД. Результат можна зберегти як baseline і порівняти з ним наступний прогін.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--input', default=None, help='JSONL із записаними запитами')
+        parser.add_argument('--target', default='test-client',
+                            help='"test-client" або базова URL сервера, наприклад http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--rate', type=float, default=0, help='Запитів за секунду сумарно; 0 — без обмеження')
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--include-writes', action='store_true',
+                            help='Відтворювати також POST/PUT/PATCH/DELETE (змінюють дані цільової БД)')
+        parser.add_argument('--save-baseline', help='Зберегти зведення у JSON-файл')
+        parser.add_argument('--compare', help='Порівняти з раніше збереженим baseline')
+        parser.add_argument('--latency-threshold', type=float, default=0.2,
+                            help='Допустимий відносний ріст p95 (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        path = Path(options['input'] or recording_path())
+        if not path.exists():
+            raise CommandError(f'Файл {path} не знайдено; увімкніть TRAFFIC_RECORDING, щоб записати трафік')
+
+        entries = load_requests(path, options['limit'])
+        if not options['include_writes']:
+            entries = [entry for entry in entries if entry['method'] in ('GET', 'HEAD', 'OPTIONS')]
+        if not entries:
+            raise CommandError('Немає запитів для відтворення')
+
+        tokens = self.tokens({entry.get('principal') for entry in entries} - {None})
+        if options['target'] == 'test-client':
+            if getattr(settings, 'TRAFFIC_RECORDING', False):
+                raise CommandError('Вимкніть TRAFFIC_RECORDING: відтворені запити записувалися б знову')
+            target = TestClientTarget(tokens)
+        else:
+            target = HttpTarget(options['target'], tokens)
+
+        results, elapsed = replay(entries, target, options['concurrency'], options['rate'])
+        summary = summarize(results, elapsed)
+        self.report(summary)
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as baseline:
+                json.dump(summary, baseline, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Baseline збережено у {options['save_baseline']}")
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline:
+                regressions = compare(json.load(baseline), summary, options['latency_threshold'])
+            if regressions:
+                for route, metric, before, now in regressions:
+                    self.stdout.write(self.style.ERROR(f'РЕГРЕСІЯ {route}: {metric} {before:.3f} -> {now:.3f}'))
+                raise CommandError(f'Знайдено регресій: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регресій відносно baseline немає'))
+
+    def tokens(self, principals):
+        """Access-токени для користувачів із запису; відсутні користувачі відтворюються анонімно"""
+        return {
+            user.pk: str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+            for user in User.objects.filter(pk__in=principals)
+        }
+
+    def report(self, summary):
+        self.stdout.write(
+            f"{summary['requests']} запитів за {summary['elapsed_s']:.2f} с "
+            f"({summary['requests'] / max(summary['elapsed_s'], 1e-9):,.1f} запитів/с)"
+        )
+        self.stdout.write(f"{'маршрут':<28}{'к-сть':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'помилки':>9}{'SQL':>7}")
+        for route, stats in summary['routes'].items():
+            queries = stats['queries_per_request']
+            self.stdout.write(
+                f"{route[:27]:<28}{stats['requests']:>7}{stats['throughput']:>9.1f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+                f"{stats['error_rate']:>9.1%}{'—' if queries is None else f'{queries:.1f}':>7}"
+            )
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'hour'), ('day', 'day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('query', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'bucket'], name='analytics_s_period_ec9b30_idx')],
+                'unique_together': {('period', 'bucket', 'query')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_initial'),
+        ('analytics', '0004_search_query_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyViewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_sketches', to='properties.property')),
+            ],
+            options={
+                'unique_together': {('property', 'day')},
+            },
+        ),
+    ]
@@ -19,6 +19,41 @@ class ViewHistory(models.Model):
         unique_together = ('user', 'property')
 
 
-from django.db import models
+class SearchQueryRollup(models.Model):
+    """Попередньо агреговані лічильники нормалізованих пошукових запитів"""
+    PERIOD_CHOICES = (
+        ('hour', 'hour'),
+        ('day', 'day'),
+    )
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    query = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('period', 'bucket', 'query')
+        indexes = [
+            models.Index(fields=['period', 'bucket']),
+        ]
+
+
+class PropertyViewSketch(models.Model):
+    """HyperLogLog-скетч унікальних переглядачів оголошення за день"""
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='view_sketches')
+    day = models.DateField()
+    registers = models.BinaryField()
 
-# Create your models here.
+    class Meta:
+        unique_together = ('property', 'day')
+
+
+class PropertySimilarity(models.Model):
+    """Попередньо обчислені схожі оголошення ("також переглядали")"""
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='similar_items')
+    similar = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('property', 'rank')
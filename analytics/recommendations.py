@@ -0,0 +1,121 @@
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+
+from properties.models import Property
+from rental_project.cache import invalidate
+from .models import PropertySimilarity, ViewHistory
+
+
+def iter_user_chunks(chunk_size=500_000):
+    """
+    Читає ViewHistory порціями по user_id (keyset-пагінація по індексу unique_together).
+    Кожна порція містить усі перегляди своїх користувачів, тому її можна обробити незалежно.
+    """
+    last_user = 0
+    while True:
+        rows = list(
+            ViewHistory.objects.filter(user_id__gt=last_user)
+            .order_by('user_id')
+            .values_list('user_id', 'property_id')[:chunk_size]
+        )
+        if not rows:
+            return
+
+        if len(rows) == chunk_size:
+            tail_user = rows[-1][0]
+            complete = [row for row in rows if row[0] != tail_user]
+            if complete:
+                rows = complete
+            else:
+                # Один користувач займає всю порцію — дочитуємо його повністю
+                rows = list(
+                    ViewHistory.objects.filter(user_id=tail_user).values_list('user_id', 'property_id')
+                )
+
+        last_user = rows[-1][0]
+        yield rows
+
+
+def cooccurrence_matrix(property_index, chunk_size=500_000):
+    """
+    Будує матрицю спільних переглядів C = XᵀX (property × property), де X — бінарна матриця
+    user × property. Пам'ять обмежена розміром порції та кількістю пар оголошень.
+    """
+    size = len(property_index)
+    total = sparse.csr_matrix((size, size), dtype=np.float32)
+
+    for rows in iter_user_chunks(chunk_size):
+        users = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        columns = np.fromiter(
+            (property_index.get(row[1], -1) for row in rows), dtype=np.int64, count=len(rows)
+        )
+        known = columns >= 0
+        users, columns = users[known], columns[known]
+        if not len(users):
+            continue
+
+        _, user_rows = np.unique(users, return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.float32), (user_rows, columns)),
+            shape=(user_rows.max() + 1, size),
+        )
+        total = total + (matrix.T @ matrix).tocsr()
+
+    return total
+
+
+def similarity_matrix(cooccurrence, damping=0.2):
+    """
+    Косинусна схожість з приглушенням популярності:
+    score(i, j) = C_ij / (sqrt(n_i) * n_j^(0.5 + damping)), де n — кількість переглядачів
+    """
+    counts = cooccurrence.diagonal().astype(np.float64)
+    counts[counts == 0] = 1.0
+
+    scores = cooccurrence.tocoo()
+    off_diagonal = scores.row != scores.col
+    rows, cols = scores.row[off_diagonal], scores.col[off_diagonal]
+    data = scores.data[off_diagonal] / (np.sqrt(counts[rows]) * counts[cols] ** (0.5 + damping))
+    return sparse.csr_matrix((data, (rows, cols)), shape=cooccurrence.shape)
+
+
+def top_n(similarity, n):
+    """Для кожного рядка CSR-матриці повертає індекси та оцінки n найкращих стовпців"""
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        data = similarity.data[start:end]
+        indices = similarity.indices[start:end]
+        if len(data) > n:
+            best = np.argpartition(-data, n - 1)[:n]
+            data, indices = data[best], indices[best]
+        order = np.lexsort((indices, -data))
+        yield row, indices[order], data[order]
+
+
+def build_similar_properties(top=10, damping=0.2, chunk_size=500_000):
+    """
+    Перераховує таблицю PropertySimilarity з ViewHistory. Повертає кількість записаних рядків.
+    """
+    property_ids = np.array(Property.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+    property_index = {int(pk): position for position, pk in enumerate(property_ids)}
+
+    cooccurrence = cooccurrence_matrix(property_index, chunk_size=chunk_size)
+    similarity = similarity_matrix(cooccurrence, damping=damping)
+
+    objects = [
+        PropertySimilarity(
+            property_id=int(property_ids[row]), similar_id=int(property_ids[column]),
+            rank=rank, score=float(score),
+        )
+        for row, columns, scores in top_n(similarity, top)
+        for rank, (column, score) in enumerate(zip(columns, scores), start=1)
+    ]
+
+    with transaction.atomic():
+        PropertySimilarity.objects.all().delete()
+        PropertySimilarity.objects.bulk_create(objects, batch_size=1000)
+        invalidate('similarities')
+    return len(objects)
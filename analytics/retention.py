@@ -0,0 +1,207 @@
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Trim, TruncDay
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import PropertyViewSketch, SearchHistory, SearchQueryRollup, ViewHistory
+from .search_stats import day_bucket, rebuild_rollups
+from .unique_viewers import HyperLogLog
+
+DEFAULT_RETENTION = {
+    'SearchHistory': {'days': 30},
+    'ViewHistory': {'days': 180},
+}
+
+TABLES = {
+    'SearchHistory': (SearchHistory, ['id', 'user_id', 'query', 'timestamp']),
+    'ViewHistory': (ViewHistory, ['id', 'user_id', 'property_id', 'timestamp']),
+}
+
+
+def retention_settings():
+    configured = getattr(settings, 'ANALYTICS_RETENTION', {})
+    return {
+        table: {**defaults, **configured.get(table, {})}
+        for table, defaults in DEFAULT_RETENTION.items()
+    }
+
+
+def archive_dir():
+    return Path(getattr(settings, 'ANALYTICS_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+
+
+def _segment_time(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%S')
+
+
+def write_segment(table, rows):
+    """
+    Записує незмінний gzip-JSONL сегмент. Ім'я містить діапазон часу та id, тому читач може
+    відкидати зайві сегменти без розпакування. Файл з'являється атомарно через rename.
+    """
+    directory = archive_dir() / table
+    directory.mkdir(parents=True, exist_ok=True)
+
+    first, last = rows[0], rows[-1]
+    timestamps = sorted(row['timestamp'] for row in rows)
+    name = '{}_{}_{:012d}-{:012d}.jsonl.gz'.format(
+        _segment_time(timestamps[0]), _segment_time(timestamps[-1]), first['id'], last['id'],
+    )
+    path = directory / name
+    temporary = directory / f'.{name}.tmp'
+
+    with open(temporary, 'wb') as raw:
+        with gzip.open(raw, 'wt', encoding='utf-8') as segment:
+            for row in rows:
+                segment.write(json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}, ensure_ascii=False))
+                segment.write('\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temporary, path)
+    return path
+
+
+def iter_archived_rows(table, since=None, until=None):
+    """
+    Читає архівні рядки таблиці у порядку сегментів, фільтруючи за [since, until).
+    Якщо видалення після експорту було перервано, рядок може потрапити в архів двічі — дублікати
+    відкидаються за id.
+    """
+    directory = archive_dir() / table
+    if not directory.exists():
+        return
+
+    seen = set()
+    for path in sorted(directory.glob('*.jsonl.gz')):
+        start, end, _ = path.name.split('_', 2)
+        if since is not None and end < _segment_time(since):
+            continue
+        if until is not None and start > _segment_time(until):
+            continue
+
+        with gzip.open(path, 'rt', encoding='utf-8') as segment:
+            for line in segment:
+                row = json.loads(line)
+                row['timestamp'] = parse_datetime(row['timestamp'])
+                if row['id'] in seen:
+                    continue
+                if since is not None and row['timestamp'] < since:
+                    continue
+                if until is not None and row['timestamp'] >= until:
+                    continue
+                seen.add(row['id'])
+                yield row
+
+
+def ensure_search_rollups(cutoff):
+    """
+    Дні до `cutoff`, денні агрегати яких покривають не всі сирі запити (дані до появи rollup або день,
+    агрегований лише частково), перераховуються з сирих рядків. Якщо агрегат більший за сирі рядки,
+    день уже почали видаляти після повної агрегації — його не чіпаємо.
+    """
+    raw_counts = dict(
+        SearchHistory.objects.filter(timestamp__lt=cutoff)
+        .annotate(day=TruncDay('timestamp'), trimmed=Trim('query')).exclude(trimmed='')
+        .values('day').annotate(count=Count('id')).values_list('day', 'count').order_by()
+    )
+    rolled_counts = dict(
+        SearchQueryRollup.objects.filter(period='day', bucket__lt=cutoff)
+        .values('bucket').annotate(count=Sum('count')).values_list('bucket', 'count').order_by()
+    )
+    for day in sorted(raw_counts):
+        if rolled_counts.get(day, 0) < raw_counts[day]:
+            # rebuild_rollups округлює межі до початку дня, тож +36 год коректні і в дні переходу на літній час
+            rebuild_rollups(since=day, until=day + timedelta(hours=36))
+
+
+def prune_hourly_rollups(cutoff, batch_size=1000, pause=0.0):
+    """
+    Годинні агрегати потрібні лише у вікні сирих рядків; старші видаляються дрібними транзакціями,
+    як і сирі рядки. Денні агрегати лишаються — з них рахується popular_queries
+    """
+    old_rollups = SearchQueryRollup.objects.filter(period='hour', bucket__lt=cutoff)
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(old_rollups.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            SearchQueryRollup.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def merge_view_sketches(rows):
+    """Переносить перегляди у денні HyperLogLog-скетчі; повторне додавання нічого не змінює"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row['property_id'], timezone.localtime(row['timestamp']).date())].append(row['user_id'])
+
+    for (property_id, day), users in groups.items():
+        with transaction.atomic():
+            sketch, _ = PropertyViewSketch.objects.select_for_update().get_or_create(
+                property_id=property_id, day=day,
+                defaults={'registers': HyperLogLog().to_bytes()},
+            )
+            hll = HyperLogLog.from_bytes(sketch.registers)
+            changed = False
+            for user_id in users:
+                changed = hll.add(f'u:{user_id}') or changed
+            if changed:
+                sketch.registers = hll.to_bytes()
+                sketch.save(update_fields=['registers'])
+
+
+def apply_retention(table, days=None, segment_rows=50_000, batch_size=1000, pause=0.0, dry_run=False):
+    """
+    Архівує та видаляє рядки старші за вікно зберігання.
+    Порядок для кожного сегмента: агрегати -> сегмент на диску -> видалення дрібними транзакціями;
+    для SearchHistory наприкінці видаляються й годинні агрегати поза вікном.
+    Повертає кількість заархівованих рядків.
+    """
+    model, fields = TABLES[table]
+    if days is None:
+        days = retention_settings()[table]['days']
+    cutoff = day_bucket(timezone.now() - timedelta(days=days))
+
+    old_rows = model.objects.filter(timestamp__lt=cutoff)
+    if dry_run:
+        return old_rows.count()
+
+    if model is SearchHistory:
+        ensure_search_rollups(cutoff)
+
+    archived = 0
+    last_id = 0
+    while True:
+        rows = list(old_rows.filter(id__gt=last_id).order_by('id').values(*fields)[:segment_rows])
+        if not rows:
+            if model is SearchHistory:
+                prune_hourly_rollups(cutoff, batch_size=batch_size, pause=pause)
+            return archived
+
+        if model is ViewHistory:
+            merge_view_sketches(rows)
+        write_segment(table, rows)
+
+        ids = [row['id'] for row in rows]
+        for start in range(0, len(ids), batch_size):
+            # Кожна порція — окрема коротка транзакція, щоб не тримати блокування запису
+            with transaction.atomic():
+                model.objects.filter(id__in=ids[start:start + batch_size]).delete()
+            if pause:
+                time.sleep(pause)
+
+        archived += len(rows)
+        last_id = ids[-1]
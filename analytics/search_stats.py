@@ -0,0 +1,189 @@
+import heapq
+import re
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Lower, Trim, TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import SearchHistory, SearchQueryRollup
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """Приводить запит до канонічного вигляду: "  Berlin " і "berlin" дають один ключ"""
+    return _WHITESPACE_RE.sub(' ', query).strip().casefold()[:255]
+
+
+def hour_bucket(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment):
+    return timezone.localtime(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class SpaceSaving:
+    """
+    Top-K скетч Space-Saving (Metwally et al.) з фіксованою кількістю лічильників.
+    Для кожного елемента зберігається оцінка та максимальна похибка завищення.
+    Мінімальний лічильник шукається через купу з лінивим видаленням застарілих записів.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counters = {}
+        self.errors = {}
+        self._heap = []
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self.counters[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, count in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counters.get(item) == count:
+                return item
+
+    def offer(self, item, count=1):
+        if item in self.counters:
+            self.counters[item] += count
+            self._push(item)
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[item] = count
+            self.errors[item] = 0
+            self._push(item)
+            return
+
+        # Витісняємо елемент з мінімальним лічильником і успадковуємо його значення
+        victim = self._pop_min()
+        floor = self.counters.pop(victim)
+        self.errors.pop(victim)
+        self.counters[item] = floor + count
+        self.errors[item] = floor
+        self._push(item)
+
+    def top(self, k=10):
+        ranked = sorted(self.counters.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [
+            {'query': item, 'count': count, 'error': self.errors[item]}
+            for item, count in ranked[:k]
+        ]
+
+    def __len__(self):
+        return len(self.counters)
+
+
+class LiveSearchSketch:
+    """Скетч популярних запитів за поточну годину в межах одного процесу"""
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._sketch = SpaceSaving(capacity)
+
+    def offer(self, query, moment=None):
+        bucket = hour_bucket(moment or timezone.now())
+        with self._lock:
+            if bucket != self._bucket:
+                self._bucket = bucket
+                self._sketch = SpaceSaving(self.capacity)
+            self._sketch.offer(query)
+
+    def top(self, k=10):
+        with self._lock:
+            if self._bucket != hour_bucket(timezone.now()):
+                return []
+            return self._sketch.top(k)
+
+
+live_sketch = LiveSearchSketch()
+
+
+def _bump_rollup(period, bucket, query, count=1):
+    updated = SearchQueryRollup.objects.filter(
+        period=period, bucket=bucket, query=query
+    ).update(count=F('count') + count)
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            SearchQueryRollup.objects.create(period=period, bucket=bucket, query=query, count=count)
+    except IntegrityError:
+        # Паралельний запит встиг створити рядок першим
+        SearchQueryRollup.objects.filter(
+            period=period, bucket=bucket, query=query
+        ).update(count=F('count') + count)
+
+
+def record_search(user, query):
+    """
+    Записує пошуковий запит та інкрементально оновлює годинні й денні агрегати
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        return None
+
+    entry = SearchHistory.objects.create(user=user, query=query[:255])
+    _bump_rollup('hour', hour_bucket(entry.timestamp), normalized)
+    _bump_rollup('day', day_bucket(entry.timestamp), normalized)
+    live_sketch.offer(normalized, entry.timestamp)
+    return entry
+
+
+def rebuild_rollups(since=None, until=None):
+    """
+    Перераховує агрегати з сирих рядків SearchHistory у межах [since, until) по цілих днях.
+    Повертає кількість записаних рядків агрегатів.
+    """
+    raw = SearchHistory.objects.all()
+    rollups = SearchQueryRollup.objects.all()
+    if since is not None:
+        since = day_bucket(since)
+        raw = raw.filter(timestamp__gte=since)
+        rollups = rollups.filter(bucket__gte=since)
+    if until is not None:
+        until = day_bucket(until)
+        raw = raw.filter(timestamp__lt=until)
+        rollups = rollups.filter(bucket__lt=until)
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        for period, trunc in (('hour', TruncHour), ('day', TruncDay)):
+            totals = {}
+            rows = raw.annotate(
+                bucket=trunc('timestamp'), normalized=Lower(Trim('query'))
+            ).values('bucket', 'normalized').annotate(count=Count('id')).order_by()
+            for row in rows.iterator():
+                key = (row['bucket'], normalize_query(row['normalized']))
+                if key[1]:
+                    totals[key] = totals.get(key, 0) + row['count']
+
+            SearchQueryRollup.objects.bulk_create(
+                [
+                    SearchQueryRollup(period=period, bucket=bucket, query=query, count=count)
+                    for (bucket, query), count in totals.items()
+                ],
+                batch_size=1000,
+            )
+            written += len(totals)
+    return written
+
+
+def popular_queries(days=30, limit=10):
+    """Топ запитів за останні `days` днів як сума денних агрегатів"""
+    since = day_bucket(timezone.now() - timedelta(days=days))
+    return SearchQueryRollup.objects.filter(
+        period='day', bucket__gte=since
+    ).values('query').annotate(count=Sum('count')).order_by('-count', 'query')[:limit]
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from rental_project.compiled_serializers import CompiledListSerializer
+from rental_project.sparse_fields import SparseFieldsMixin
 from .models import SearchHistory, ViewHistory
 from properties.serializers import PropertySerializer
 
@@ -10,13 +12,15 @@ class SearchHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['user']
 
 
-class ViewHistorySerializer(serializers.ModelSerializer):
+class ViewHistorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     property_details = PropertySerializer(source='property', read_only=True)
 
     class Meta:
         model = ViewHistory
         fields = ['id', 'user', 'property', 'property_details', 'timestamp']
+        list_serializer_class = CompiledListSerializer
         read_only_fields = ['user']
+        expandable_fields = ['property_details']
 
 
 class PopularSearchSerializer(serializers.Serializer):
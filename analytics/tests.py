@@ -1,3 +1,300 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from properties.models import Location, Property, PropertyType
+from properties.reference_data import reference_data
+from users.models import User
+from .models import PropertySimilarity, PropertyViewSketch, SearchHistory, SearchQueryRollup, ViewHistory
+from .recommendations import build_similar_properties
+from .retention import apply_retention, iter_archived_rows
+from .search_stats import (
+    SpaceSaving, day_bucket, hour_bucket, normalize_query, record_search, rebuild_rollups, popular_queries,
+)
+from .unique_viewers import HLL_REGISTERS, HyperLogLog, record_unique_view, unique_viewers
+
+
+class SearchRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass12345', first_name='T'
+        )
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query('  Berlin   Mitte '), 'berlin mitte')
+        self.assertEqual(normalize_query('BERLIN'), normalize_query('berlin '))
+
+    def test_record_search_updates_rollups_incrementally(self):
+        for query in ['Berlin', 'berlin ', ' BERLIN', 'Hamburg']:
+            record_search(self.user, query)
+
+        self.assertEqual(SearchHistory.objects.count(), 4)
+        day_rows = SearchQueryRollup.objects.filter(period='day')
+        self.assertEqual(day_rows.get(query='berlin').count, 3)
+        self.assertEqual(day_rows.get(query='hamburg').count, 1)
+        self.assertEqual(SearchQueryRollup.objects.filter(period='hour').count(), 2)
+
+        self.assertEqual(
+            list(popular_queries()),
+            [{'query': 'berlin', 'count': 3}, {'query': 'hamburg', 'count': 1}],
+        )
+
+    def test_rebuild_matches_incremental(self):
+        for query in ['Köln', 'köln', 'Dresden']:
+            record_search(self.user, query)
+        incremental = sorted(SearchQueryRollup.objects.values_list('period', 'query', 'count'))
+
+        rebuild_rollups()
+        rebuilt = sorted(SearchQueryRollup.objects.values_list('period', 'query', 'count'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_popular_searches_endpoint(self):
+        record_search(self.user, 'Berlin')
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(reverse('popular-searches'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {'query': 'berlin', 'count': 1})
+
+        response = client.get(reverse('popular-searches-live'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['query'], 'berlin')
+
+
+class SpaceSavingTests(TestCase):
+    def test_heavy_hitters_survive_eviction(self):
+        sketch = SpaceSaving(capacity=5)
+        for i in range(200):
+            sketch.offer('hot')
+            sketch.offer(f'cold-{i}')
+            if i % 2:
+                sketch.offer('warm')
+
+        top = [row['query'] for row in sketch.top(2)]
+        self.assertEqual(top, ['hot', 'warm'])
+        self.assertEqual(len(sketch), 5)
+
+
+class UniqueViewersTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O',
+            user_type='landlord'
+        )
+        self.property = Property.objects.create(
+            owner=self.owner, title='Flat', description='Nice',
+            property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'),
+            price=100, rooms=2, area=50,
+        )
+
+    def test_estimate_accuracy_against_exact_counts(self):
+        for exact in (10, 1000, 50000):
+            hll = HyperLogLog()
+            for i in range(exact):
+                hll.add(f'u:{i}')
+            self.assertLess(abs(hll.count() - exact) / exact, 0.1, exact)
+        self.assertEqual(len(hll.to_bytes()), HLL_REGISTERS)
+
+    def test_daily_sketches_merge_across_range(self):
+        for i in range(300):
+            record_unique_view(self.property.pk, f'u:{i}', day=date(2026, 1, 1))
+        # Половина переглядачів повертається наступного дня
+        for i in range(150, 450):
+            record_unique_view(self.property.pk, f'u:{i}', day=date(2026, 1, 2))
+
+        total, daily = unique_viewers(self.property.pk, date(2026, 1, 1), date(2026, 1, 2))
+        self.assertEqual(PropertyViewSketch.objects.count(), 2)
+        self.assertEqual([day for day, _ in daily], [date(2026, 1, 1), date(2026, 1, 2)])
+        self.assertLess(abs(total - 450) / 450, 0.1)
+
+    def test_detail_view_feeds_sketch_and_endpoint_is_owner_only(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        for _ in range(3):
+            client.get(reverse('property-detail', args=[self.property.pk]))
+
+        response = client.get(reverse('unique-viewers', args=[self.property.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unique_viewers'], 1)
+
+        stranger = User.objects.create_user(
+            username='other', email='other@example.com', password='pass12345', first_name='X'
+        )
+        client.force_authenticate(stranger)
+        response = client.get(reverse('unique-viewers', args=[self.property.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+class SimilarPropertiesTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O'
+        )
+        property_type = PropertyType.objects.create(name='Flat')
+        location = Location.objects.create(city='Berlin')
+        self.properties = [
+            Property.objects.create(
+                owner=owner, title=f'Flat {i}', description='-', property_type=property_type,
+                location=location, price=100, rooms=1, area=30,
+            )
+            for i in range(4)
+        ]
+        self.users = [
+            User.objects.create_user(
+                username=f'u{i}', email=f'u{i}@example.com', password='pass12345', first_name='U'
+            )
+            for i in range(4)
+        ]
+
+    def view(self, user, *indexes):
+        for index in indexes:
+            ViewHistory.objects.create(user=user, property=self.properties[index])
+
+    def test_cooccurrence_ranking_with_chunked_loading(self):
+        a, b, c, d = range(4)
+        self.view(self.users[0], a, b)
+        self.view(self.users[1], a, b, c)
+        self.view(self.users[2], a, b)
+        self.view(self.users[3], c, d)
+
+        # Маленька порція змушує обробляти користувачів по одному
+        written = build_similar_properties(top=2, chunk_size=2)
+        self.assertGreater(written, 0)
+
+        similar_to_a = list(
+            PropertySimilarity.objects.filter(property=self.properties[a])
+            .order_by('rank').values_list('similar_id', flat=True)
+        )
+        self.assertEqual(similar_to_a, [self.properties[b].pk, self.properties[c].pk])
+        self.assertFalse(
+            PropertySimilarity.objects.filter(property=self.properties[d], similar=self.properties[a]).exists()
+        )
+
+    def test_similar_endpoint_is_single_query(self):
+        self.view(self.users[0], 0, 1)
+        build_similar_properties()
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+
+        # id схожих для тегів кешу (самі кешуються до перерахунку) і список одним JOIN-запитом
+        with self.assertNumQueries(2):
+            response = client.get(reverse('property-similar', args=[self.properties[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.properties[1].pk)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        settings_override = override_settings(ANALYTICS_ARCHIVE_DIR=archive.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass12345', first_name='T'
+        )
+        self.property = Property.objects.create(
+            owner=self.user, title='Flat', description='-',
+            property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'),
+            price=100, rooms=1, area=30,
+        )
+        self.old = timezone.now() - timedelta(days=60)
+
+    def test_search_history_is_rolled_up_archived_and_deleted(self):
+        # Рядки "до появи агрегатів": сирі записи без rollup
+        for query in ['Berlin', 'berlin', 'Hamburg']:
+            SearchHistory.objects.create(user=self.user, query=query)
+        SearchHistory.objects.update(timestamp=self.old)
+        fresh = SearchHistory.objects.create(user=self.user, query='Köln')
+
+        archived = apply_retention('SearchHistory', days=30, segment_rows=2, batch_size=1)
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(list(SearchHistory.objects.values_list('id', flat=True)), [fresh.pk])
+        day_rows = dict(SearchQueryRollup.objects.filter(period='day').values_list('query', 'count'))
+        self.assertEqual(day_rows, {'berlin': 2, 'hamburg': 1})
+
+        rows = list(iter_archived_rows('SearchHistory'))
+        self.assertEqual([row['query'] for row in rows], ['Berlin', 'berlin', 'Hamburg'])
+        self.assertEqual(list(iter_archived_rows('SearchHistory', since=timezone.now() - timedelta(days=1))), [])
+
+    def test_partially_rolled_day_is_completed_and_old_hourly_rollups_pruned(self):
+        for query in ['Berlin', 'berlin', 'Hamburg']:
+            SearchHistory.objects.create(user=self.user, query=query)
+        SearchHistory.objects.update(timestamp=self.old)
+        # Агрегат дня покриває лише один з трьох запитів
+        for period, bucket in (('day', day_bucket(self.old)), ('hour', hour_bucket(self.old))):
+            SearchQueryRollup.objects.create(period=period, bucket=bucket, query='berlin', count=1)
+        record_search(self.user, 'Köln')
+
+        self.assertEqual(apply_retention('SearchHistory', days=30, batch_size=1), 3)
+        day_rows = dict(
+            SearchQueryRollup.objects.filter(period='day', bucket__lt=self.old + timedelta(days=1))
+            .values_list('query', 'count')
+        )
+        self.assertEqual(day_rows, {'berlin': 2, 'hamburg': 1})
+        self.assertEqual(
+            list(SearchQueryRollup.objects.filter(period='hour').values_list('query', flat=True)), ['köln']
+        )
+
+    def test_view_history_is_merged_into_sketches(self):
+        ViewHistory.objects.create(user=self.user, property=self.property)
+        ViewHistory.objects.update(timestamp=self.old)
+
+        self.assertEqual(apply_retention('ViewHistory', days=30), 1)
+        self.assertFalse(ViewHistory.objects.exists())
+        total, _ = unique_viewers(self.property.pk, self.old.date() - timedelta(days=1), timezone.localdate())
+        self.assertEqual(total, 1)
+        self.assertEqual(len(list(iter_archived_rows('ViewHistory'))), 1)
+
+
+class ViewHistoryExpansionTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O', last_name='W'
+        )
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='pass12345')
+        property_type = PropertyType.objects.create(name='Flat')
+        location = Location.objects.create(city='Berlin')
+        for index in range(3):
+            prop = Property.objects.create(
+                owner=owner, title=f'Flat {index}', description='Nice ' * 50, property_type=property_type,
+                location=location, price=100, rooms=2, area=50,
+            )
+            ViewHistory.objects.create(user=self.viewer, property=prop)
+        reference_data.current()
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('view-history'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_collapsed_history_skips_property_joins(self):
+        full, full_queries = self.get({})
+        collapsed, collapsed_queries = self.get({'expand': ''})
+
+        self.assertIn('property_details', full.data['results'][0])
+        self.assertEqual(set(collapsed.data['results'][0]), {'id', 'user', 'property', 'timestamp'})
+        self.assertLess(len(collapsed.content), len(full.content) / 5)
+        self.assertLess(len(collapsed_queries), len(full_queries))
+        self.assertFalse([query for query in collapsed_queries if 'properties_' in query['sql']])
+
+    def test_nested_fields_select_columns_of_joined_property(self):
+        response, queries = self.get({'fields': 'property,property_details.title,property_details.owner_name'})
+
+        self.assertEqual(response.data['results'][0]['property_details'], {'title': 'Flat 2', 'owner_name': 'O W'})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('description', queries[-1]['sql'])
@@ -0,0 +1,101 @@
+import hashlib
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PropertyViewSketch
+
+HLL_PRECISION = 9
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+
+class HyperLogLog:
+    """
+    HyperLogLog з 2^9 однобайтовими регістрами (512 байт, стандартна похибка ~4.6%).
+    Скетчі об'єднуються поелементним максимумом, тож денні скетчі можна складати в будь-який діапазон.
+    """
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(HLL_REGISTERS)
+        if len(self.registers) != HLL_REGISTERS:
+            raise ValueError('Неочікуваний розмір HyperLogLog-скетчу')
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(bytes(data))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        """Додає значення; повертає True, якщо скетч змінився"""
+        digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+        x = int.from_bytes(digest, 'big')
+        index = x >> (64 - HLL_PRECISION)
+        rest_bits = 64 - HLL_PRECISION
+        rest = x & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = HLL_REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Корекція для малих значень: лінійний підрахунок
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+def visitor_key(request):
+    """Ідентифікатор переглядача: id користувача або IP + User-Agent для анонімних"""
+    if request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    address = forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+    return f"a:{address}|{request.META.get('HTTP_USER_AGENT', '')}"
+
+
+def record_unique_view(property_id, visitor, day=None):
+    day = day or timezone.localdate()
+    with transaction.atomic():
+        sketch, created = PropertyViewSketch.objects.select_for_update().get_or_create(
+            property_id=property_id, day=day,
+            defaults={'registers': HyperLogLog().to_bytes()},
+        )
+        hll = HyperLogLog.from_bytes(sketch.registers)
+        # Повторні перегляди зазвичай не змінюють регістри — тоді запис не потрібен
+        if hll.add(visitor):
+            sketch.registers = hll.to_bytes()
+            sketch.save(update_fields=['registers'])
+
+
+def unique_viewers(property_id, date_from, date_to):
+    """
+    Повертає (загальна оцінка за діапазон, [(день, оцінка), ...]) для днів із переглядами
+    """
+    total = HyperLogLog()
+    daily = []
+    sketches = PropertyViewSketch.objects.filter(
+        property_id=property_id, day__gte=date_from, day__lte=date_to
+    ).order_by('day').values_list('day', 'registers')
+    for day, registers in sketches:
+        hll = HyperLogLog.from_bytes(registers)
+        daily.append((day, hll.count()))
+        total.merge(hll)
+    return total.count(), daily
+
+
+def default_range(days=7):
+    date_to = timezone.localdate()
+    return date_to - timedelta(days=days - 1), date_to
@@ -1,10 +1,15 @@
 from django.urls import path
-from .views import PopularSearchesView, UserViewHistoryView, RecordPropertyViewView
+from .views import (
+    PopularSearchesView, LivePopularSearchesView, UserViewHistoryView, RecordPropertyViewView,
+    PropertyUniqueViewersView
+)
 
 urlpatterns = [
     path('popular-searches/', PopularSearchesView.as_view(), name='popular-searches'),
+    path('popular-searches/live/', LivePopularSearchesView.as_view(), name='popular-searches-live'),
     path('history/', UserViewHistoryView.as_view(), name='view-history'),
     path('record/<int:property_id>/', RecordPropertyViewView.as_view(), name='record-view'),
+    path('unique-viewers/<int:property_id>/', PropertyUniqueViewersView.as_view(), name='unique-viewers'),
 
 
 ]
\ No newline at end of file
@@ -1,13 +1,17 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Count
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date
+from drf_spectacular.utils import extend_schema
 
 from .models import SearchHistory, ViewHistory
 from .serializers import SearchHistorySerializer, ViewHistorySerializer, PopularSearchSerializer
+from .search_stats import live_sketch, popular_queries
+from .unique_viewers import default_range, unique_viewers
 from properties.models import Property
+from rental_project.query_inspection import query_budget
+from rental_project.sparse_fields import SPARSE_FIELDS_PARAMETERS, sparse_queryset
 
 
 class PopularSearchesView(generics.ListAPIView):
@@ -18,16 +22,22 @@ class PopularSearchesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        # Отримуємо статистику за останній місяць
-        last_month = timezone.now() - timedelta(days=30)
+        # Статистика за останній місяць з денних агрегатів замість GROUP BY по сирих запитах
+        return popular_queries(days=30, limit=10)
 
-        return SearchHistory.objects.filter(
-            timestamp__gte=last_month
-        ).values('query').annotate(
-            count=Count('query')
-        ).order_by('-count')[:10]
 
+class LivePopularSearchesView(APIView):
+    """
+    Популярні запити поточної години з in-memory скетчу процесу
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
+    def get(self, request):
+        return Response(live_sketch.top(10))
+
+
+@extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+@query_budget(5)
 class UserViewHistoryView(generics.ListAPIView):
     """
     Отримання історії переглядів поточного користувача
@@ -36,9 +46,11 @@ class UserViewHistoryView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return ViewHistory.objects.filter(
+        return sparse_queryset(self, ViewHistory.objects.filter(
             user=self.request.user
-        ).order_by('-timestamp')
+        ).select_related(
+            'property__owner', 'property__location'
+        ).prefetch_related('property__images').order_by('-timestamp'))
 
 
 class RecordPropertyViewView(APIView):
@@ -75,4 +87,47 @@ class RecordPropertyViewView(APIView):
             return Response(
                 {"detail": "Объявление не найдено"},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+class PropertyUniqueViewersView(APIView):
+    """
+    Кількість унікальних переглядачів оголошення по днях та за весь діапазон (тільки для власника)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, property_id):
+        try:
+            property_obj = Property.objects.only('owner_id').get(pk=property_id)
+        except Property.DoesNotExist:
+            return Response(
+                {"detail": "Объявление не найдено"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if property_obj.owner_id != request.user.pk:
+            return Response(
+                {"detail": "Статистика доступна только владельцу объявления"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        date_from, date_to = default_range()
+        try:
+            if request.query_params.get('date_from'):
+                date_from = parse_date(request.query_params['date_from'])
+            if request.query_params.get('date_to'):
+                date_to = parse_date(request.query_params['date_to'])
+        except ValueError:
+            date_from = date_to = None
+        if date_from is None or date_to is None or date_from > date_to:
+            return Response(
+                {"detail": "Неверный диапазон дат"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        total, daily = unique_viewers(property_id, date_from, date_to)
+        return Response({
+            'property': property_id,
+            'date_from': date_from,
+            'date_to': date_to,
+            'unique_viewers': total,
+            'daily': [{'day': day, 'unique_viewers': count} for day, count in daily],
+        })
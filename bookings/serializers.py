@@ -1,11 +1,14 @@
 from rest_framework import serializers
+from rental_project.compiled_serializers import CompiledListSerializer
+from rental_project.sparse_fields import SparseFieldsMixin
 from .models import Booking
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
         read_only_fields = ['tenant', 'created_at', 'updated_at']
+        list_serializer_class = CompiledListSerializer
 
 class BookingCreateSerializer(serializers.ModelSerializer):
     class Meta:
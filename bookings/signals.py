@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rental_project.cache import invalidate
+from .models import Booking
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_cache(sender, instance, **kwargs):
+    invalidate(f'property:{instance.property_id}')
@@ -4,12 +4,16 @@ from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
 from django.db.models import Q
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
 from .models import Booking
 from .permissions import OnlyOwnerChangeStatus
 from .serializers import BookingSerializer, BookingCreateSerializer, BookingUpdateSerializer
+from rental_project.query_inspection import query_budget
+from rental_project.sparse_fields import SPARSE_FIELDS_PARAMETERS, sparse_queryset
 
+@extend_schema_view(retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS))
+@query_budget({'list': 4, 'retrieve': 4})
 class BookingViewSet(viewsets.ModelViewSet):
     """
     ViewSet для управління бронюваннями
@@ -22,10 +26,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.user_type == 'tenant':
             # Орендар бачить тільки свої бронювання
-            return Booking.objects.filter(tenant=user)
+            return sparse_queryset(self, Booking.objects.filter(tenant=user))
         elif user.user_type == 'landlord':
             # Власник бачить бронювання своїх об'єктів
-            return Booking.objects.filter(property__owner=user)
+            return sparse_queryset(self, Booking.objects.filter(property__owner=user))
         return Booking.objects.none()
 
     def get_serializer_class(self):
@@ -50,7 +54,8 @@ class BookingViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter(name='status', description='Фільтр по статусу бронювання', required=False, type=str)
+            OpenApiParameter(name='status', description='Фільтр по статусу бронювання', required=False, type=str),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -0,0 +1,90 @@
+from django.db.models import F
+from rest_framework import filters, permissions
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+
+from analytics.unique_viewers import record_unique_view, visitor_key
+from rental_project.async_views import AsyncListAPIView, AsyncRetrieveAPIView, fire_and_forget
+from rental_project.db_router import no_pin
+from rental_project.sparse_fields import sparse_queryset
+from .filters import PropertyFilter
+from .models import Location, Property, PropertyType
+from .reference_data import reference_data
+from .serializers import LocationSerializer, PropertySerializer, PropertyTypeSerializer
+# У async-коді зв'язки мають бути завантажені наперед: ліниве звернення до БД з event loop заборонене
+from .views import PROPERTY_QUERYSET, PropertyDetailView, PropertyListView, ReferenceListMixin, track_search
+
+
+def count_property_view(property_id, visitor):
+    with no_pin():
+        Property.objects.filter(pk=property_id).update(views_count=F('views_count') + 1)
+        record_unique_view(property_id, visitor)
+
+
+class ReferenceDataMixin:
+    """
+    Знімок довідника звіряється й за потреби перечитується в потоці initial(),
+    а серіалізатори в event loop лише читають його
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        reference_data.current()
+
+
+class PropertyListAsyncView(ReferenceDataMixin, AsyncListAPIView):
+    """
+    Async-версія PropertyListView з тими самими фільтрами, пошуком, сортуванням і пагінацією
+    """
+    queryset = PROPERTY_QUERYSET.filter(status='active')
+    serializer_class = PropertySerializer
+    query_budget = PropertyListView.query_budget
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_class = PropertyFilter
+    search_fields = ['title', 'description', 'location__city', 'location__district']
+    ordering_fields = ['price', 'created_at', 'views_count']
+
+    def get_queryset(self):
+        return sparse_queryset(self, super().get_queryset())
+
+    async def get(self, request, *args, **kwargs):
+        response = await super().get(request, *args, **kwargs)
+        track_search(request)
+        return response
+
+
+class PropertyDetailAsyncView(ReferenceDataMixin, AsyncRetrieveAPIView):
+    """
+    Async-версія PropertyDetailView; лічильник переглядів і скетч унікальних переглядачів
+    оновлюються у фоні, відповідь вже містить збільшений лічильник
+    """
+    queryset = PROPERTY_QUERYSET
+    serializer_class = PropertySerializer
+    query_budget = PropertyDetailView.query_budget
+
+    def get_queryset(self):
+        return sparse_queryset(self, super().get_queryset(), always=['views_count'])
+
+    async def get(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        instance.views_count += 1
+        fire_and_forget(count_property_view, instance.pk, visitor_key(request))
+        return Response(self.get_serializer(instance).data)
+
+
+class PropertyTypeListAsyncView(ReferenceDataMixin, ReferenceListMixin, AsyncListAPIView):
+    queryset = PropertyType.objects.all()
+    serializer_class = PropertyTypeSerializer
+    permission_classes = [permissions.AllowAny]
+    reference = 'property_types'
+
+    async def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+
+class LocationListAsyncView(AsyncListAPIView):
+    queryset = Location.objects.all()
+    serializer_class = LocationSerializer
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['city', 'district']
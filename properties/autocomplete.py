@@ -0,0 +1,243 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from analytics.search_stats import normalize_query, popular_queries
+from rental_project.async_views import fire_and_forget
+from .models import Location
+
+# Для коротких префіксів діапазон збігів великий, тому їхні top-k рахуються заздалегідь
+PRECOMPUTED_PREFIX_LENGTH = 2
+PRECOMPUTED_TOP = 20
+REBUILD_INTERVAL = 300
+POPULAR_QUERIES_LIMIT = 1000
+
+
+def _row(entry, text, weight):
+    # Повний ключ запису в кінці рядка дає змогу знайти й замінити саме цей запис
+    kind, key = entry[:2]
+    return key, kind, text, weight, entry
+
+
+class PrefixIndex:
+    """
+    Незмінний знімок індексу: відсортовані нормалізовані ключі + bisect для пошуку діапазону.
+    Після побудови не змінюється, тому читання не потребує блокувань.
+    """
+
+    def __init__(self, entries):
+        # entries: {(kind, key, ...): (text, weight)}; решта елементів ключа розрізняє однакові назви
+        self.rows = sorted(_row(entry, text, weight) for entry, (text, weight) in entries.items() if entry[1])
+        self.keys = [row[0] for row in self.rows]
+        self.built_at = time.monotonic()
+        self.prefix_top = {}
+        self._refresh_prefix_top(self.keys)
+
+    def _refresh_prefix_top(self, keys):
+        prefixes = {key[:length] for key in keys for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)}
+        for prefix in prefixes:
+            start, end = self._range(prefix)
+            if start == end:
+                self.prefix_top.pop(prefix, None)
+            else:
+                self.prefix_top[prefix] = self._scan(prefix, PRECOMPUTED_TOP)
+
+    def _range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\uffff', start)
+        return start, end
+
+    def _scan(self, prefix, limit):
+        start, end = self._range(prefix)
+        best = heapq.nlargest(limit, self.rows[start:end], key=lambda row: (row[3], row[2]))
+        return [{'text': text, 'kind': kind, 'weight': weight} for _, kind, text, weight, _ in best]
+
+    def updated(self, removed=(), added=None):
+        """
+        Новий знімок, у якому прибрано всі записи з (kind, key) з removed і додано/замінено записи added.
+        Рядки вставляються bisect'ом у копію відсортованого списку, а top-k перераховуються лише
+        для префіксів змінених ключів — решта знімка спільна з поточним.
+        """
+        added = {entry: value for entry, value in (added or {}).items() if entry[1]}
+        rows, keys = list(self.rows), list(self.keys)
+        removed = set(removed)
+        touched = {key for _, key in removed} | {entry[1] for entry in added}
+
+        for key in touched:
+            start = bisect_left(keys, key)
+            end = bisect_right(keys, key, start)
+            stale = [
+                position for position in range(start, end)
+                if (rows[position][1], key) in removed or rows[position][4] in added
+            ]
+            for position in reversed(stale):
+                del rows[position]
+                del keys[position]
+
+        for entry, (text, weight) in added.items():
+            row = _row(entry, text, weight)
+            position = bisect_left(rows, row)
+            rows.insert(position, row)
+            keys.insert(position, row[0])
+
+        index = PrefixIndex.__new__(PrefixIndex)
+        index.rows, index.keys = rows, keys
+        index.built_at = self.built_at
+        index.prefix_top = dict(self.prefix_top)
+        index._refresh_prefix_top(touched)
+        return index
+
+    def complete(self, query, limit=10):
+        prefix = normalize_query(query)
+        if not prefix:
+            return []
+        if limit <= PRECOMPUTED_TOP and prefix in self.prefix_top:
+            return self.prefix_top[prefix][:limit]
+        return self._scan(prefix, limit)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def _iexact_any(field, values):
+    condition = Q(pk__in=[])
+    for value in values:
+        condition |= Q(**{f'{field}__iexact': value.strip()})
+    return condition
+
+
+def _location_entries(cities=None, districts=None):
+    """Міста та райони з вагою = кількість активних оголошень (+1, щоб показувати й порожні)"""
+    entries = {}
+    listings = Count('properties', filter=Q(properties__status='active'))
+
+    locations = Location.objects.all()
+    if cities is not None:
+        locations = locations.filter(_iexact_any('city', cities))
+    for row in locations.values('city').annotate(listings=listings).order_by():
+        key = normalize_query(row['city'])
+        text, weight = entries.get(('city', key), (row['city'], 0))
+        entries[('city', key)] = (text, weight + row['listings'] + 1)
+
+    locations = Location.objects.exclude(district__isnull=True).exclude(district='')
+    if districts is not None:
+        locations = locations.filter(_iexact_any('district', districts))
+    for row in locations.values('district', 'city').annotate(listings=listings).order_by():
+        # Однакові назви районів у різних містах — окремі підказки
+        key = ('district', normalize_query(row['district']), normalize_query(row['city']))
+        text, weight = entries.get(key, (f"{row['district']}, {row['city']}", 0))
+        entries[key] = (text, weight + row['listings'] + 1)
+
+    return entries
+
+
+def build_index():
+    entries = _location_entries()
+    for row in popular_queries(days=30, limit=POPULAR_QUERIES_LIMIT):
+        entries[('query', row['query'])] = (row['query'], row['count'])
+    return PrefixIndex(entries)
+
+
+class AutocompleteService:
+    """
+    Тримає поточний знімок індексу. Читачі беруть посилання на знімок без блокувань;
+    записувачі будують новий знімок під блокуванням і атомарно підміняють посилання.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._write_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._pending_lock = threading.Lock()
+        self._pending_cities = set()
+        self._pending_districts = set()
+        self._update_queued = False
+
+    @property
+    def is_loaded(self):
+        return self._index is not None
+
+    def get_index(self):
+        index = self._index
+        if index is None:
+            with self._write_lock:
+                if self._index is None:
+                    self._index = build_index()
+                index = self._index
+        elif time.monotonic() - index.built_at > REBUILD_INTERVAL:
+            # Зміни з інших процесів підхоплюються періодичною фоновою перебудовою
+            self._refresh_in_background()
+        return index
+
+    def complete(self, query, limit=10):
+        return self.get_index().complete(query, limit)
+
+    def _refresh_in_background(self):
+        # Перевірка й встановлення прапорця — одна операція, інакше кілька читачів запустять кілька перебудов
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                index = build_index()
+                with self._write_lock:
+                    self._index = index
+            finally:
+                with self._refresh_lock:
+                    self._refreshing = False
+                connection.close()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def update_locations(self, cities=(), districts=()):
+        """
+        Інкрементально перераховує лише вказані міста й райони. Перерахунок виконується після коміту
+        (відкат не залишає фантомних підказок) і поза запитом; зміни, що надійшли, поки попередній
+        перерахунок чекав у черзі, об'єднуються в один.
+        """
+        cities = {city for city in cities if city}
+        districts = {district for district in districts if district}
+        if not self.is_loaded or not (cities or districts):
+            return
+        transaction.on_commit(partial(self._enqueue_locations, cities, districts))
+
+    def _enqueue_locations(self, cities, districts):
+        with self._pending_lock:
+            self._pending_cities |= cities
+            self._pending_districts |= districts
+            if self._update_queued:
+                return
+            self._update_queued = True
+        fire_and_forget(self._apply_pending_locations)
+
+    def _apply_pending_locations(self):
+        with self._pending_lock:
+            cities, districts = self._pending_cities, self._pending_districts
+            self._pending_cities, self._pending_districts = set(), set()
+            self._update_queued = False
+        if not (cities or districts):
+            return
+
+        # Запит до БД — під блокуванням, щоб паралельні перерахунки не підмінили новіші ваги старішими
+        with self._write_lock:
+            if self._index is None:
+                return
+            # Район перераховується в усіх містах, де він є, тож прибираємо всі його записи
+            removed = {('city', normalize_query(city)) for city in cities}
+            removed |= {('district', normalize_query(district)) for district in districts}
+            self._index = self._index.updated(removed, _location_entries(cities=cities, districts=districts))
+
+    def reset(self):
+        with self._write_lock:
+            self._index = None
+
+
+autocomplete = AutocompleteService()
@@ -16,4 +16,5 @@ class PropertyFilter(django_filters.FilterSet):
         fields = [
             'min_price', 'max_price', 'min_rooms', 'max_rooms',
             'city', 'district', 'property_type', 'status'
-        ]
\ No newline at end of file
+        ]
+
@@ -0,0 +1,179 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.db.models import F
+
+from rental_project.cache import invalidate
+from .image_processing import render_variants
+
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+
+def variant_paths(variants):
+    """Шляхи файлів варіантів у сховищі з поля PropertyImage.variants"""
+    return [variant[image_format] for variant in variants.values() for image_format in _EXTENSIONS
+            if variant.get(image_format)]
+
+
+def delete_variants(variants):
+    for path in variant_paths(variants):
+        try:
+            default_storage.delete(path)
+        except OSError:
+            logger.warning('Не вдалося видалити варіант зображення %s', path, exc_info=True)
+
+
+class ImagePipeline:
+    """
+    Фонова обробка завантажених зображень: декодування й зменшення — у пулі процесів (CPU, GIL),
+    читання оригіналу, запис варіантів і оновлення рядка — у невеликому пулі потоків-диспетчерів.
+    workers=0 — обробка в потоці-диспетчері без окремих процесів (тести, малі інсталяції).
+    Невдала спроба повторюється із зростаючою затримкою; після max_attempts зображення позначається failed,
+    і його можна обробити ще раз командою process_property_images --failed.
+    """
+
+    def __init__(self, workers=2, max_attempts=3, retry_delay=5, variants=None, jpeg_quality=82, webp_quality=80,
+                 webp_method=4, upload_to='property_images/variants', enabled=True):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.variants = variants or {'thumbnail': (320, 320), 'card': (800, 800), 'full': (1920, 1920)}
+        self.jpeg_quality = jpeg_quality
+        self.webp_quality = webp_quality
+        self.webp_method = webp_method
+        self.upload_to = upload_to
+        self.enabled = enabled
+        self._processes = None
+        self._dispatcher = None
+        self._executor_lock = threading.Lock()
+        self._scheduled = set()
+        self._scheduled_lock = threading.Lock()
+
+    @property
+    def processes(self):
+        if self._processes is None:
+            with self._executor_lock:
+                if self._processes is None:
+                    # spawn: fork процесу з потоками сервера й відкритими з'єднаннями з БД небезпечний
+                    self._processes = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._processes
+
+    @property
+    def dispatcher(self):
+        if self._dispatcher is None:
+            with self._executor_lock:
+                if self._dispatcher is None:
+                    self._dispatcher = ThreadPoolExecutor(max(self.workers, 1), thread_name_prefix='image-pipeline')
+        return self._dispatcher
+
+    def render(self, data):
+        """Варіанти, розміри й заглушка для байтів оригіналу (image_processing.render_variants)"""
+        args = (data, self.variants, self.jpeg_quality, self.webp_quality, self.webp_method)
+        if not self.workers:
+            return render_variants(*args)
+        return self.processes.submit(render_variants, *args).result()
+
+    def schedule(self, image_id, attempt=1):
+        """Ставить зображення в чергу обробки; повторна постановка вже запланованого ігнорується"""
+        if not self.enabled:
+            return
+        with self._scheduled_lock:
+            if image_id in self._scheduled:
+                return
+            self._scheduled.add(image_id)
+        self.dispatcher.submit(self._run, image_id, attempt)
+
+    def _run(self, image_id, attempt):
+        with self._scheduled_lock:
+            self._scheduled.discard(image_id)
+        try:
+            self.process(image_id)
+        except Exception:
+            self._failed(image_id, attempt)
+        finally:
+            close_old_connections()
+
+    def _failed(self, image_id, attempt):
+        from .models import PropertyImage
+
+        if attempt < self.max_attempts:
+            delay = self.retry_delay * 2 ** (attempt - 1)
+            logger.warning('Обробка зображення %s не вдалася (спроба %s), повтор через %s с',
+                           image_id, attempt, delay, exc_info=True)
+            timer = threading.Timer(delay, self.schedule, (image_id, attempt + 1))
+            timer.daemon = True
+            timer.start()
+        else:
+            logger.error('Обробка зображення %s не вдалася після %s спроб', image_id, attempt, exc_info=True)
+            PropertyImage.objects.filter(pk=image_id, processing_status='pending').update(processing_status='failed')
+
+    def process(self, image_id):
+        """
+        Синхронно обробляє одне зображення. Повертає False, якщо рядок видалено або файл замінено
+        під час обробки (тоді нові варіанти відкидаються — їх зробить обробка нового файлу)
+        """
+        from .models import PropertyImage
+
+        image = PropertyImage.objects.filter(pk=image_id).only('image', 'variants', 'property_id').first()
+        if image is None or not image.image:
+            return False
+        PropertyImage.objects.filter(pk=image_id).update(processing_attempts=F('processing_attempts') + 1)
+        with image.image.open('rb') as source:
+            result = self.render(source.read())
+
+        stem = os.path.splitext(os.path.basename(image.image.name))[0]
+        stored = {}
+        try:
+            for name, variant in result['variants'].items():
+                stored[name] = {'width': variant['width'], 'height': variant['height']}
+                for image_format, extension in _EXTENSIONS.items():
+                    stored[name][image_format] = default_storage.save(
+                        f'{self.upload_to}/{image_id}/{stem}_{name}.{extension}', ContentFile(variant[image_format])
+                    )
+            updated = PropertyImage.objects.filter(pk=image_id, image=image.image.name).update(
+                width=result['width'], height=result['height'], placeholder=result['placeholder'],
+                variants=stored, processing_status='ready',
+            )
+        except BaseException:
+            delete_variants(stored)
+            raise
+        if not updated:
+            delete_variants(stored)
+            return False
+        delete_variants(image.variants)
+        invalidate(f'property:{image.property_id}')
+        return True
+
+    def process_many(self, image_ids):
+        """Обробляє зображення паралельно (без повторів); повертає [(id, True/False або виняток)] у порядку id"""
+        def run(image_id):
+            try:
+                return self.process(image_id)
+            except Exception as exc:
+                return exc
+            finally:
+                close_old_connections()
+
+        return list(zip(image_ids, self.dispatcher.map(run, image_ids)))
+
+
+_options = getattr(settings, 'PROPERTY_IMAGE_PIPELINE', {})
+image_pipeline = ImagePipeline(
+    workers=_options.get('WORKERS', 2),
+    max_attempts=_options.get('MAX_ATTEMPTS', 3),
+    retry_delay=_options.get('RETRY_DELAY', 5),
+    variants=_options.get('VARIANTS'),
+    jpeg_quality=_options.get('JPEG_QUALITY', 82),
+    webp_quality=_options.get('WEBP_QUALITY', 80),
+    webp_method=_options.get('WEBP_METHOD', 4),
+    enabled=_options.get('ENABLED', True),
+)
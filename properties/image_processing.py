@@ -0,0 +1,135 @@
+"""
+Обробка зображень оголошень без Django: модуль імпортується у воркерах пулу процесів
+(properties/image_pipeline.py), тож залежить лише від Pillow
+"""
+import math
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+_BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+# Тег EXIF Orientation: значення 5–8 означають поворот на 90°, тобто ширина й висота міняються місцями
+_ORIENTATION = 0x0112
+# Розмір, до якого зменшується зображення перед розрахунком заглушки: компоненти BlurHash — низькі частоти
+_PLACEHOLDER_SAMPLE = 32
+
+
+def _base83(value, length):
+    return ''.join(_BASE83[value // 83 ** (length - position - 1) % 83] for position in range(length))
+
+
+def _srgb_to_linear(value):
+    value /= 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+_LINEAR = [_srgb_to_linear(value) for value in range(256)]
+
+
+def blurhash(image, x_components=4, y_components=3):
+    """
+    Заглушка BlurHash (https://blurha.sh) для RGB-зображення: рядок ~20–30 символів, з якого клієнт
+    малює розмиту версію, поки вантажиться картинка. DCT рахується роздільно — спершу по рядках, потім по стовпцях.
+    """
+    sample = image.copy()
+    sample.thumbnail((_PLACEHOLDER_SAMPLE, _PLACEHOLDER_SAMPLE), Image.Resampling.BILINEAR)
+    width, height = sample.size
+    pixels = [(_LINEAR[r], _LINEAR[g], _LINEAR[b]) for r, g, b in sample.getdata()]
+
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+    # rows[i][y] — сума рядка y, зважена базисною функцією i по горизонталі
+    rows = []
+    for weights in cos_x:
+        row_sums = []
+        for y in range(height):
+            r = g = b = 0.0
+            for weight, (pr, pg, pb) in zip(weights, pixels[y * width:(y + 1) * width]):
+                r += weight * pr
+                g += weight * pg
+                b += weight * pb
+            row_sums.append((r, g, b))
+        rows.append(row_sums)
+
+    factors = []
+    for j, weights in enumerate(cos_y):
+        for i in range(x_components):
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            r = g = b = 0.0
+            for weight, (sr, sg, sb) in zip(weights, rows[i]):
+                r += weight * sr
+                g += weight * sg
+                b += weight * sb
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83(x_components - 1 + (y_components - 1) * 9, 1)
+    if ac:
+        quantised_max = max(0, min(82, math.floor(max(abs(c) for factor in ac for c in factor) * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+
+    def quantise(value):
+        value /= max_value
+        return max(0, min(18, math.floor(math.copysign(abs(value) ** 0.5, value) * 9 + 9.5)))
+
+    for r, g, b in ac:
+        result += _base83(quantise(r) * 19 * 19 + quantise(g) * 19 + quantise(b), 2)
+    return result
+
+
+def _to_rgb(image):
+    if image.mode == 'RGB':
+        return image
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # JPEG не має альфа-каналу: прозорі ділянки — на білому тлі
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image, image_format, **options):
+    buffer = BytesIO()
+    # exif / icc_profile не передаються, тож метадані оригіналу (GPS, модель камери тощо) у варіанти не потрапляють
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(data, variants, jpeg_quality=82, webp_quality=80, webp_method=4):
+    """
+    Зменшені копії зображення для кожного варіанта {назва: (макс. ширина, макс. висота)} у JPEG і WebP
+    без метаданих, розміри оригіналу з урахуванням EXIF-орієнтації та заглушка BlurHash.
+    Зображення лише зменшуються; кожен менший варіант рахується з попереднього більшого.
+    """
+    with Image.open(BytesIO(data)) as source:
+        width, height = source.size
+        if source.getexif().get(_ORIENTATION) in (5, 6, 7, 8):
+            width, height = height, width
+        largest = max(max(size) for size in variants.values())
+        # JPEG декодується одразу в зменшеному масштабі (кратному 1/8), не меншому за найбільший варіант
+        source.draft('RGB', (largest, largest))
+        image = _to_rgb(ImageOps.exif_transpose(source))
+
+    rendered = {}
+    for name, size in sorted(variants.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        rendered[name] = {
+            'width': image.width,
+            'height': image.height,
+            'jpeg': _encode(image, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True),
+            'webp': _encode(image, 'WEBP', quality=webp_quality, method=webp_method),
+        }
+    return {'width': width, 'height': height, 'placeholder': blurhash(image), 'variants': rendered}
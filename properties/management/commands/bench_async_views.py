@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from properties.models import Location, Property
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+
+
+def memory_kb(field):
+    """VmRSS — поточна резидентна пам'ять процесу, VmHWM — її пік (Linux)"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Порівнює read-heavy endpoint\'и під WSGI (синхронні view, потік на з\'єднання) та ASGI '
+        '(async-view, одна корутина на з\'єднання) при N одночасних клієнтах: запити за секунду та '
+        'пам\'ять на з\'єднання. Кожен режим запускається в окремому процесі на поточній БД; '
+        'запити подаються напряму в WSGI/ASGI-обробник Django, без мережевого сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='Кількість одночасних клієнтів')
+        parser.add_argument('--requests', type=int, default=5, help='Запитів на клієнта')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            result = self.run_mode(options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        if not Property.objects.exists():
+            raise CommandError('Порожня БД: спершу заповніть її, наприклад, командою generate_dataset')
+
+        self.stdout.write(f"{options['clients']} одночасних клієнтів, {options['requests']} запитів на клієнта")
+        for mode in ('wsgi', 'asgi'):
+            env = dict(os.environ)
+            if mode == 'asgi':
+                env['RENTAL_ASYNC_VIEWS'] = '1'
+            else:
+                env.pop('RENTAL_ASYNC_VIEWS', None)
+            output = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_async_views', '--mode', mode,
+                 '--clients', str(options['clients']), '--requests', str(options['requests']),
+                 '--seed', str(options['seed'])],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            self.stdout.write(
+                f"{mode.upper()}: {result['rps']:,.0f} запитів/с, p99={result['p99_ms']:.0f} мс, "
+                f"помилок: {result['errors']}, пам'ять: +{result['memory_kb'] / 1024:.1f} МБ "
+                f"({result['memory_kb'] / options['clients']:.1f} КБ на з'єднання)"
+            )
+
+    def urls(self, seed, count):
+        rng = random.Random(seed)
+        property_ids = list(Property.objects.filter(status='active').values_list('id', flat=True)[:1000])
+        cities = list(Location.objects.values_list('city', flat=True).distinct()[:20])
+        choices = [
+            lambda: reverse('property-list') + f'?page={rng.randint(1, 5)}',
+            lambda: reverse('property-list') + f'?city={rng.choice(cities)}&ordering=-price',
+            lambda: reverse('property-detail', args=[rng.choice(property_ids)]),
+            lambda: reverse('property-reviews', args=[rng.choice(property_ids)]),
+            lambda: reverse('property-types'),
+            lambda: reverse('locations') + f'?search={rng.choice(cities)}',
+        ]
+        return [rng.choice(choices)() for _ in range(count)]
+
+    def run_mode(self, options):
+        user = User.objects.order_by('id').first()
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        clients, per_client = options['clients'], options['requests']
+        urls = self.urls(options['seed'], clients * per_client)
+        batches = [urls[index::clients] for index in range(clients)]
+
+        if options['mode'] == 'wsgi':
+            runner = self.run_wsgi
+        else:
+            runner = self.run_asgi
+        # Прогрів: імпорти, з'єднання з БД, кеші токенів і автодоповнення
+        runner([urls[:20]], token)
+
+        idle = memory_kb('VmRSS')
+        started = time.perf_counter()
+        timings, errors = runner(batches, token)
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        return {
+            'rps': len(timings) / elapsed,
+            'p99_ms': timings[max(int(len(timings) * 0.99) - 1, 0)] * 1000 if timings else 0,
+            'errors': errors,
+            'memory_kb': max(memory_kb('VmHWM') - idle, 0),
+        }
+
+    def run_wsgi(self, batches, token):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        handler = WSGIHandler()
+        timings, errors = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(len(batches))
+
+        def client(paths):
+            local_timings, local_errors = [], 0
+            start.wait()
+            for path in paths:
+                url = urlsplit(path)
+                environ = {
+                    'REQUEST_METHOD': 'GET', 'PATH_INFO': url.path, 'QUERY_STRING': url.query,
+                    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                    'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': f'Bearer {token}',
+                    'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+                }
+                status = []
+                began = time.perf_counter()
+                body = handler(environ, lambda code, headers: status.append(code))
+                b''.join(body)
+                body.close()
+                local_timings.append(time.perf_counter() - began)
+                local_errors += not status[0].startswith('200')
+            with lock:
+                timings.extend(local_timings)
+                errors.append(local_errors)
+
+        threads = [threading.Thread(target=client, args=(paths,)) for paths in batches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, sum(errors)
+
+    def run_asgi(self, batches, token):
+        from django.core.asgi import get_asgi_application
+
+        application = get_asgi_application()
+
+        async def request(path):
+            url = urlsplit(path)
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(),
+                'query_string': url.query.encode(), 'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+                'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+            }
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await application(scope, receive, send)
+            return status[0]
+
+        async def client(paths, timings):
+            errors = 0
+            for path in paths:
+                began = time.perf_counter()
+                errors += await request(path) != 200
+                timings.append(time.perf_counter() - began)
+            return errors
+
+        async def main():
+            timings = []
+            errors = await asyncio.gather(*(client(paths, timings) for paths in batches))
+            return timings, sum(errors)
+
+        return asyncio.run(main())
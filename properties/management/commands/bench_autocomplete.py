@@ -0,0 +1,55 @@
+import random
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties.autocomplete import PrefixIndex
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк латентності префіксного індексу автодоповнення на синтетичних даних (без БД)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=100_000)
+        parser.add_argument('--lookups', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        kinds = ('city', 'district', 'query')
+
+        entries = {}
+        for _ in range(options['entries']):
+            text = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 14)))
+            entries[(rng.choice(kinds), text)] = (text.title(), rng.randint(1, 10_000))
+
+        started = time.perf_counter()
+        index = PrefixIndex(entries)
+        build_elapsed = time.perf_counter() - started
+
+        # Перерахунок одного міста, як після збереження оголошення
+        entry = rng.choice(list(entries))
+        started = time.perf_counter()
+        index.updated({entry[:2]}, {entry: (entries[entry][0], entries[entry][1] + 1)})
+        update_elapsed = time.perf_counter() - started
+
+        keys = index.keys
+        queries = [rng.choice(keys)[:rng.randint(1, 6)] for _ in range(options['lookups'])]
+        timings = []
+        for query in queries:
+            started = time.perf_counter_ns()
+            index.complete(query, 10)
+            timings.append((time.perf_counter_ns() - started) / 1000)
+
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(
+            f'Записів в індексі: {len(index)}, побудова: {build_elapsed * 1000:.0f} мс, '
+            f'оновлення одного запису: {update_elapsed * 1000:.1f} мс'
+        )
+        self.stdout.write(
+            f'Пошук top-10: p50={statistics.median(timings):.1f} мкс, p99={p99:.1f} мкс, '
+            f'max={timings[-1]:.1f} мкс'
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from analytics.models import ViewHistory
+from analytics.serializers import ViewHistorySerializer
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+from properties.models import Property
+from properties.serializers import PropertySerializer
+from properties.views import PROPERTY_QUERYSET
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Порівнює серіалізацію списків звичайними ModelSerializer і скомпільованими функціями '
+        '(rental_project/compiled_serializers.py) на рядках з поточної БД. Рядки читаються заздалегідь, '
+        'тож вимірюється лише серіалізація; вивід обох шляхів звіряється байт у байт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5, help='Повторів; береться найкращий час')
+
+    def handle(self, *args, **options):
+        if not Property.objects.exists():
+            raise CommandError('Порожня БД: спершу заповніть її, наприклад, командою generate_dataset')
+
+        rows = options['rows']
+        # URL зображень будуються від запиту, як у view
+        request = Request(APIRequestFactory().get('/', HTTP_HOST='localhost'))
+        cases = [
+            (PropertySerializer, PROPERTY_QUERYSET),
+            (BookingSerializer, Booking.objects.all()),
+            (ReviewSerializer, Review.objects.select_related('user', 'property')),
+            (ViewHistorySerializer,
+             ViewHistory.objects.select_related('property__owner').prefetch_related('property__images')),
+        ]
+        for serializer_class, queryset in cases:
+            instances = list(queryset[:rows])
+            if not instances:
+                self.stdout.write(f'{serializer_class.__name__}: немає рядків')
+                continue
+
+            def serialize():
+                return serializer_class(instances, many=True, context={'request': request}).data
+
+            with override_settings(COMPILED_SERIALIZERS=False):
+                stock, stock_data = self.measure(serialize, options['repeat'])
+            compiled, compiled_data = self.measure(serialize, options['repeat'])
+            identical = JSONRenderer().render(stock_data) == JSONRenderer().render(compiled_data)
+            self.stdout.write(
+                f'{serializer_class.__name__}, {len(instances)} рядків: {stock * 1000:.1f} → {compiled * 1000:.1f} мс '
+                f'(×{stock / max(compiled, 1e-9):.1f}); вивід {"збігається" if identical else "ВІДРІЗНЯЄТЬСЯ"}'
+            )
+
+    def measure(self, serialize, repeat):
+        best, data = float('inf'), None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize()
+            best = min(best, time.perf_counter() - started)
+        return best, data
@@ -0,0 +1,100 @@
+import random
+import statistics
+import tempfile
+import time
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter
+
+from properties.image_pipeline import ImagePipeline, image_pipeline
+from properties.image_processing import render_variants
+
+
+def synthetic_photo(rng, width, height):
+    """JPEG, схожий на фото за вагою й вмістом (градієнт, фігури, шум), з EXIF: камера, GPS, орієнтація"""
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        size = rng.randrange(width // 20, width // 4)
+        draw.ellipse((x, y, x + size, y + size), fill=tuple(rng.randrange(256) for _ in range(3)))
+    image = image.filter(ImageFilter.GaussianBlur(2))
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    image = Image.blend(image, noise, 0.15)
+    exif = Image.Exif()
+    exif[0x010F] = 'Synthetic camera'
+    exif[0x0112] = rng.choice([1, 1, 1, 6, 8])
+    exif[0x8825] = {1: 'N', 2: (50.0, 27.0, 0.0)}
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускна здатність фонової обробки зображень (properties/image_pipeline.py): COUNT синтетичних фото '
+        'проходять через пул процесів, варіанти записуються у тимчасове сховище. БД не використовується. '
+        'Для порівняння ту саму обробку виконує один потік без пулу на вибірці з --baseline зображень.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10_000)
+        parser.add_argument('--workers', type=int, default=image_pipeline.workers or 1,
+                            help='Процесів у пулі (за замовчуванням — як у PROPERTY_IMAGE_PIPELINE)')
+        parser.add_argument('--sources', type=int, default=16, help='Різних вихідних фото, що повторюються по колу')
+        parser.add_argument('--size', default='2400x1600', help='Розмір вихідних фото, ШxВ')
+        parser.add_argument('--baseline', type=int, default=50, help='Зображень для замірів без пулу (0 — не міряти)')
+        parser.add_argument('--webp-method', type=int, default=image_pipeline.webp_method)
+        parser.add_argument('--seed', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        width, height = (int(part) for part in options['size'].lower().split('x'))
+        sources = [synthetic_photo(rng, width, height) for _ in range(options['sources'])]
+        pipeline = ImagePipeline(
+            workers=options['workers'], variants=image_pipeline.variants,
+            jpeg_quality=image_pipeline.jpeg_quality, webp_quality=image_pipeline.webp_quality,
+            webp_method=options['webp_method'],
+        )
+
+        with tempfile.TemporaryDirectory() as location:
+            storage = FileSystemStorage(location=location)
+
+            def process(index):
+                started = time.perf_counter()
+                result = pipeline.render(sources[index % len(sources)])
+                sizes = {}
+                for name, variant in result['variants'].items():
+                    for image_format in ('jpeg', 'webp'):
+                        storage.save(f'{index}/{name}.{image_format}', ContentFile(variant[image_format]))
+                        sizes[name, image_format] = len(variant[image_format])
+                return time.perf_counter() - started, sizes
+
+            if options['baseline']:
+                started = time.perf_counter()
+                for index in range(options['baseline']):
+                    render_variants(sources[index % len(sources)], pipeline.variants,
+                                    pipeline.jpeg_quality, pipeline.webp_quality, pipeline.webp_method)
+                serial = options['baseline'] / (time.perf_counter() - started)
+                self.stdout.write(f'Без пулу, один потік: {serial:.1f} зобр./с')
+
+            # Запуск процесів пулу не входить у замір
+            pipeline.render(sources[0])
+            started = time.perf_counter()
+            results = list(pipeline.dispatcher.map(process, range(options['count'])))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        self.stdout.write(
+            f'{options["count"]} зображень {width}x{height}, {options["workers"]} процесів: {elapsed:.1f} с, '
+            f'{options["count"] / elapsed:.1f} зобр./с; затримка p50 {statistics.median(latencies) * 1000:.0f} мс, '
+            f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} мс'
+        )
+        original = statistics.mean(len(source) for source in sources)
+        self.stdout.write(f'Оригінал: {original / 1024:.0f} КБ у середньому')
+        for key in results[0][1]:
+            size = statistics.mean(sizes[key] for _, sizes in results)
+            self.stdout.write(f'  {key[0]} {key[1]}: {size / 1024:.1f} КБ ({size / original:.1%} оригіналу)')
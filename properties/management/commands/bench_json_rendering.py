@@ -0,0 +1,85 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from analytics.models import ViewHistory
+from analytics.serializers import ViewHistorySerializer
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+from properties.models import Property
+from properties.serializers import PropertySerializer
+from properties.views import PROPERTY_QUERYSET
+from rental_project.renderers import ORJSONParser, ORJSONRenderer, orjson
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer
+from users.models import User
+from users.serializers import UserSerializer
+
+
+def page(results):
+    # Так виглядає відповідь списку з PageNumberPagination
+    return {'count': len(results), 'next': 'http://testserver/api/?page=2', 'previous': None, 'results': results}
+
+
+class Command(BaseCommand):
+    help = (
+        'Порівнює стандартні JSONRenderer/JSONParser DRF з orjson-версіями на реальних відповідях кожного '
+        'застосунку з поточної БД: час рендерингу й розбору однієї відповіді та збіг виводу байт у байт'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100, help='Кількість записів у відповіді')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson не встановлено: pip install orjson')
+        if not Property.objects.exists():
+            raise CommandError('Порожня БД: спершу заповніть її, наприклад, командою generate_dataset')
+
+        size = options['size']
+        payloads = {
+            'properties': page(PropertySerializer(PROPERTY_QUERYSET[:size], many=True).data),
+            'bookings': page(BookingSerializer(Booking.objects.all()[:size], many=True).data),
+            # Сирі значення: Decimal і date кодує сам рендерер, а не серіалізатор
+            'bookings (values)': list(Booking.objects.values(
+                'id', 'property_id', 'check_in_date', 'check_out_date', 'total_price', 'status', 'created_at'
+            )[:size]),
+            'reviews': page(ReviewSerializer(
+                Review.objects.select_related('user', 'property')[:size], many=True
+            ).data),
+            'analytics': page(ViewHistorySerializer(
+                ViewHistory.objects.select_related('property__owner').prefetch_related('property__images')[:size],
+                many=True,
+            ).data),
+            'users': page(UserSerializer(User.objects.all()[:size], many=True).data),
+        }
+
+        for name, data in payloads.items():
+            stock = self.measure(options['iterations'], JSONRenderer(), JSONParser(), data)
+            fast = self.measure(options['iterations'], ORJSONRenderer(), ORJSONParser(), data)
+            self.stdout.write(
+                f'{name}: {len(stock["body"]) / 1024:.1f} КБ; '
+                f'рендеринг {stock["render"]:.0f} → {fast["render"]:.0f} мкс '
+                f'(×{stock["render"] / max(fast["render"], 1e-9):.1f}), '
+                f'розбір {stock["parse"]:.0f} → {fast["parse"]:.0f} мкс '
+                f'(×{stock["parse"] / max(fast["parse"], 1e-9):.1f}); '
+                f'вивід {"збігається" if stock["body"] == fast["body"] else "ВІДРІЗНЯЄТЬСЯ"}'
+            )
+
+    def measure(self, iterations, renderer, parser, data):
+        """Середній час рендерингу й розбору однієї відповіді, мкс"""
+        context = {'encoding': 'utf-8'}
+        started = time.perf_counter()
+        for _ in range(iterations):
+            body = renderer.render(data, 'application/json', {})
+        render = (time.perf_counter() - started) / iterations
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            parser.parse(BytesIO(body), 'application/json', context)
+        parse = (time.perf_counter() - started) / iterations
+        return {'body': body, 'render': render * 1_000_000, 'parse': parse * 1_000_000}
@@ -0,0 +1,139 @@
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+
+from analytics.models import SearchHistory
+from properties.models import Location, Property, PropertyType
+from users.models import User
+
+CITIES = ['Berlin', 'München', 'Hamburg', 'Köln', 'Leipzig']
+PROFILES = {
+    'bench_baseline': ('Поточна конфігурація', 'django.db.backends.sqlite3'),
+    'bench_concurrent': ('Профіль SQLITE_CONCURRENT', 'rental_project.sqlite_backend'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Змішане навантаження читання/запису з кількох потоків на двох тимчасових SQLite-файлах: '
+        'стандартний бекенд проти профілю з WAL і чергою записів. Поточна БД не змінюється.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=5.0, help='Секунд на кожен профіль')
+        parser.add_argument('--write-ratio', type=float, default=0.3)
+        parser.add_argument('--properties', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        directory = Path(tempfile.mkdtemp(prefix='bench-sqlite-'))
+        try:
+            for alias, (label, engine) in PROFILES.items():
+                self.add_database(alias, engine, directory / f'{alias}.sqlite3')
+                call_command('migrate', database=alias, verbosity=0)
+                self.seed(alias, options['properties'], options['seed'])
+                self.report(label, self.run(alias, options))
+                connections[alias].close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def add_database(self, alias, engine, path):
+        config = connections.configure_settings({
+            'default': connections.settings['default'],
+            alias: {'ENGINE': engine, 'NAME': str(path), 'TEST': {'MIRROR': 'default'}},
+        })
+        connections.settings[alias] = config[alias]
+
+    def seed(self, alias, properties, seed):
+        rng = random.Random(seed)
+        owner = User.objects.db_manager(alias).create_user(
+            username='bench-owner', email='bench-owner@example.com', password=None, user_type='landlord'
+        )
+        User.objects.using(alias).bulk_create(
+            [User(username=f'bench{index}', email=f'bench{index}@example.com') for index in range(100)]
+        )
+        property_type = PropertyType.objects.using(alias).create(name='Квартира')
+        locations = Location.objects.using(alias).bulk_create(
+            [Location(city=city, district=f'District {index}') for city in CITIES for index in range(10)]
+        )
+        Property.objects.using(alias).bulk_create([
+            Property(
+                owner=owner, title=f'Property {index}', description='-', property_type=property_type,
+                location=rng.choice(locations), price=rng.randint(20, 400), rooms=rng.randint(1, 5),
+                area=rng.randint(15, 200), views_count=rng.randint(0, 1000),
+            )
+            for index in range(properties)
+        ], batch_size=1000)
+
+    def run(self, alias, options):
+        property_ids = list(Property.objects.using(alias).values_list('id', flat=True))
+        user_ids = list(User.objects.using(alias).values_list('id', flat=True))
+        deadline = time.perf_counter() + options['duration']
+        reads, writes, errors = [], [], []
+        lock = threading.Lock()
+
+        def worker(number):
+            rng = random.Random(f"{options['seed']}:{number}")
+            local_reads, local_writes, local_errors = [], [], 0
+            while time.perf_counter() < deadline:
+                write = rng.random() < options['write_ratio']
+                started = time.perf_counter()
+                try:
+                    if write:
+                        # Коротка транзакція запису: лічильник переглядів + рядок історії пошуку
+                        with transaction.atomic(using=alias):
+                            Property.objects.using(alias).filter(pk=rng.choice(property_ids)).update(
+                                views_count=F('views_count') + 1
+                            )
+                            SearchHistory.objects.using(alias).create(
+                                user_id=rng.choice(user_ids), query=rng.choice(CITIES)
+                            )
+                    else:
+                        list(
+                            Property.objects.using(alias).filter(status='active', location__city=rng.choice(CITIES))
+                            .select_related('location').order_by('-views_count')[:20]
+                        )
+                except DatabaseError:
+                    local_errors += 1
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                (local_writes if write else local_reads).append(elapsed)
+            connections[alias].close()
+            with lock:
+                reads.extend(local_reads)
+                writes.extend(local_writes)
+                errors.append(local_errors)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return reads, writes, sum(errors), time.perf_counter() - started
+
+    def report(self, label, result):
+        reads, writes, errors, elapsed = result
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(
+            f'  Пропускна здатність: {(len(reads) + len(writes)) / elapsed:,.0f} оп/с, '
+            f'помилок "database is locked": {errors}'
+        )
+        for name, timings in (('Читання', reads), ('Запис', writes)):
+            if not timings:
+                continue
+            timings.sort()
+            p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+            self.stdout.write(
+                f'  {name}: {len(timings)} оп, p50={statistics.median(timings):.2f} мс, p99={p99:.2f} мс'
+            )
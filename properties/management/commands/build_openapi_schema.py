@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+from drf_spectacular.settings import spectacular_settings
+
+from rental_project.schema import render_schema_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерує OpenAPI-схему один раз (під час деплою) і записує її у файл, з якого /api/schema/ '
+        'віддає схему без інтроспекції view (RENTAL_SCHEMA_FILE)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SCHEMA_FILE, help='Шлях до файлу; за замовчуванням SCHEMA_FILE')
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError('Вкажіть --file або змінну оточення RENTAL_SCHEMA_FILE')
+        with translation.override(settings.LANGUAGE_CODE):
+            generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+            content = render_schema_file(generator.get_schema(request=None, public=True))
+        with open(options['file'], 'wb') as schema_file:
+            schema_file.write(content)
+        self.stdout.write(f'Схему записано у {options["file"]} ({len(content) / 1024:.0f} КБ)')
@@ -0,0 +1,390 @@
+import multiprocessing
+import os
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from analytics.models import SearchHistory, ViewHistory
+from analytics.search_stats import rebuild_rollups
+from bookings.models import Booking
+from properties.models import Location, Property, PropertyImage, PropertyType
+from properties.reference_data import reference_data
+from reviews.models import Review
+from users.models import User
+
+CITIES = [
+    ('Berlin', 52.5200, 13.4050, ['Mitte', 'Kreuzberg', 'Prenzlauer Berg', 'Charlottenburg', 'Neukölln']),
+    ('München', 48.1351, 11.5820, ['Altstadt', 'Schwabing', 'Maxvorstadt', 'Sendling']),
+    ('Hamburg', 53.5511, 9.9937, ['Altona', 'Eimsbüttel', 'St. Pauli', 'HafenCity']),
+    ('Köln', 50.9375, 6.9603, ['Innenstadt', 'Ehrenfeld', 'Deutz']),
+    ('Frankfurt am Main', 50.1109, 8.6821, ['Sachsenhausen', 'Bornheim', 'Westend']),
+    ('Stuttgart', 48.7758, 9.1829, ['Mitte', 'West', 'Bad Cannstatt']),
+    ('Düsseldorf', 51.2277, 6.7735, ['Altstadt', 'Oberkassel', 'Bilk']),
+    ('Dresden', 51.0504, 13.7373, ['Neustadt', 'Altstadt', 'Blasewitz']),
+    ('Leipzig', 51.3397, 12.3731, ['Zentrum', 'Plagwitz', 'Connewitz']),
+    ('Nürnberg', 49.4521, 11.0767, ['Altstadt', 'Gostenhof', 'St. Johannis']),
+]
+PROPERTY_TYPES = ['Квартира', 'Дом', 'Отель', 'Апартаменты', 'Комната']
+WORDS = ['светлая', 'уютная', 'просторная', 'тихая', 'квартира', 'дом', 'центр', 'парк', 'балкон',
+         'вид', 'метро', 'кухня', 'ремонт', 'рядом', 'магазины', 'семья', 'студия', 'терраса']
+BOOKINGS_HISTORY_DAYS = 365
+HISTORY_DAYS = 60
+
+
+def _rng(seed, table, start):
+    # Окремий детермінований генератор на кожну порцію: результат не залежить від кількості процесів
+    return random.Random(f'{seed}:{table}:{start}')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def property_price(seed, pk):
+    return Decimal(_rng(seed, 'price', pk).randint(20, 400))
+
+
+def _configure_connection():
+    if connection.vendor == 'sqlite':
+        # Паралельні процеси записують по черзі — чекаємо на блокування замість помилки
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout = 60000')
+
+
+def _raw_insert(model, fields, rows):
+    """
+    Вставка без Model.save/pre_save: bulk_create перезаписує auto_now_add-поля поточним часом,
+    а для історії аналітики потрібні розподілені в минулому мітки часу.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', rows)
+
+
+def gen_users(plan, start, count):
+    rng = _rng(plan['seed'], 'users', start)
+    users = []
+    for index in range(start, start + count):
+        pk = plan['user_base'] + index
+        users.append(User(
+            id=pk,
+            username=f'user{pk}',
+            email=f'user{pk}@example.com',
+            first_name=rng.choice(['Anna', 'Max', 'Lena', 'Paul', 'Mia', 'Ben', 'Emma', 'Jonas']),
+            last_name=rng.choice(['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Wagner']),
+            user_type='landlord' if index < plan['landlords'] else 'tenant',
+            password=plan['password'],
+        ))
+    return User, users
+
+
+def gen_locations(plan, start, count):
+    rng = _rng(plan['seed'], 'locations', start)
+    locations = []
+    for index in range(start, start + count):
+        city, lat, lon, districts = rng.choice(CITIES)
+        locations.append(Location(
+            id=plan['location_base'] + index,
+            city=city,
+            district=rng.choice(districts),
+            address=f'{rng.choice(WORDS).capitalize()}straße {rng.randint(1, 200)}',
+            postal_code=f'{rng.randint(10000, 99999)}',
+            latitude=round(lat + rng.uniform(-0.08, 0.08), 6),
+            longitude=round(lon + rng.uniform(-0.12, 0.12), 6),
+        ))
+    return Location, locations
+
+
+def gen_properties(plan, start, count):
+    rng = _rng(plan['seed'], 'properties', start)
+    properties = []
+    for index in range(start, start + count):
+        pk = plan['property_base'] + index
+        properties.append(Property(
+            id=pk,
+            owner_id=plan['user_base'] + rng.randrange(plan['landlords']),
+            title=_text(rng, 4),
+            description=_text(rng, 30),
+            property_type_id=rng.choice(plan['type_ids']),
+            location_id=plan['location_base'] + rng.randrange(plan['locations']),
+            price=property_price(plan['seed'], pk),
+            rooms=rng.randint(1, 8),
+            area=rng.randint(15, 300),
+            status='active' if rng.random() < 0.9 else 'inactive',
+            views_count=rng.randint(0, 5000),
+        ))
+    return Property, properties
+
+
+def gen_images(plan, start, count):
+    per_property = plan['images_per_property']
+    images = []
+    for index in range(start, start + count):
+        property_id = plan['property_base'] + index
+        for position in range(per_property):
+            images.append(PropertyImage(
+                id=plan['image_base'] + index * per_property + position,
+                property_id=property_id,
+                image=f'property_images/synthetic/{property_id}_{position}.jpg',
+                is_main=position == 0,
+            ))
+    return PropertyImage, images
+
+
+def gen_bookings(plan, start, count):
+    """
+    Бронювання кожного оголошення йдуть послідовно з проміжками, тому не перетинаються за побудовою.
+    Booking.save()/clean() не викликаються; total_price рахується так само, як calculate_total_price.
+    """
+    rng = _rng(plan['seed'], 'bookings', start)
+    per_property = plan['bookings_per_property']
+    today = timezone.localdate()
+    tenants = plan['users'] - plan['landlords']
+    bookings = []
+    for index in range(start, start + count):
+        property_id = plan['property_base'] + index
+        price = property_price(plan['seed'], property_id)
+        cursor = today - timedelta(days=BOOKINGS_HISTORY_DAYS - rng.randint(0, 30))
+        for position in range(per_property):
+            check_in = cursor + timedelta(days=rng.randint(0, 10))
+            check_out = check_in + timedelta(days=rng.randint(1, 14))
+            cursor = check_out
+            if check_out <= today:
+                booking_status = 'completed' if rng.random() < 0.85 else 'canceled'
+            else:
+                booking_status = rng.choice(['pending', 'confirmed'])
+            bookings.append(Booking(
+                id=plan['booking_base'] + index * per_property + position,
+                property_id=property_id,
+                tenant_id=plan['user_base'] + plan['landlords'] + rng.randrange(tenants),
+                check_in_date=check_in,
+                check_out_date=check_out,
+                guests_count=rng.randint(1, 6),
+                status=booking_status,
+                total_price=(check_out - check_in).days * price,
+            ))
+    return Booking, bookings
+
+
+def gen_reviews(plan, start, count):
+    rng = _rng(plan['seed'], 'reviews', start)
+    first = plan['property_base'] + start
+    pairs = list(Booking.objects.filter(
+        property_id__gte=first, property_id__lt=first + count, status='completed',
+        id__gte=plan['booking_base'],
+    ).order_by('id').values_list('property_id', 'tenant_id'))
+
+    seen = set()
+    reviews = []
+    for pair in pairs:
+        if pair in seen or rng.random() > plan['review_ratio']:
+            continue
+        seen.add(pair)
+        reviews.append(Review(
+            property_id=pair[0], user_id=pair[1], rating=rng.choices([1, 2, 3, 4, 5], [1, 1, 3, 6, 8])[0],
+            comment=_text(rng, 12),
+        ))
+    return Review, reviews
+
+
+def gen_search_history(plan, start, count):
+    rng = _rng(plan['seed'], 'search_history', start)
+    now = timezone.now()
+    per_user = plan['searches_per_user']
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = []
+    for index in range(start, start + count):
+        user_id = plan['user_base'] + index
+        for _ in range(rng.randint(0, 2 * per_user)):
+            city, _, _, districts = rng.choice(CITIES)
+            query = rng.choice([city, city.lower(), f' {city} ', f'{city} {rng.choice(districts)}'])
+            moment = now - timedelta(seconds=rng.randint(0, HISTORY_DAYS * 86400))
+            rows.append((user_id, query, adapt(moment)))
+    return SearchHistory, ['user', 'query', 'timestamp'], rows
+
+
+def gen_view_history(plan, start, count):
+    rng = _rng(plan['seed'], 'view_history', start)
+    now = timezone.now()
+    per_user = min(plan['views_per_user'], plan['properties'])
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = []
+    for index in range(start, start + count):
+        user_id = plan['user_base'] + index
+        viewed = rng.sample(range(plan['properties']), rng.randint(0, per_user)) if per_user else []
+        for property_index in viewed:
+            moment = now - timedelta(seconds=rng.randint(0, HISTORY_DAYS * 86400))
+            rows.append((user_id, plan['property_base'] + property_index, adapt(moment)))
+    return ViewHistory, ['user', 'property', 'timestamp'], rows
+
+
+GENERATORS = {
+    'users': gen_users,
+    'locations': gen_locations,
+    'properties': gen_properties,
+    'images': gen_images,
+    'bookings': gen_bookings,
+    'reviews': gen_reviews,
+    'search_history': gen_search_history,
+    'view_history': gen_view_history,
+}
+
+
+def write_chunk(result, batch_size):
+    """Записує результат генератора: (модель, об'єкти) через bulk_create або (модель, поля, рядки) напряму"""
+    _configure_connection()
+    if len(result) == 2:
+        model, objects = result
+        model.objects.bulk_create(objects, batch_size=batch_size, ignore_conflicts=model is Review)
+        return len(objects)
+    model, fields, rows = result
+    for start in range(0, len(rows), batch_size):
+        # Без явної транзакції SQLite фіксує (і синхронізує на диск) кожен рядок executemany окремо
+        with transaction.atomic():
+            _raw_insert(model, fields, rows[start:start + batch_size])
+    return len(rows)
+
+
+def run_chunk(task):
+    """
+    Генерує порцію у воркері. Для серверних СУБД воркер одразу записує її сам; для SQLite,
+    де одночасно може писати лише одне з'єднання, повертає дані батьківському процесу.
+    """
+    table, plan, start, count = task
+    result = GENERATORS[table](plan, start, count)
+    if plan['write_in_workers']:
+        return write_chunk(result, plan['batch_size'])
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерує синтетичний детермінований набір даних для бенчмарків: користувачі, локації з координатами, '
+        'оголошення, зображення, бронювання без перетинів, відгуки та історію аналітики'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--landlord-ratio', type=float, default=0.1)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--properties', type=int, default=2000)
+        parser.add_argument('--images-per-property', type=int, default=3)
+        parser.add_argument('--bookings-per-property', type=int, default=5)
+        parser.add_argument('--review-ratio', type=float, default=0.3,
+                            help='Частка завершених бронювань, на які залишають відгук')
+        parser.add_argument('--searches-per-user', type=int, default=10)
+        parser.add_argument('--views-per-user', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='password',
+                            help='Спільний пароль усіх користувачів (хешується один раз)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--chunk-size', type=int, default=20000,
+                            help='Кількість "батьківських" об\'єктів в одній задачі воркера')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        landlords = max(1, int(options['users'] * options['landlord_ratio']))
+        if options['users'] - landlords < 1:
+            self.stderr.write('Потрібен хоча б один орендар')
+            return
+
+        type_ids = []
+        for name in PROPERTY_TYPES:
+            property_type, _ = PropertyType.objects.get_or_create(name=name)
+            type_ids.append(property_type.pk)
+
+        per_property = options['images_per_property'], options['bookings_per_property']
+        plan = {
+            'seed': options['seed'],
+            'password': make_password(options['password']),
+            'batch_size': options['batch_size'],
+            'users': options['users'],
+            'landlords': landlords,
+            'locations': options['locations'],
+            'properties': options['properties'],
+            'images_per_property': per_property[0],
+            'bookings_per_property': per_property[1],
+            'review_ratio': options['review_ratio'],
+            'searches_per_user': options['searches_per_user'],
+            'views_per_user': options['views_per_user'],
+            'type_ids': type_ids,
+            'write_in_workers': connection.vendor != 'sqlite',
+            # Явні id дозволяють воркерам посилатися на рядки інших таблиць без читання з БД
+            'user_base': self._next_id(User),
+            'location_base': self._next_id(Location),
+            'property_base': self._next_id(Property),
+            'image_base': self._next_id(PropertyImage),
+            'booking_base': self._next_id(Booking),
+        }
+
+        phases = [
+            ('users', options['users']),
+            ('locations', options['locations']),
+            ('properties', options['properties']),
+            ('images', options['properties'] if per_property[0] else 0),
+            ('bookings', options['properties'] if per_property[1] else 0),
+            ('reviews', options['properties'] if per_property[1] else 0),
+            ('search_history', options['users'] if options['searches_per_user'] else 0),
+            ('view_history', options['users'] if options['views_per_user'] else 0),
+        ]
+
+        total_started = time.perf_counter()
+        total_rows = 0
+        for table, parents in phases:
+            if not parents:
+                continue
+            started = time.perf_counter()
+            rows = self._run_phase(table, plan, parents, options['chunk_size'], options['workers'])
+            elapsed = time.perf_counter() - started
+            total_rows += rows
+            self.stdout.write(f'{table}: {rows} рядків за {elapsed:.1f} с ({rows / max(elapsed, 1e-9):,.0f} рядків/с)')
+
+        self._reset_sequences()
+        # bulk_create не надсилає post_save — запущені воркери перечитають довідники за новою версією
+        reference_data.invalidate()
+        if options['searches_per_user']:
+            rebuild_rollups()
+
+        elapsed = time.perf_counter() - total_started
+        self.stdout.write(self.style.SUCCESS(
+            f'Разом: {total_rows} рядків за {elapsed:.1f} с ({total_rows / max(elapsed, 1e-9):,.0f} рядків/с)'
+        ))
+
+    def _next_id(self, model):
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def _run_phase(self, table, plan, parents, chunk_size, workers):
+        tasks = [
+            (table, plan, start, min(chunk_size, parents - start))
+            for start in range(0, parents, chunk_size)
+        ]
+        if workers <= 1 or len(tasks) == 1:
+            return sum(write_chunk(GENERATORS[table](plan, start, count), plan['batch_size'])
+                       for table, plan, start, count in tasks)
+
+        # Дочірні процеси відкривають власні з'єднання з БД
+        connections.close_all()
+        rows = 0
+        with multiprocessing.get_context('fork').Pool(min(workers, len(tasks))) as pool:
+            for result in pool.imap_unordered(run_chunk, tasks):
+                rows += result if plan['write_in_workers'] else write_chunk(result, plan['batch_size'])
+        return rows
+
+    def _reset_sequences(self):
+        # Для PostgreSQL/Oracle після вставки з явними id треба зсунути послідовності
+        statements = connection.ops.sequence_reset_sql(
+            self.style, [User, Location, Property, PropertyImage, Booking]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
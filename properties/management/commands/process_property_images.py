@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties.image_pipeline import image_pipeline
+from properties.models import PropertyImage
+
+
+class Command(BaseCommand):
+    help = (
+        'Обробляє зображення оголошень, що чекають на обробку: зображення, завантажені до появи фонової обробки, '
+        'з RENTAL_IMAGE_PIPELINE=0 або не оброблені через перезапуск воркера. '
+        'Працює через той самий пул процесів, що й обробка після завантаження.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Також повторити зображення зі статусом failed')
+        parser.add_argument('--all', action='store_true', help='Переобробити всі зображення (напр. після зміни VARIANTS)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Скільки id обробляти за один прохід')
+        parser.add_argument('--limit', type=int, help='Обробити не більше N зображень')
+
+    def handle(self, *args, **options):
+        queryset = PropertyImage.objects.order_by('pk')
+        if not options['all']:
+            statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+            queryset = queryset.filter(processing_status__in=statuses)
+        image_ids = list(queryset.values_list('pk', flat=True)[:options['limit']])
+
+        started = time.perf_counter()
+        processed = skipped = failed = 0
+        for offset in range(0, len(image_ids), options['batch_size']):
+            for image_id, result in image_pipeline.process_many(image_ids[offset:offset + options['batch_size']]):
+                if isinstance(result, Exception):
+                    failed += 1
+                    PropertyImage.objects.filter(pk=image_id).update(processing_status='failed')
+                    self.stderr.write(f'#{image_id}: {result!r}')
+                elif result:
+                    processed += 1
+                else:
+                    skipped += 1
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Оброблено {processed}, пропущено {skipped}, з помилкою {failed} '
+            f'за {elapsed:.1f} с ({processed / max(elapsed, 1e-9):.1f} зобр./с)'
+        )
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='высота'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='placeholder',
+            field=models.CharField(blank=True, max_length=64, verbose_name='заглушка (BlurHash)'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='processing_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='попыток обработки'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('ready', 'Обработано'), ('failed', 'Ошибка обработки')], default='pending', max_length=10, verbose_name='статус обработки'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='варианты'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='ширина'),
+        ),
+    ]
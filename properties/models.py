@@ -70,11 +70,26 @@ class Property(models.Model):
 
 class PropertyImage(models.Model):
     """Зображення нерухомості"""
+    PROCESSING_CHOICES = (
+        ('pending', _('Ожидает обработки')),
+        ('ready', _('Обработано')),
+        ('failed', _('Ошибка обработки')),
+    )
+
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images',
                                  verbose_name=_('объявление'))
     image = models.ImageField(_('изображение'), upload_to='property_images/')
     is_main = models.BooleanField(_('главное изображение'), default=False)
     created_at = models.DateTimeField(_('дата добавления'), auto_now_add=True)
+    # Заповнюються фоновою обробкою (properties/image_pipeline.py) після завантаження
+    width = models.PositiveIntegerField(_('ширина'), null=True, blank=True)
+    height = models.PositiveIntegerField(_('высота'), null=True, blank=True)
+    placeholder = models.CharField(_('заглушка (BlurHash)'), max_length=64, blank=True)
+    # {назва варіанта: {'width', 'height', 'jpeg': шлях у сховищі, 'webp': шлях у сховищі}}
+    variants = models.JSONField(_('варианты'), default=dict, blank=True)
+    processing_status = models.CharField(_('статус обработки'), max_length=10, choices=PROCESSING_CHOICES,
+                                         default='pending')
+    processing_attempts = models.PositiveSmallIntegerField(_('попыток обработки'), default=0)
 
     class Meta:
         verbose_name = _('изображение объявления')
@@ -83,6 +98,19 @@ class PropertyImage(models.Model):
     def __str__(self):
         return f"Изображение для {self.property.title}"
 
+    # Назва файлу, прочитана з БД: за нею сигнал reset_replaced_image бачить заміну без повторного SELECT
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        image = instance.__dict__.get('image')
+        instance._original_image = getattr(image, 'name', image)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'image' in fields:
+            self._original_image = self.image.name
+
 
 from django.db import models
 
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections, transaction
+
+from rental_project.async_views import fire_and_forget
+from .models import PropertyType
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'reference-data:version'
+
+
+class Snapshot:
+    """Незмінний знімок довідника типів житла: об'єкти моделі і їхнє серіалізоване представлення за id"""
+
+    def __init__(self, version, property_types):
+        from .serializers import PropertyTypeSerializer
+
+        self.version = version
+        self.property_types = {obj.pk: obj for obj in property_types}
+        self.property_types_data = {pk: dict(PropertyTypeSerializer(obj).data)
+                                    for pk, obj in self.property_types.items()}
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class ReferenceData:
+    """
+    In-process знімок довідника типів житла — кілька десятків рядків, що майже не змінюються, —
+    з якого серіалізатори та список типів читають без SQL. Локації сюди не входять: їх багато
+    і вони ростуть разом з оголошеннями, тож читаються з БД через JOIN. Версія знімка лежить у спільному кеші: запис довідника змінює її, а кожен воркер
+    звіряє свою не частіше ніж раз на check_interval секунд — це й межа відставання інших воркерів.
+    """
+
+    def __init__(self, alias='default', check_interval=2.0):
+        self.alias = alias
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._stale = False
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self._snapshot is not None
+
+    def shared_version(self):
+        try:
+            backend = caches[self.alias]
+            version = backend.get(VERSION_KEY)
+            if version is None:
+                # Версію ще не задавали або її витіснено — нова версія змусить усі воркери перечитати знімок
+                backend.add(VERSION_KEY, time.time_ns(), None)
+                version = backend.get(VERSION_KEY)
+            return version
+        except DatabaseError:
+            logger.warning('Спільний кеш недоступний', exc_info=True)
+            return None
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale and time.monotonic() < self._next_check:
+            return snapshot
+        if snapshot is not None and _in_event_loop():
+            # З event loop до БД звертатися не можна: віддаємо наявний знімок, а версію звіряємо у фоні
+            self._next_check = time.monotonic() + self.check_interval
+            fire_and_forget(self.refresh)
+            return snapshot
+        return self.refresh()
+
+    def refresh(self):
+        """Звіряє версію зі спільним кешем і за потреби перечитує довідник (один запит)"""
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            version = self.shared_version()
+            snapshot = self._snapshot
+            if snapshot is None or self._stale or version != snapshot.version:
+                self._stale = False
+                snapshot = self._snapshot = Snapshot(version, PropertyType.objects.order_by('pk'))
+            return snapshot
+
+    def _bump(self):
+        self._stale = True
+        try:
+            caches[self.alias].set(VERSION_KEY, time.time_ns(), None)
+        except DatabaseError:
+            logger.warning('Не вдалося змінити версію довідників', exc_info=True)
+
+    def invalidate(self):
+        """
+        Після запису довідника: цей процес перечитає знімок при наступному зверненні, інші — після звірки версії.
+        Версія змінюється ще раз після коміту, щоб знімок, прочитаний до коміту, не лишився актуальним.
+        """
+        self._bump()
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(self._bump)
+
+    def warm_up(self):
+        """Завантаження при старті процесу; недоступна БД не заважає старту — знімок завантажиться пізніше"""
+        try:
+            self.refresh()
+        except DatabaseError:
+            logger.warning('Довідники не завантажено при старті', exc_info=True)
+        finally:
+            # Воркери, форкнуті після завантаження, не повинні ділити з'єднання майстра
+            connections.close_all()
+
+
+def _build_reference_data():
+    options = getattr(settings, 'REFERENCE_DATA', {})
+    return ReferenceData(alias=options.get('BACKEND', 'default'), check_interval=options.get('CHECK_INTERVAL', 2.0))
+
+
+reference_data = _build_reference_data()
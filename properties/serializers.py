@@ -1,8 +1,13 @@
+from django.core.files.storage import default_storage
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rental_project.compiled_serializers import CompiledListSerializer
+from rental_project.sparse_fields import SparseFieldsMixin, selection
 from .models import Property, PropertyType, Location, PropertyImage
+from .reference_data import reference_data
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Location
         fields = ['id', 'city', 'district', 'address', 'postal_code', 'latitude', 'longitude']
@@ -14,15 +19,100 @@ class PropertyTypeSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class PropertyImageSerializer(serializers.ModelSerializer):
+@extend_schema_field({
+    'type': 'object',
+    'additionalProperties': {
+        'type': 'object',
+        'properties': {
+            'width': {'type': 'integer'},
+            'height': {'type': 'integer'},
+            'jpeg': {'type': 'string', 'format': 'uri'},
+            'webp': {'type': 'string', 'format': 'uri'},
+        },
+    },
+    'description': 'Зменшені копії (thumbnail, card, full) у JPEG і WebP; порожньо, поки зображення не оброблено',
+})
+class ImageVariantsField(serializers.Field):
+    """Варіанти з PropertyImage.variants з URL замість шляхів у сховищі — абсолютними, як у ImageField"""
+    sparse_subfields = True
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        if '_sparse_fields' not in self.__dict__:
+            # ?fields=images.variants.card: лише вибрані варіанти
+            self._sparse_fields = selection(self)[0]
+        fields = self._sparse_fields
+        data = {}
+        for name, variant in value.items():
+            if fields is not None and name not in fields:
+                continue
+            data[name] = {'width': variant['width'], 'height': variant['height']}
+            for image_format in ('jpeg', 'webp'):
+                url = default_storage.url(variant[image_format])
+                data[name][image_format] = request.build_absolute_uri(url) if request is not None else url
+        return data
+
+
+class PropertyImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    variants = ImageVariantsField()
+
     class Meta:
         model = PropertyImage
-        fields = ['id', 'image', 'is_main', 'created_at']
+        fields = ['id', 'image', 'is_main', 'created_at', 'width', 'height', 'placeholder', 'variants',
+                  'processing_status']
+        read_only_fields = ['width', 'height', 'placeholder', 'processing_status']
+
+
+class ReferenceField(serializers.Field):
+    """Вкладений запис довідника зі знімка reference_data — без JOIN і без окремого запиту"""
+    serializer_class = None
+    sparse_subfields = True
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance
 
+    def to_representation(self, instance):
+        rows = getattr(reference_data.current(), f'{self.source}s_data')
+        data = rows.get(getattr(instance, f'{self.source}_id'))
+        if data is None:
+            # Запис щойно створено в іншому воркері, і знімок цього процесу його ще не містить
+            data = self.serializer_class(getattr(instance, self.source)).data
+        if '_sparse_fields' not in self.__dict__:
+            # ?fields=location.city: лише вибрані ключі запису довідника
+            self._sparse_fields = selection(self)[0]
+        fields = self._sparse_fields
+        if fields is None:
+            return dict(data)
+        return {key: value for key, value in data.items() if key in fields}
 
-class PropertySerializer(serializers.ModelSerializer):
-    property_type = PropertyTypeSerializer(read_only=True)
-    property_type_id = serializers.PrimaryKeyRelatedField(
+
+@extend_schema_field(PropertyTypeSerializer)
+class PropertyTypeField(ReferenceField):
+    serializer_class = PropertyTypeSerializer
+
+
+class ReferencePrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, що знаходить запис довідника у знімку; до БД — лише якщо id там немає"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool) or isinstance(data, str) and data.isdigit():
+            obj = getattr(reference_data.current(), f'{self.source}s').get(int(data))
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class PropertySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    property_type = PropertyTypeField()
+    property_type_id = ReferencePrimaryKeyField(
         queryset=PropertyType.objects.all(), source='property_type', write_only=True
     )
     location = LocationSerializer(read_only=True)
@@ -41,10 +131,21 @@ class PropertySerializer(serializers.ModelSerializer):
             'updated_at', 'views_count', 'images'
         ]
         read_only_fields = ['owner', 'created_at', 'updated_at', 'views_count']
+        list_serializer_class = CompiledListSerializer
+        expandable_fields = ['images']
+        sparse_dependencies = {'owner_name': ['owner__first_name', 'owner__last_name']}
 
     def get_owner_name(self, obj):
         return f"{obj.owner.first_name} {obj.owner.last_name}"
 
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class SimilarPropertySerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='similar_id')
+    title = serializers.CharField(source='similar__title')
+    price = serializers.DecimalField(source='similar__price', max_digits=10, decimal_places=2)
+    city = serializers.CharField(source='similar__location__city')
+    score = serializers.FloatField()
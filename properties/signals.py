@@ -0,0 +1,97 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from rental_project.cache import invalidate
+from .autocomplete import autocomplete
+from .image_pipeline import delete_variants, image_pipeline
+from .models import Location, Property, PropertyImage, PropertyType
+from .reference_data import reference_data
+
+
+@receiver(pre_save, sender=Location)
+def remember_previous_location_names(sender, instance, **kwargs):
+    # Старі назви потрібні, щоб прибрати їх з індексу автодоповнення після перейменування
+    instance._previous_names = ()
+    if instance.pk and autocomplete.is_loaded:
+        previous = Location.objects.filter(pk=instance.pk).values('city', 'district').first()
+        if previous:
+            instance._previous_names = (previous['city'], previous['district'])
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def refresh_location_autocomplete(sender, instance, **kwargs):
+    previous_city, previous_district = getattr(instance, '_previous_names', None) or (None, None)
+    autocomplete.update_locations(
+        cities=(instance.city, previous_city),
+        districts=(instance.district, previous_district),
+    )
+
+
+@receiver(post_save, sender=Property)
+def refresh_property_autocomplete(sender, instance, created, **kwargs):
+    # Лічильник переглядів зберігає оголошення на кожному запиті, тому реагуємо лише на створення
+    if created and autocomplete.is_loaded:
+        autocomplete.update_locations(
+            cities=(instance.location.city,), districts=(instance.location.district,)
+        )
+
+
+@receiver(post_delete, sender=Property)
+def refresh_deleted_property_autocomplete(sender, instance, **kwargs):
+    if autocomplete.is_loaded:
+        location = Location.objects.filter(pk=instance.location_id).values('city', 'district').first()
+        if location:
+            autocomplete.update_locations(cities=(location['city'],), districts=(location['district'],))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_property_cache(sender, instance, **kwargs):
+    # Закешовані схожі інших оголошень (SimilarPropertiesView) несуть теги кожного оголошення в них
+    invalidate(f'property:{instance.pk}')
+
+
+@receiver(post_save, sender=PropertyType)
+@receiver(post_delete, sender=PropertyType)
+def invalidate_reference_data(sender, **kwargs):
+    reference_data.invalidate()
+
+
+@receiver(pre_save, sender=PropertyImage)
+def reset_replaced_image(sender, instance, **kwargs):
+    # Новий файл — старі варіанти, розміри й заглушка більше не відповідають зображенню.
+    # Заміну видно без запиту: файл ще не збережено у сховищі або назва відрізняється від прочитаної з БД
+    instance._stale_variants = None
+    if not instance.pk or 'image' in instance.get_deferred_fields():
+        return
+    original = getattr(instance, '_original_image', None)
+    if instance.image._committed and (original is None or instance.image.name == original):
+        return
+    # Варіанти — з БД: фонова обробка могла записати їх уже після того, як екземпляр прочитали
+    previous = PropertyImage.objects.filter(pk=instance.pk).values_list('variants', flat=True)
+    instance._stale_variants = previous.first()
+    instance.width = instance.height = None
+    instance.placeholder = ''
+    instance.variants = {}
+    instance.processing_status = 'pending'
+    instance.processing_attempts = 0
+
+
+@receiver(post_save, sender=PropertyImage)
+def schedule_image_processing(sender, instance, **kwargs):
+    instance._original_image = instance.image.name
+    # Обробка — поза запитом і лише після коміту, інакше пул може не побачити рядок
+    if getattr(instance, '_stale_variants', None):
+        transaction.on_commit(partial(delete_variants, instance._stale_variants))
+    if instance.processing_status == 'pending' and instance.image:
+        transaction.on_commit(partial(image_pipeline.schedule, instance.pk))
+
+
+@receiver(post_delete, sender=PropertyImage)
+def delete_image_variants(sender, instance, **kwargs):
+    if instance.variants:
+        transaction.on_commit(partial(delete_variants, instance.variants))
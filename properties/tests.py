@@ -1,3 +1,848 @@
-from django.test import TestCase
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.models import Exists, OuterRef
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError, connection, transaction
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from analytics.models import PropertySimilarity, PropertyViewSketch, ViewHistory
+from analytics.serializers import ViewHistorySerializer
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+from rental_project.compiled_serializers import compile_serializer
+from rental_project.sparse_fields import parse_selection
+from rental_project.async_views import wait_for_side_effects
+from rental_project.cache import LocalLRU, TieredCache, tiered_cache
+from reviews.async_views import PropertyReviewsAsyncView
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer
+from users.models import User
+from .async_views import PropertyDetailAsyncView, PropertyListAsyncView
+from .autocomplete import PrefixIndex, autocomplete
+from .image_pipeline import ImagePipeline, image_pipeline
+from .models import Location, Property, PropertyImage, PropertyType
+from .reference_data import ReferenceData, reference_data
+from .serializers import PropertySerializer
+from .views import PROPERTY_QUERYSET
+
+
+class PrefixIndexTests(TestCase):
+    def test_completions_are_ranked_by_weight(self):
+        index = PrefixIndex({
+            ('city', 'berlin'): ('Berlin', 10),
+            ('city', 'bern'): ('Bern', 3),
+            ('query', 'berlin mitte'): ('berlin mitte', 7),
+            ('city', 'hamburg'): ('Hamburg', 50),
+        })
+
+        self.assertEqual([item['text'] for item in index.complete('BER')], ['Berlin', 'berlin mitte', 'Bern'])
+        self.assertEqual([item['text'] for item in index.complete('berli', limit=1)], ['Berlin'])
+        self.assertEqual(index.complete('x'), [])
+        self.assertEqual(index.complete('  '), [])
+
+    def test_update_matches_full_rebuild(self):
+        entries = {
+            ('city', 'berlin'): ('Berlin', 10),
+            ('district', 'mitte', 'berlin'): ('Mitte, Berlin', 4),
+            ('district', 'mitte', 'munich'): ('Mitte, Munich', 2),
+            ('city', 'bern'): ('Bern', 3),
+        }
+        index = PrefixIndex(entries)
+
+        updated = index.updated(
+            {('city', 'bern'), ('district', 'mitte')},
+            {('district', 'mitte', 'berlin'): ('Mitte, Berlin', 5), ('city', 'bremen'): ('Bremen', 1)},
+        )
+        expected = PrefixIndex({
+            ('city', 'berlin'): ('Berlin', 10),
+            ('district', 'mitte', 'berlin'): ('Mitte, Berlin', 5),
+            ('city', 'bremen'): ('Bremen', 1),
+        })
+        self.assertEqual(updated.rows, expected.rows)
+        self.assertEqual(updated.prefix_top, expected.prefix_top)
+        # Попередній знімок не змінюється — читачі, що його тримають, бачать узгоджені дані
+        self.assertEqual(index.complete('mi', limit=5)[0]['weight'], 4)
+
+
+# Перерахунок виконується після коміту у фоновому потоці, тому дані мають бути зафіксовані
+class AutocompleteEndpointTests(TransactionTestCase):
+    def setUp(self):
+        autocomplete.reset()
+        self.addCleanup(autocomplete.reset)
+        self.addCleanup(wait_for_side_effects, 5)
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O'
+        )
+        self.property_type = PropertyType.objects.create(name='Flat')
+        self.location = Location.objects.create(city='Berlin', district='Mitte')
+
+    def test_endpoint_and_incremental_updates(self):
+        client = APIClient()
+        response = client.get(reverse('autocomplete'), {'q': 'mi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{'text': 'Mitte, Berlin', 'kind': 'district', 'weight': 1}])
+
+        # Нове оголошення збільшує вагу міста без повної перебудови індексу
+        Property.objects.create(
+            owner=self.owner, title='Flat', description='-', property_type=self.property_type,
+            location=self.location, price=100, rooms=1, area=30,
+        )
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(autocomplete.complete('berl')[0]['weight'], 2)
+
+        # Перейменування прибирає стару назву з індексу
+        self.location.city = 'Munich'
+        self.location.save()
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(autocomplete.complete('berl'), [])
+        self.assertEqual(autocomplete.complete('mun')[0]['text'], 'Munich')
+
+        with self.assertNumQueries(0):
+            client.get(reverse('autocomplete'), {'q': 'mu'})
+
+    def test_same_district_in_different_cities(self):
+        Location.objects.create(city='Munich', district='Mitte')
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(
+            [row['text'] for row in autocomplete.complete('mit')], ['Mitte, Munich', 'Mitte, Berlin']
+        )
+
+        # Оголошення в Берліні змінює вагу лише берлінського району, мюнхенський лишається в індексі
+        Property.objects.create(
+            owner=self.owner, title='Flat', description='-', property_type=self.property_type,
+            location=self.location, price=100, rooms=1, area=30,
+        )
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(
+            [(row['text'], row['weight']) for row in autocomplete.complete('mit')],
+            [('Mitte, Berlin', 2), ('Mitte, Munich', 1)],
+        )
+
+    def test_rolled_back_changes_do_not_reach_index(self):
+        autocomplete.complete('berl')
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Location.objects.create(city='Bremen')
+            Property.objects.create(
+                owner=self.owner, title='Flat', description='-', property_type=self.property_type,
+                location=self.location, price=100, rooms=1, area=30,
+            )
+            raise RuntimeError
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(autocomplete.complete('bre'), [])
+        self.assertEqual(autocomplete.complete('berl')[0]['weight'], 1)
+
+    def test_status_changes_update_weights(self):
+        listing = Property.objects.create(
+            owner=self.owner, title='Flat', description='-', property_type=self.property_type,
+            location=self.location, price=100, rooms=1, area=30,
+        )
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        self.assertEqual(autocomplete.complete('berl')[0]['weight'], 2)
+
+        client.post(reverse('property-toggle-status', args=[listing.pk]))
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(autocomplete.complete('berl')[0]['weight'], 1)
+
+        client.patch(reverse('property-update', args=[listing.pk]), {'status': 'active'})
+        wait_for_side_effects(timeout=5)
+        self.assertEqual(autocomplete.complete('berl')[0]['weight'], 2)
+
+
+class OwnedPropertyMutationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.property = Property.objects.create(
+            owner=self.owner, title='Flat', description='-', property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'), price=100, rooms=1, area=30,
+        )
+        self.client = APIClient()
+        reference_data.current()
+
+    def test_toggle_status_is_one_statement(self):
+        self.client.force_authenticate(self.owner)
+        url = reverse('property-toggle-status', args=[self.property.pk])
+        with self.assertNumQueries(1):
+            response = self.client.post(url)
+        self.assertEqual(response.data, {'status': 'inactive'})
+        self.assertEqual(self.client.post(url).data, {'status': 'active'})
+
+    def test_foreign_and_missing_properties(self):
+        self.client.force_authenticate(self.other)
+        # Для UPDATE/DELETE без змінених рядків другий запит розрізняє 403 і 404
+        for name, method, queries in (('property-toggle-status', 'post', 2), ('property-delete', 'delete', 2),
+                                      ('property-update', 'patch', 1)):
+            with self.assertNumQueries(queries):
+                response = getattr(self.client, method)(reverse(name, args=[self.property.pk]), {'title': 'X'})
+            self.assertEqual(response.status_code, 403, name)
+            response = getattr(self.client, method)(reverse(name, args=[self.property.pk + 100]), {'title': 'X'})
+            self.assertEqual(response.status_code, 404, name)
+
+        self.property.refresh_from_db()
+        self.assertEqual((self.property.title, self.property.status), ('Flat', 'active'))
+
+    def test_update_writes_only_changed_fields(self):
+        self.client.force_authenticate(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse('property-update', args=[self.property.pk]), {'price': '150.00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['price'], '150.00')
+
+        # Читання з власником і локацією (тип — зі знімка довідника), UPDATE і зображення для відповіді
+        self.assertEqual(len(queries), 3)
+        update = next(query['sql'] for query in queries if query['sql'].startswith('UPDATE'))
+        self.assertNotIn('"title"', update)
+        self.assertIn('"owner_id"', update)
+
+    def test_update_and_toggle_refresh_dependent_caches(self):
+        caches['shared'].clear()
+        tiered_cache.clear_local()
+        other = Property.objects.create(
+            owner=self.other, title='Loft', description='-', property_type=self.property.property_type,
+            location=self.property.location, price=200, rooms=2, area=50,
+        )
+        PropertySimilarity.objects.create(property=other, similar=self.property, rank=1, score=0.5)
+        similar_url = reverse('property-similar', args=[other.pk])
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(similar_url).data[0]['title'], 'Flat')
+
+        # Зміна оголошення, якого немає серед схожих, закешовану відповідь не скидає
+        unrelated = Property.objects.create(
+            owner=self.owner, title='Room', description='-', property_type=self.property.property_type,
+            location=self.property.location, price=50, rooms=1, area=15,
+        )
+        self.client.patch(reverse('property-update', args=[unrelated.pk]), {'title': 'Big room'})
+        with self.assertNumQueries(0):
+            self.client.get(similar_url)
+
+        # Відповідь несе теги кожного схожого оголошення, тож скидається зміною будь-якого з них
+        self.client.patch(reverse('property-update', args=[self.property.pk]), {'title': 'Studio'})
+        self.assertEqual(self.client.get(similar_url).data[0]['title'], 'Studio')
+
+        self.client.post(reverse('property-toggle-status', args=[self.property.pk]))
+        self.assertEqual(self.client.get(similar_url).data, [])
+
+        self.client.patch(reverse('property-update', args=[self.property.pk]), {'status': 'active'})
+        self.assertEqual(len(self.client.get(similar_url).data), 1)
+
+    def test_delete_is_scoped_to_owner(self):
+        self.client.force_authenticate(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(reverse('property-delete', args=[self.property.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Property.objects.exists())
+        self.assertIn('"owner_id"', queries[0]['sql'])
+        self.assertFalse(any('"users_user"' in query['sql'] for query in queries))
+
+
+# Побічні ефекти async-view виконуються в окремому потоці, тому дані мають бути зафіксовані
+class AsyncReadViewsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O', last_name='W'
+        )
+        property_type = PropertyType.objects.create(name='Flat')
+        locations = [Location.objects.create(city='Berlin'), Location.objects.create(city='Hamburg')]
+        self.properties = [
+            Property.objects.create(
+                owner=self.user, title=f'Flat {index}', description='-', property_type=property_type,
+                location=locations[index % 2], price=100 + index, rooms=1, area=30,
+                status='inactive' if index == 0 else 'active',
+            )
+            for index in range(14)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.addCleanup(wait_for_side_effects, 5)
+
+    def async_get(self, view, path, data=None, **kwargs):
+        request = AsyncRequestFactory().get(path, data or {})
+        force_authenticate(request, self.user)
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_list_matches_sync_view(self):
+        url = reverse('property-list')
+        for params in ({}, {'page': 2}, {'city': 'berl', 'ordering': '-price'}, {'search': 'Flat 1'}):
+            expected = self.client.get(url, params)
+            response = self.async_get(PropertyListAsyncView, url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, expected.data, params)
+
+        self.assertEqual(self.async_get(PropertyListAsyncView, url, {'page': 9}).status_code, 404)
+
+    def test_detail_counts_view_in_background(self):
+        property_obj = self.properties[1]
+        url = reverse('property-detail', args=[property_obj.pk])
+        response = self.async_get(PropertyDetailAsyncView, url, pk=property_obj.pk)
+        self.assertEqual(response.data['views_count'], 1)
+        self.assertEqual(self.async_get(PropertyDetailAsyncView, url, pk=0).status_code, 404)
+
+        wait_for_side_effects(timeout=5)
+        property_obj.refresh_from_db()
+        self.assertEqual(property_obj.views_count, 1)
+        self.assertTrue(PropertyViewSketch.objects.filter(property=property_obj).exists())
+
+    def test_reviews_match_sync_view(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        Review.objects.create(property=self.properties[1], user=self.user, rating=4, comment='ok')
+        Review.objects.create(property=self.properties[1], user=other, rating=5, comment='good')
+        url = reverse('property-reviews', args=[self.properties[1].pk])
+        response = self.async_get(PropertyReviewsAsyncView, url, property_id=self.properties[1].pk)
+        self.assertEqual(response.data, self.client.get(url).data)
+        self.assertEqual((response.data['count'], response.data['average_rating']), (2, 4.5))
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self):
+        call_command(
+            'generate_dataset', users=20, locations=5, properties=10, images_per_property=2,
+            bookings_per_property=4, searches_per_user=2, views_per_user=3, chunk_size=4, workers=1,
+            stdout=StringIO(),
+        )
+
+    def test_generates_consistent_dataset(self):
+        self.generate()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Property.objects.count(), 10)
+        self.assertEqual(Booking.objects.count(), 40)
+        self.assertEqual(set(Property.objects.values_list('owner__user_type', flat=True)), {'landlord'})
+
+        overlapping = Booking.objects.filter(
+            property=OuterRef('property'),
+            check_in_date__lt=OuterRef('check_out_date'),
+            check_out_date__gt=OuterRef('check_in_date'),
+        ).exclude(pk=OuterRef('pk'))
+        self.assertFalse(Booking.objects.filter(Exists(overlapping)).exists())
+
+    def test_same_seed_gives_same_data(self):
+        self.generate()
+        first = list(Property.objects.order_by('id').values_list('title', 'price', 'location__city'))
+        Property.objects.all().delete()
+        self.generate()
+        second = list(Property.objects.order_by('id').values_list('title', 'price', 'location__city'))
+        self.assertEqual(first, second)
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        tiered_cache.clear_local()
+        self.cache = TieredCache(alias='shared', name='test')
+        self.calls = 0
+
+    def compute(self, value='v'):
+        def compute():
+            self.calls += 1
+            return f'{value}{self.calls}'
+        return compute
+
+    def test_local_lru_is_bounded_by_size_and_ttl(self):
+        lru = LocalLRU(maxsize=2, ttl=60)
+        for key in 'abc':
+            lru.set(key, {'tags': {}})
+        self.assertEqual((lru.get('a'), len(lru)), (None, 2))
+
+        expired = LocalLRU(maxsize=2, ttl=0)
+        expired.set('a', {'tags': {}})
+        self.assertIsNone(expired.get('a'))
+
+    def test_tag_invalidation_reaches_other_workers(self):
+        other_worker = TieredCache(alias='shared', name='test', l1_ttl=0)
+        self.assertEqual(self.cache.get_or_set('k', self.compute(), tags=['property:1']), 'v1')
+        self.assertEqual(other_worker.get_or_set('k', self.compute(), tags=['property:1']), 'v1')
+        self.assertEqual(self.cache.get_or_set('k', self.compute(), tags=['property:2']), 'v1')
+
+        self.cache.invalidate_tags('property:1')
+        self.assertEqual(other_worker.get_or_set('k', self.compute(), tags=['property:1']), 'v2')
+        self.assertEqual(self.cache.get_or_set('k', self.compute(), tags=['property:1']), 'v2')
+        self.assertEqual(self.calls, 2)
+
+    def test_concurrent_misses_compute_once(self):
+        def slow():
+            time.sleep(0.05)
+            self.calls += 1
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_set('slow', slow, tags=['city:Berlin'])))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((results, self.calls), (['value'] * 8, 1))
+
+    def test_early_refresh_recomputes_before_expiry(self):
+        eager = TieredCache(alias='shared', name='test', beta=1e9)
+        eager.get_or_set('k', lambda: time.sleep(0.001) or 'old', ttl=60)
+        self.assertEqual(eager.get_or_set('k', self.compute(), ttl=60), 'v1')
+
+    @skipIf(settings.ASYNC_VIEWS, 'async-версія відгуків не кешується')
+    def test_cached_endpoint_is_invalidated_by_writes(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        flat = Property.objects.create(
+            owner=owner, title='Flat', description='-', property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'), price=100, rooms=1, area=30,
+        )
+        guests = [
+            User.objects.create_user(username=f'guest{index}', email=f'guest{index}@example.com', password='x')
+            for index in range(2)
+        ]
+        Review.objects.create(property=flat, user=guests[0], rating=4, comment='ok')
+        url = reverse('property-reviews', args=[flat.pk])
+
+        self.assertEqual(APIClient().get(url).data['count'], 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(APIClient().get(url).data['count'], 1)
+        self.assertEqual(len(queries), 0)
+
+        Review.objects.create(property=flat, user=guests[1], rating=2, comment='meh')
+        response = APIClient().get(url)
+        self.assertEqual((response.data['count'], response.data['average_rating']), (2, 3.0))
+
+        # Відповідь містить імена авторів, тож зміна профілю її скидає, а вхід (last_login) — ні
+        guests[0].last_login = datetime.now(dt_timezone.utc)
+        guests[0].save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            APIClient().get(url)
+        guests[0].first_name = 'Anna'
+        guests[0].save()
+        names = {review['user_name'] for review in APIClient().get(url).data['results']}
+        self.assertIn('Anna ', names)
+
+    def test_delete_degrades_when_shared_cache_fails(self):
+        self.cache.get_or_set('k', self.compute())
+        with mock.patch.object(caches['shared'], 'delete', side_effect=DatabaseError), \
+                self.assertLogs('rental_project.cache', 'WARNING'):
+            self.cache.delete('k')
+        self.assertIsNone(self.cache.local.get('k'))
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        self.flat = PropertyType.objects.create(name='Flat')
+        self.berlin = Location.objects.create(city='Berlin', district='Mitte')
+        self.hamburg = Location.objects.create(city='Hamburg', district='Altona')
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O', last_name='W'
+        )
+        reference_data.current()
+
+    def test_property_types_need_no_queries(self):
+        with self.assertNumQueries(0):
+            types = APIClient().get(reverse('property-types'))
+        self.assertEqual([row['name'] for row in types.data['results']], ['Flat'])
+        # Локації — не довідник у знімку: пошук іде в БД
+        with self.assertNumQueries(2):
+            locations = APIClient().get(reverse('locations'), {'search': 'mit'})
+        self.assertEqual([row['id'] for row in locations.data['results']], [self.berlin.pk])
+
+    def test_serializer_resolves_property_type_from_snapshot(self):
+        serializer = PropertySerializer(data={
+            'title': 'Loft', 'description': '-', 'price': 100, 'rooms': 1, 'area': 30,
+            'property_type_id': str(self.flat.pk), 'location_id': self.berlin.pk,
+        })
+        # Лише перевірка локації
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['property_type'], self.flat)
+
+        # Id, якого немає у знімку, перевіряється в БД з тією самою помилкою
+        invalid = PropertySerializer(data={**serializer.initial_data, 'property_type_id': 0})
+        self.assertFalse(invalid.is_valid())
+        self.assertEqual(invalid.errors['property_type_id'][0].code, 'does_not_exist')
+
+    def test_listing_filters_locations_in_sql_and_nests_type_from_snapshot(self):
+        # Локація, створена вже після завантаження знімка, теж знаходиться фільтром
+        bern = Location.objects.create(city='Bern', district='Altstadt')
+        for location in (self.berlin, self.hamburg, bern):
+            Property.objects.create(
+                owner=self.owner, title=f'Flat in {location.city}', description='-', property_type=self.flat,
+                location=location, price=100, rooms=1, area=30,
+            )
+        reference_data.current()
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('property-list'), {'city': 'BER', 'ordering': 'created_at'})
+        self.assertEqual([row['title'] for row in response.data['results']], ['Flat in Berlin', 'Flat in Bern'])
+        self.assertEqual(response.data['results'][0]['location']['district'], 'Mitte')
+        self.assertEqual(response.data['results'][0]['property_type'], {'id': self.flat.pk, 'name': 'Flat'})
+        self.assertFalse([query for query in queries if 'properties_propertytype' in query['sql']])
+
+    def test_writes_bump_version(self):
+        version = reference_data.current().version
+        self.flat.name = 'Apartment'
+        self.flat.save()
+        self.assertEqual(reference_data.current().property_types_data[self.flat.pk]['name'], 'Apartment')
+        self.assertNotEqual(reference_data.current().version, version)
+
+        # Зміна локації знімок не чіпає
+        version = reference_data.current().version
+        self.berlin.district = 'Wedding'
+        self.berlin.save()
+        self.assertEqual(reference_data.current().version, version)
+
+    def test_other_workers_catch_up_within_check_interval(self):
+        worker = ReferenceData(alias='shared', check_interval=60)
+        self.assertIn(self.flat.pk, worker.current().property_types)
+
+        house = PropertyType.objects.create(name='House')
+        with self.assertNumQueries(0):
+            self.assertNotIn(house.pk, worker.current().property_types)
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIn(house.pk, worker.current().property_types)
+
+
+class CompiledSerializerTests(TestCase):
+    """Скомпільовані серіалізатори мають віддавати ті самі байти, що й DRF, на випадкових даних"""
+    ALPHABET = 'aZ09 _-"\\/\n\tёЇß€😀\u2028\u2029\x00'
+
+    def setUp(self):
+        self.random = random.Random(47)
+        self.request = Request(APIRequestFactory().get('/', HTTP_HOST='testserver'))
+        self.users = [
+            User.objects.create_user(
+                username=f'user{index}', email=f'user{index}@example.com', password='pass12345',
+                first_name=self.text(), last_name=self.text(),
+            )
+            for index in range(4)
+        ]
+        types = [PropertyType.objects.create(name=self.text() or '-') for _ in range(3)]
+        locations = [
+            Location.objects.create(
+                city=self.random.choice(['Berlin', 'Київ', 'Zürich']), district=self.maybe(self.text), address=self.maybe(self.text),
+                latitude=self.maybe(lambda: self.random.uniform(-90, 90)),
+            )
+            for _ in range(3)
+        ]
+        self.properties = []
+        for _ in range(8):
+            prop = Property.objects.create(
+                owner=self.random.choice(self.users), title=self.text(), description=self.text(),
+                property_type=self.random.choice(types), location=self.random.choice(locations),
+                price=self.decimal(), rooms=self.random.randint(1, 32767),
+                area=self.random.choice([1.0, 1e-7, 123456.789, self.random.uniform(1, 1e6)]),
+                status=self.random.choice(['active', 'inactive']), views_count=self.random.randint(0, 2 ** 31),
+            )
+            for _ in range(self.random.randint(0, 2)):
+                image = PropertyImage(property=prop, is_main=self.random.random() < 0.5)
+                image.image.save('photo.jpg', ContentFile(b'-'), save=False)
+                image.save()
+                self.addCleanup(image.image.delete, save=False)
+            self.properties.append(prop)
+        reference_data.current()
+
+    def text(self):
+        return ''.join(self.random.choice(self.ALPHABET) for _ in range(self.random.randint(0, 12)))
+
+    def maybe(self, make):
+        return None if self.random.random() < 0.3 else make()
+
+    def decimal(self):
+        return self.random.choice([Decimal('0.00'), Decimal('99999999.99'), Decimal('0.01')]) \
+            if self.random.random() < 0.3 else Decimal(self.random.randint(0, 10 ** 10 - 1)).scaleb(-2)
+
+    def moment(self):
+        # Різні часові пояси й мікросекунди, як у даних, що ще не пройшли через БД
+        offset = dt_timezone(timedelta(minutes=self.random.randint(-14 * 60, 14 * 60)))
+        moment = datetime(2000, 1, 1, tzinfo=dt_timezone.utc) + timedelta(
+            seconds=self.random.randint(0, 10 ** 9), microseconds=self.random.choice([0, self.random.randint(1, 999999)])
+        )
+        return moment.astimezone(offset)
+
+    def assertSameOutput(self, serializer_class, instances):
+        def render():
+            data = serializer_class(instances, many=True, context={'request': self.request}).data
+            return JSONRenderer().render(data)
+
+        with override_settings(COMPILED_SERIALIZERS=False):
+            expected = render()
+        self.assertEqual(render(), expected)
+
+    def test_random_rows_match_drf(self):
+        bookings, reviews, views = [], [], []
+        for index in range(60):
+            prop, user = self.random.choice(self.properties), self.random.choice(self.users)
+            check_in = date(2000, 1, 1) + timedelta(days=self.random.randint(0, 20000))
+            bookings.append(Booking(
+                id=index + 1, property=prop, tenant=user, check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=self.random.randint(1, 30)),
+                guests_count=self.random.randint(1, 10), total_price=self.decimal(),
+                status=self.random.choice(['pending', 'confirmed', 'canceled']),
+                created_at=self.moment(), updated_at=self.moment(), notes=self.maybe(self.text),
+            ))
+            reviews.append(Review(
+                id=index + 1, property=prop, user=user, rating=self.random.randint(1, 5),
+                comment=self.text(), created_at=self.moment(),
+            ))
+            views.append(ViewHistory(id=index + 1, property=prop, user=user, timestamp=self.moment()))
+
+        self.assertSameOutput(PropertySerializer, list(PROPERTY_QUERYSET.all()))
+        self.assertSameOutput(BookingSerializer, bookings)
+        self.assertSameOutput(ReviewSerializer, reviews)
+        self.assertSameOutput(ViewHistorySerializer, views)
+
+        # Ті самі рядки після збереження: часові мітки з БД, відношення — лінивим доступом
+        Booking.objects.bulk_create(bookings)
+        self.assertSameOutput(BookingSerializer, Booking.objects.all())
+        self.assertSameOutput(ReviewSerializer, Review.objects.bulk_create(
+            {(review.property_id, review.user_id): review for review in reviews}.values()
+        ))
+
+    def test_unusual_values_fall_back_to_field_methods(self):
+        prop = self.properties[0]
+        booking = Booking(
+            id=1, property=prop, tenant=self.users[0], check_in_date='2024-01-01', check_out_date=date(2024, 1, 2),
+            total_price=Decimal('1.00'), created_at=datetime(2024, 1, 1, 12), updated_at='2024-01-01T00:00:00Z',
+        )
+        with self.settings(USE_TZ=False):
+            naive = Booking(id=2, property=prop, tenant=self.users[0], check_in_date=date(2024, 1, 1),
+                            check_out_date=date(2024, 1, 2), total_price=Decimal('1.00'),
+                            created_at=datetime(2024, 1, 1, 12), updated_at=datetime(2024, 1, 1, 12))
+            self.assertSameOutput(BookingSerializer, [naive])
+        self.assertSameOutput(BookingSerializer, [booking])
+
+    def test_generated_code_is_shared_between_bindings(self):
+        first = compile_serializer(BookingSerializer())
+        second = compile_serializer(BookingSerializer())
+        self.assertIsNot(first, second)
+        self.assertIs(first.__code__, second.__code__)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', first_name='O', last_name='W'
+        )
+        flat = PropertyType.objects.create(name='Flat')
+        berlin = Location.objects.create(city='Berlin', district='Mitte')
+        for index in range(3):
+            prop = Property.objects.create(
+                owner=self.owner, title=f'Flat {index}', description='Long description ' * 20, property_type=flat,
+                location=berlin, price=100, rooms=1, area=30,
+            )
+            image = PropertyImage(property=prop, is_main=True)
+            image.image.save('photo.jpg', ContentFile(b'-'), save=False)
+            image.save()
+            self.addCleanup(image.image.delete, save=False)
+        reference_data.current()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_parse_selection(self):
+        self.assertIsNone(parse_selection(None))
+        self.assertEqual(parse_selection(''), {})
+        self.assertEqual(
+            parse_selection('id, location.city,location.district,images,images.image,,.x'),
+            {'id': None, 'location': {'city': None, 'district': None}, 'images': None},
+        )
+
+    def test_list_reads_and_returns_only_requested_fields(self):
+        full, full_queries = self.get(reverse('property-list'), {})
+        sparse, sparse_queries = self.get(
+            reverse('property-list'), {'fields': 'id,title,price,location.city,owner_name'}
+        )
+
+        self.assertEqual(sparse.data['results'][0], {
+            'id': full.data['results'][0]['id'], 'title': 'Flat 2', 'price': '100.00',
+            'location': {'city': 'Berlin'}, 'owner_name': 'O W',
+        })
+        self.assertLess(len(sparse.content), len(full.content) / 4)
+        # Без зображень немає prefetch, опис і решта колонок не читаються
+        self.assertLess(len(sparse_queries), len(full_queries))
+        self.assertFalse([query for query in sparse_queries if 'properties_propertyimage' in query['sql']])
+        listing = next(query['sql'] for query in sparse_queries if 'ORDER BY' in query['sql'])
+        self.assertNotIn('description', listing)
+        self.assertIn('first_name', listing)
+
+    def test_expand_controls_nested_images(self):
+        collapsed, collapsed_queries = self.get(reverse('property-list'), {'expand': ''})
+        self.assertNotIn('images', collapsed.data['results'][0])
+        self.assertIn('description', collapsed.data['results'][0])
+        self.assertFalse([query for query in collapsed_queries if 'properties_propertyimage' in query['sql']])
+
+        expanded, _ = self.get(reverse('property-list'), {'fields': 'id', 'expand': 'images'})
+        self.assertEqual(set(expanded.data['results'][0]), {'id', 'images'})
+        self.assertEqual(set(expanded.data['results'][0]['images'][0]), {
+            'id', 'image', 'is_main', 'created_at', 'width', 'height', 'placeholder', 'variants', 'processing_status',
+        })
+
+    def test_detail_reads_only_requested_fields(self):
+        prop = Property.objects.get(title='Flat 0')
+        response, queries = self.get(reverse('property-detail', args=[prop.pk]), {'fields': 'title'})
+        self.assertEqual(response.data, {'title': 'Flat 0'})
+        self.assertNotIn('description', queries[0]['sql'])
+        # Лічильник переглядів, який збільшує view, прочитано тим самим запитом
+        reads = [query for query in queries if query['sql'].startswith('SELECT') and 'properties_' in query['sql']]
+        self.assertEqual(len(reads), 1)
+
+    def test_invalid_selection_is_rejected(self):
+        url = reverse('property-list')
+        for params, fragment in (({'fields': ''}, 'Не выбрано'), ({'fields': 'id,nope'}, 'nope'),
+                                 ({'fields': 'location.nope'}, 'в location: nope'),
+                                 ({'fields': 'owner.username'}, 'owner')):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(fragment, response.data['fields'][0])
+        self.assertIn('Допустимые поля: id, title', self.client.get(url, {'fields': 'nope'}).data['fields'][0])
+
+    def test_nested_user_details_are_narrowed(self):
+        tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='pass12345')
+        prop = Property.objects.get(title='Flat 0')
+        Review.objects.create(property=prop, user=tenant, rating=5, comment='ok')
+        response, _ = self.get(reverse('property-reviews', args=[prop.pk]), {'fields': 'rating,user_details.username'})
+        self.assertEqual(response.data['results'], [{'user_details': {'username': 'tenant'}, 'rating': 5}])
+
+    def test_writes_ignore_field_selection(self):
+        prop = Property.objects.get(title='Flat 0')
+        response = self.client.patch(
+            reverse('property-update', args=[prop.pk]) + '?fields=id', {'title': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': prop.pk})
+        prop.refresh_from_db()
+        self.assertEqual(prop.title, 'Renamed')
+
+
+def jpeg_with_metadata(width, height, orientation=1):
+    image = Image.new('RGB', (width, height), (200, 40, 40))
+    image.paste((30, 60, 220), (0, 0, width // 2, height))
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class PropertyImagePipelineTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        # Конекшн тестової транзакції не можна закривати
+        patcher = mock.patch('properties.image_pipeline.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.prop = Property.objects.create(
+            owner=self.owner, title='Flat', description='Flat', property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin', district='Mitte'), price=100, rooms=1, area=30,
+        )
+        self.pipeline = ImagePipeline(workers=0, max_attempts=2, retry_delay=1, variants={
+            'thumbnail': (100, 100), 'card': (400, 400), 'full': (1000, 1000),
+        })
+
+    def upload(self, data, name='photo.jpg'):
+        image = PropertyImage(property=self.prop)
+        image.image.save(name, ContentFile(data), save=False)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, mock.patch.object(image_pipeline, 'schedule') as schedule:
+            image.save()
+        self.assertEqual(len(callbacks), 1)
+        schedule.assert_called_once_with(image.pk)
+        return image
+
+    def test_variants_are_resized_without_metadata(self):
+        # Орієнтація 6: у файлі 1200x800, на екрані — 800x1200
+        image = self.upload(jpeg_with_metadata(1200, 800, orientation=6))
+        self.assertTrue(self.pipeline.process(image.pk))
+
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, 'ready')
+        self.assertEqual((image.width, image.height), (800, 1200))
+        self.assertEqual(len(image.placeholder), 28)
+        self.assertEqual(set(image.variants), {'thumbnail', 'card', 'full'})
+        for name, bound in (('thumbnail', 100), ('card', 400), ('full', 1000)):
+            variant = image.variants[name]
+            self.assertEqual(variant['height'], bound)
+            for image_format in ('jpeg', 'webp'):
+                with Image.open(default_storage.path(variant[image_format])) as output:
+                    self.assertEqual(output.size, (variant['width'], variant['height']))
+                    self.assertFalse(output.getexif())
+
+        # Повторна обробка замінює файли варіантів, старі видаляються
+        old_paths = [variant['jpeg'] for variant in image.variants.values()]
+        self.assertTrue(self.pipeline.process(image.pk))
+        self.assertFalse([path for path in old_paths if default_storage.exists(path)])
+
+    def test_failures_are_retried_then_marked_failed(self):
+        image = self.upload(b'not an image')
+        with mock.patch('properties.image_pipeline.threading.Timer') as timer, \
+                self.assertLogs('properties.image_pipeline', 'WARNING'):
+            self.pipeline._run(image.pk, 1)
+        timer.assert_called_once_with(1, self.pipeline.schedule, (image.pk, 2))
+        image.refresh_from_db()
+        self.assertEqual((image.processing_status, image.processing_attempts), ('pending', 1))
+
+        with mock.patch('properties.image_pipeline.threading.Timer') as timer, \
+                self.assertLogs('properties.image_pipeline', 'ERROR'):
+            self.pipeline._run(image.pk, 2)
+        timer.assert_not_called()
+        image.refresh_from_db()
+        self.assertEqual((image.processing_status, image.processing_attempts), ('failed', 2))
+
+    def test_replacing_file_resets_variants(self):
+        image = self.upload(jpeg_with_metadata(300, 200))
+        self.pipeline.process(image.pk)
+        image.refresh_from_db()
+        stale = image.variants['card']['webp']
+
+        # Збереження без нового файлу — лише UPDATE, варіанти лишаються
+        with self.assertNumQueries(1):
+            image.save()
+        self.assertEqual(image.processing_status, 'ready')
+
+        image.image.save('other.jpg', ContentFile(jpeg_with_metadata(200, 300)), save=False)
+        with self.captureOnCommitCallbacks(execute=True), mock.patch.object(image_pipeline, 'schedule') as schedule:
+            image.save()
+        schedule.assert_called_once_with(image.pk)
+        image.refresh_from_db()
+        self.assertEqual((image.processing_status, image.variants, image.width), ('pending', {}, None))
+        self.assertFalse(default_storage.exists(stale))
+
+    def test_serializer_exposes_variant_urls(self):
+        image = self.upload(jpeg_with_metadata(300, 200))
+        self.pipeline.process(image.pk)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        response = client.get(reverse('property-detail', args=[self.prop.pk]))
+        data = response.data['images'][0]
+        self.assertEqual((data['width'], data['height'], data['processing_status']), (300, 200, 'ready'))
+        self.assertTrue(data['variants']['card']['webp'].startswith('http://testserver/media/property_images/'))
+        self.assertEqual(set(data['variants']['thumbnail']), {'width', 'height', 'jpeg', 'webp'})
+
+        response = client.get(reverse('property-list'), {'fields': 'id,images.variants.card', 'expand': 'images'})
+        self.assertEqual(set(response.data['results'][0]['images'][0]['variants']), {'card'})
@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     PropertyListView, PropertyDetailView, PropertyTypeListView,
     LocationListView, PropertyCreateView, PropertyUpdateView,
-    PropertyDeleteView, PropertyToggleStatusView
+    PropertyDeleteView, PropertyToggleStatusView, SimilarPropertiesView, AutocompleteView
 )
 
+# Під ASGI (rental_project/asgi.py вмикає ASYNC_VIEWS) read-heavy endpoint'и обслуговують async-версії
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        PropertyListAsyncView as PropertyListView, PropertyDetailAsyncView as PropertyDetailView,
+        PropertyTypeListAsyncView as PropertyTypeListView, LocationListAsyncView as LocationListView,
+    )
+
 urlpatterns = [
     path('', PropertyListView.as_view(), name='property-list'),
     path('<int:pk>/', PropertyDetailView.as_view(), name='property-detail'),
@@ -12,6 +20,8 @@ urlpatterns = [
     path('<int:pk>/update/', PropertyUpdateView.as_view(), name='property-update'),
     path('<int:pk>/delete/', PropertyDeleteView.as_view(), name='property-delete'),
     path('<int:pk>/toggle-status/', PropertyToggleStatusView.as_view(), name='property-toggle-status'),
+    path('<int:pk>/similar/', SimilarPropertiesView.as_view(), name='property-similar'),
     path('types/', PropertyTypeListView.as_view(), name='property-types'),
     path('locations/', LocationListView.as_view(), name='locations'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
 ]
\ No newline at end of file
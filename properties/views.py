@@ -1,14 +1,45 @@
+from django.db import connection
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
 from rest_framework import generics, permissions, filters, status
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
 from .models import Property, PropertyType, Location
-from .serializers import PropertySerializer, PropertyTypeSerializer, LocationSerializer
+from .serializers import PropertySerializer, PropertyTypeSerializer, LocationSerializer, SimilarPropertySerializer
+from .autocomplete import autocomplete
 from .filters import PropertyFilter
+from .reference_data import reference_data
+from analytics.models import PropertySimilarity
+from analytics.search_stats import record_search
+from analytics.unique_viewers import record_unique_view, visitor_key
+from rental_project.async_views import fire_and_forget
+from rental_project.cache import cache_response, cached, invalidate
+from rental_project.db_router import no_pin
+from rental_project.query_inspection import query_budget
+from rental_project.sparse_fields import SPARSE_FIELDS_PARAMETERS, sparse_queryset
 
+# PropertySerializer читає власника, локацію й зображення — завантажуємо їх разом з оголошеннями;
+# тип береться зі знімка довідника (reference_data)
+PROPERTY_QUERYSET = Property.objects.select_related('owner', 'location').prefetch_related('images')
 
+
+def track_search(request):
+    """
+    Записує пошуковий запит користувача для аналітики вже після побудови відповіді,
+    у фоновому потоці: запис не подовжує запит і не закріплює клієнта за primary
+    """
+    search = request.query_params.get('search')
+    if search and request.user.is_authenticated:
+        fire_and_forget(record_search, request.user, search)
+
+
+@extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+@query_budget(10)
 class PropertyListView(generics.ListAPIView):
-    queryset = Property.objects.filter(status='active')
+    queryset = PROPERTY_QUERYSET.filter(status='active')
     serializer_class = PropertySerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = PropertyFilter
@@ -16,28 +47,38 @@ class PropertyListView(generics.ListAPIView):
     ordering_fields = ['price', 'created_at', 'views_count']
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        # Логіка для аналітики: збільшуємо лічильник переглядів
-        if self.request.user.is_authenticated:
-            # Тут можна додати логіку для запису історії переглядів
-            pass
-        return queryset
+        return sparse_queryset(self, super().get_queryset())
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        track_search(request)
+        return response
 
+
+@extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+@query_budget(10)
 class PropertyDetailView(generics.RetrieveAPIView):
-    queryset = Property.objects.all()
+    queryset = PROPERTY_QUERYSET
     serializer_class = PropertySerializer
 
+    def get_queryset(self):
+        # Лічильник переглядів view збільшує сам, навіть якщо у ?fields= його немає
+        return sparse_queryset(self, super().get_queryset(), always=['views_count'])
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Збільшуємо лічильник переглядів
+        # Лічильник і скетч — аналітика: перегляд не закріплює клієнта за primary
+        with no_pin():
+            # Збільшуємо лічильник переглядів атомарно, без перезапису всього рядка
+            Property.objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
+            # Оновлюємо денний скетч унікальних переглядачів (анонімних і авторизованих)
+            record_unique_view(instance.pk, visitor_key(request))
         instance.views_count += 1
-        instance.save()
         # Записуємо історію переглядів, якщо користувач авторизований
         if self.request.user.is_authenticated:
             # Тут можна додати логіку для запису історії переглядів
             pass
-        return super().retrieve(request, *args, **kwargs)
+        return Response(self.get_serializer(instance).data)
 
 
 class PropertyCreateView(generics.CreateAPIView):
@@ -50,70 +91,143 @@ class PropertyCreateView(generics.CreateAPIView):
 
 
 class PropertyUpdateView(generics.UpdateAPIView):
-    queryset = Property.objects.all()
+    """
+    Оновлення оголошення власником. Оголошення читається одним запитом разом з власником і локацією
+    (тип — зі знімка довідника), а зміни записуються одним UPDATE лише змінених полів з умовою на власника.
+    """
+    queryset = Property.objects.select_related('owner', 'location')
     serializer_class = PropertySerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def perform_update(self, serializer):
+    def get_object(self):
+        instance = super().get_object()
         # Перевіряємо, чи користувач є власником оголошення
-        instance = self.get_object()
-        if instance.owner != self.request.user:
-            return Response(
-                {"detail": "Вы не можете редактировать это объявление"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        serializer.save()
+        if instance.owner_id != self.request.user.pk:
+            raise PermissionDenied("Вы не можете редактировать это объявление")
+        return instance
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        previous_location_id = instance.location_id
+        changes = dict(serializer.validated_data)
+        changes['updated_at'] = timezone.now()
+        updated = Property.objects.filter(pk=instance.pk, owner=self.request.user).update(**changes)
+        if not updated:
+            # Оголошення видалили між читанням і записом
+            raise NotFound("Объявление не найдено")
+        for field, value in changes.items():
+            setattr(instance, field, value)
+        _property_changed(instance.pk)
+        if 'status' in changes or 'location' in changes:
+            _refresh_autocomplete(Location.objects.filter(pk__in={previous_location_id, instance.location_id}))
+
+
+def _property_changed(pk):
+    """
+    UPDATE через QuerySet не надсилає post_save: скидаємо ті самі теги, що й сигнал invalidate_property_cache
+    """
+    invalidate(f'property:{pk}')
+
+
+def _refresh_autocomplete(locations):
+    # Вага міст і районів в автодоповненні — кількість активних оголошень у них
+    if autocomplete.is_loaded:
+        rows = list(locations.values('city', 'district'))
+        autocomplete.update_locations(
+            cities=[row['city'] for row in rows], districts=[row['district'] for row in rows]
+        )
+
+
+def _ownership_error(pk, message):
+    """Після UPDATE/DELETE без змінених рядків розрізняє чуже оголошення (403) і відсутнє (404)"""
+    if Property.objects.filter(pk=pk).exists():
+        return Response({"detail": message}, status=status.HTTP_403_FORBIDDEN)
+    return Response({"detail": "Объявление не найдено"}, status=status.HTTP_404_NOT_FOUND)
 
 
 class PropertyDeleteView(generics.DestroyAPIView):
+    """
+    Видалення оголошення власником: умова на власника входить у сам DELETE,
+    окремого читання оголошення та власника немає
+    """
     queryset = Property.objects.all()
     permission_classes = [permissions.IsAuthenticated]
 
-    def perform_destroy(self, instance):
-        # Перевіряємо, чи користувач є власником оголошення
-        if instance.owner != self.request.user:
-            return Response(
-                {"detail": "Вы не можете удалить это объявление"},
-                status=status.HTTP_403_FORBIDDEN
+    def destroy(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        deleted, _ = Property.objects.filter(pk=pk, owner=request.user).delete()
+        if not deleted:
+            return _ownership_error(pk, "Вы не можете удалить это объявление")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def _toggle_status(pk, owner_id):
+    """
+    Перемикає статус одним UPDATE з умовою на власника.
+    Повертає новий статус або None, якщо рядок не змінено.
+    """
+    now = timezone.now()
+    if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+        # UPDATE ... RETURNING: SQLite >= 3.35 та PostgreSQL
+        table = connection.ops.quote_name(Property._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET status = CASE WHEN status = 'active' THEN 'inactive' ELSE 'active' END, "
+                f"updated_at = %s WHERE id = %s AND owner_id = %s RETURNING status",
+                [connection.ops.adapt_datetimefield_value(now), pk, owner_id],
             )
-        instance.delete()
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    toggled = Case(When(status='active', then=Value('inactive')), default=Value('active'))
+    if not Property.objects.filter(pk=pk, owner_id=owner_id).update(status=toggled, updated_at=now):
+        return None
+    return Property.objects.filter(pk=pk).values_list('status', flat=True).first()
 
 
 class PropertyToggleStatusView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        try:
-            property_obj = Property.objects.get(pk=pk)
-            # Перевіряємо, чи користувач є власником оголошення
-            if property_obj.owner != request.user:
-                return Response(
-                    {"detail": "Вы не можете изменить статус этого объявления"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-
-            # Переключаємо статус
-            if property_obj.status == 'active':
-                property_obj.status = 'inactive'
-            else:
-                property_obj.status = 'active'
-
-            property_obj.save()
-            return Response(
-                {"status": property_obj.status},
-                status=status.HTTP_200_OK
-            )
-        except Property.DoesNotExist:
-            return Response(
-                {"detail": "Объявление не найдено"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Перевірка власника входить в умову UPDATE
+        new_status = _toggle_status(pk, request.user.pk)
+        if new_status is None:
+            return _ownership_error(pk, "Вы не можете изменить статус этого объявления")
+        _property_changed(pk)
+        _refresh_autocomplete(Location.objects.filter(properties__pk=pk))
+        return Response(
+            {"status": new_status},
+            status=status.HTTP_200_OK
+        )
+
 
+# Список довідника зі знімка reference_data без запитів до БД: пошук і пагінація — над списком у пам'яті,
+# у порядку id, як і раніше з таблиці (docstring міксина потрапив би в опис endpoint'ів у схемі)
+class ReferenceListMixin:
+    reference = None
+    search_fields = ()
 
-class PropertyTypeListView(generics.ListAPIView):
+    def reference_rows(self, snapshot):
+        # Та сама семантика, що й у SearchFilter: кожне слово має входити (icontains) хоча б в одне поле
+        terms = [term.lower() for term in filters.SearchFilter().get_search_terms(self.request)]
+        return [
+            row for row in getattr(snapshot, f'{self.reference}_data').values()
+            if all(any(term in (row[field] or '').lower() for field in self.search_fields) for term in terms)
+        ]
+
+    def list(self, request, *args, **kwargs):
+        rows = self.reference_rows(reference_data.current())
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([dict(row) for row in page])
+        return Response([dict(row) for row in rows])
+
+
+class PropertyTypeListView(ReferenceListMixin, generics.ListAPIView):
     queryset = PropertyType.objects.all()
     serializer_class = PropertyTypeSerializer
     permission_classes = [permissions.AllowAny]
+    reference = 'property_types'
 
 
 class LocationListView(generics.ListAPIView):
@@ -121,4 +235,47 @@ class LocationListView(generics.ListAPIView):
     serializer_class = LocationSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [filters.SearchFilter]
-    search_fields = ['city', 'district']
\ No newline at end of file
+    search_fields = ['city', 'district']
+
+
+@cached(tags=('similarities',), key='{0}')
+def _similar_ids(pk):
+    # Набір схожих змінюється лише перерахунком build_similar_properties, який скидає тег similarities
+    return list(PropertySimilarity.objects.filter(property_id=pk).values_list('similar_id', flat=True))
+
+
+def _similar_tags(pk):
+    # Відповідь залежить від кожного схожого оголошення (назва, ціна, статус), тож несе і їхні теги
+    return [f'property:{pk}', 'similarities', *(f'property:{similar_id}' for similar_id in _similar_ids(pk))]
+
+
+class SimilarPropertiesView(generics.ListAPIView):
+    """
+    Схожі оголошення ("також переглядали"), попередньо обчислені командою build_similar_properties
+    """
+    serializer_class = SimilarPropertySerializer
+    pagination_class = None
+
+    @cache_response(tags=lambda pk, **_: _similar_tags(pk))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return PropertySimilarity.objects.filter(
+            property_id=self.kwargs['pk'], similar__status='active'
+        ).order_by('rank').values(
+            'similar_id', 'similar__title', 'similar__price', 'similar__location__city', 'score'
+        )
+
+
+class AutocompleteView(APIView):
+    """
+    Автодоповнення міст, районів і популярних запитів з in-memory префіксного індексу
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        limit = request.query_params.get('limit', '10')
+        limit = min(int(limit), 50) if limit.isdigit() and int(limit) > 0 else 10
+        return Response(autocomplete.complete(query, limit))
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rental_project.settings')
+# Під ASGI read-heavy endpoint'и обслуговуються async-view замість пулу потоків
+os.environ.setdefault('RENTAL_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Довідники завантажуються до першого запиту (у майстрі, якщо сервер імпортує застосунок до форку)
+from properties.reference_data import reference_data  # noqa: E402
+
+reference_data.warm_up()
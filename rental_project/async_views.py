@@ -0,0 +1,139 @@
+import inspect
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.http import Http404
+from rest_framework import generics, mixins
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Побічні ефекти читання (лічильники, історія) не затримують відповідь і не залежать від життя event loop:
+# під WSGI async-view виконується в тимчасовому циклі, і asyncio-задачі після відповіді були б скасовані
+_side_effects = ThreadPoolExecutor(max_workers=4, thread_name_prefix='side-effects')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _run_side_effect(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Побічний ефект %s завершився помилкою', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def fire_and_forget(func, *args):
+    future = _side_effects.submit(_run_side_effect, func, args)
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(lambda done: _pending.discard(done))
+    return future
+
+
+def wait_for_side_effects(timeout=None):
+    """Чекає на завершення запущених побічних ефектів (для тестів і бенчмарків)"""
+    with _pending_lock:
+        pending = set(_pending)
+    wait(pending, timeout=timeout)
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView з async-обробниками методів. Автентифікація, дозволи й throttling лишаються синхронними
+    (можуть звертатися до БД) і виконуються через sync_to_async; сам обробник працює в event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            # OPTIONS з APIView лишається синхронним
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericAPIView(AsyncAPIView, generics.GenericAPIView):
+    """
+    GenericAPIView, що читає через async ORM. filter_queryset лише будує запит і до БД не звертається,
+    тому викликається напряму.
+    """
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """
+        Повторює PageNumberPagination.paginate_queryset: кількість і сторінка читаються через async ORM,
+        а номери сторінок, посилання та помилки лишаються такими ж, як у синхронних view
+        """
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        page_size = paginator.get_page_size(self.request)
+        if not page_size:
+            return None
+
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(self.request, django_paginator)
+        try:
+            page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        page.object_list = [obj async for obj in page.object_list]
+        if django_paginator.num_pages > 1 and paginator.template is not None:
+            paginator.display_page_controls = True
+        paginator.page = page
+        paginator.request = self.request
+        return page.object_list
+
+
+# Міксини DRF лише підказують drf-spectacular форму відповіді; їхні синхронні методи не викликаються
+class AsyncListAPIView(mixins.ListModelMixin, AsyncGenericAPIView):
+    async def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+
+
+class AsyncRetrieveAPIView(mixins.RetrieveModelMixin, AsyncGenericAPIView):
+    async def get(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
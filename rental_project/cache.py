@@ -0,0 +1,325 @@
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from rest_framework.response import Response
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = 'tag:'
+LOCK_PREFIX = 'lock:'
+
+
+class LocalLRU:
+    """In-process LRU з обмеженням за кількістю записів і часом життя кожного запису"""
+
+    def __init__(self, maxsize=1000, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_tags(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key, (_, entry) in self._entries.items() if tags & entry['tags'].keys()]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    Дворівневий кеш: in-process LRU (L1) над спільним cache-бекендом Django (L2).
+
+    Запис несе теги (`property:42`, `user:7`) з їхніми версіями на момент обчислення;
+    invalidate_tags змінює версії в L2, і всі записи з цими тегами стають недійсними в усіх воркерах.
+    L1 інших воркерів відстає щонайбільше на свій TTL. Від лавини перерахунків захищають
+    ймовірнісне раннє оновлення (XFetch) та single-flight: у процесі — подія на ключ, між процесами —
+    короткий lock у L2, поки тримач lock рахує, інші віддають попереднє значення.
+    """
+
+    def __init__(self, alias='default', name='default', l1_size=1000, l1_ttl=5, default_ttl=300,
+                 beta=1.0, lock_timeout=10, wait_timeout=5):
+        self.alias = alias
+        self.name = name
+        self.local = LocalLRU(l1_size, l1_ttl)
+        self.default_ttl = default_ttl
+        self.beta = beta
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _record(self, result):
+        registry.record_cache(self.name, result)
+
+    def _should_refresh(self, entry):
+        # XFetch: чим довше рахується значення і чим ближче закінчення, тим імовірніше раннє оновлення
+        return time.time() - entry['delta'] * self.beta * math.log(1 - random.random()) >= entry['expires_at']
+
+    def _shared_get(self, key, tags):
+        """Запис і поточні версії тегів з L2 одним зверненням; помилка L2 рівнозначна промаху"""
+        try:
+            found = self.backend.get_many([key, *(TAG_PREFIX + tag for tag in tags)])
+        except DatabaseError:
+            logger.warning('Спільний кеш недоступний', exc_info=True)
+            return None, {}
+        return found.get(key), {tag: found.get(TAG_PREFIX + tag) for tag in tags}
+
+    def _tag_versions(self, tags, known):
+        """Версії тегів; відсутні (нові або витіснені з L2) створюються — старі записи з ними вже не збігуться"""
+        missing = {TAG_PREFIX + tag: time.time_ns() for tag in tags if known.get(tag) is None}
+        if missing:
+            try:
+                for tag_key, version in missing.items():
+                    self.backend.add(tag_key, version, None)
+                known.update({key[len(TAG_PREFIX):]: value
+                              for key, value in self.backend.get_many(list(missing)).items()})
+            except DatabaseError:
+                logger.warning('Спільний кеш недоступний', exc_info=True)
+        return {tag: known.get(tag) for tag in tags}
+
+    @staticmethod
+    def _is_current(entry, versions):
+        return entry is not None and all(
+            versions.get(tag) is not None and versions[tag] == version for tag, version in entry['tags'].items()
+        )
+
+    def get_or_set(self, key, compute, ttl=None, tags=(), cacheable=None):
+        """
+        Значення з кешу або результат compute(). `cacheable(value)` може заборонити збереження
+        (наприклад, відповіді з помилкою).
+        """
+        tags = tuple(tags)
+        entry = self.local.get(key)
+        if entry is not None and not self._should_refresh(entry):
+            self._record('hit_local')
+            return entry['value']
+
+        entry, versions = self._shared_get(key, tags)
+        valid = entry is not None and entry['expires_at'] > time.time() and self._is_current(entry, versions)
+        if valid and not self._should_refresh(entry):
+            self.local.set(key, entry)
+            self._record('hit_shared')
+            return entry['value']
+        return self._recompute(key, compute, ttl, tags, versions, entry if valid else None, cacheable)
+
+    def _recompute(self, key, compute, ttl, tags, versions, previous, cacheable):
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            if previous is not None:
+                self._record('stale')
+                return previous['value']
+            event.wait(self.wait_timeout)
+            entry = self.local.get(key)
+            if entry is not None:
+                self._record('hit_local')
+                return entry['value']
+            # Лідер не впорався вчасно або результат не кешується — рахуємо самі
+            self._record('miss')
+            return compute()
+
+        locked = False
+        try:
+            locked = self._acquire_shared_lock(key)
+            if not locked and previous is not None:
+                # Інший воркер уже оновлює значення — віддаємо попереднє
+                self._record('stale')
+                return previous['value']
+            self._record('refresh' if previous is not None else 'miss')
+            versions = self._tag_versions(tags, versions)
+            started = time.time()
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self._store(key, value, ttl, versions, time.time() - started)
+            return value
+        finally:
+            if locked:
+                self._release_shared_lock(key)
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _store(self, key, value, ttl, versions, delta):
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = {'value': value, 'expires_at': time.time() + ttl, 'delta': delta, 'tags': versions}
+        self.local.set(key, entry)
+        try:
+            self.backend.set(key, entry, ttl)
+        except DatabaseError:
+            logger.warning('Спільний кеш недоступний', exc_info=True)
+
+    def _acquire_shared_lock(self, key):
+        try:
+            return self.backend.add(LOCK_PREFIX + key, 1, self.lock_timeout)
+        except DatabaseError:
+            return True
+
+    def _release_shared_lock(self, key):
+        try:
+            self.backend.delete(LOCK_PREFIX + key)
+        except DatabaseError:
+            pass
+
+    def invalidate_tags(self, *tags):
+        """Робить недійсними всі записи з будь-яким із тегів — у цьому процесі одразу, в інших через L1 TTL"""
+        tags = [str(tag) for tag in tags if tag]
+        if not tags:
+            return
+        self.local.discard_tags(tags)
+        try:
+            self.backend.set_many({TAG_PREFIX + tag: time.time_ns() for tag in tags}, None)
+        except DatabaseError:
+            logger.warning('Не вдалося інвалідувати теги %s', tags, exc_info=True)
+        self._record('invalidation')
+
+    def delete(self, key):
+        self.local.discard(key)
+        try:
+            self.backend.delete(key)
+        except DatabaseError:
+            logger.warning('Спільний кеш недоступний', exc_info=True)
+
+    def clear_local(self):
+        self.local.clear()
+
+
+def _build_cache():
+    options = getattr(settings, 'TIERED_CACHE', {})
+    return TieredCache(
+        alias=options.get('BACKEND', 'default'),
+        l1_size=options.get('LOCAL_SIZE', 1000),
+        l1_ttl=options.get('LOCAL_TTL', 5),
+        default_ttl=options.get('TTL', 300),
+        beta=options.get('EARLY_REFRESH_BETA', 1.0),
+    )
+
+
+tiered_cache = _build_cache()
+
+
+def invalidate(*tags):
+    """
+    Інвалідація після запису: одразу і ще раз після коміту транзакції, щоб читач, який встиг
+    закешувати незафіксований стан, не залишив його в кеші
+    """
+    tiered_cache.invalidate_tags(*tags)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: tiered_cache.invalidate_tags(*tags))
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def cached(ttl=None, tags=(), key=None):
+    """
+    Кешує результат функції. `key` і `tags` — рядки-шаблони з аргументами функції ('property:{property_id}')
+    або функції від тих самих аргументів; без `key` ключ будується з усіх аргументів.
+    """
+    def decorator(func):
+        prefix = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = _resolve(key, args, kwargs) if key else _digest(args, sorted(kwargs.items()))
+            return tiered_cache.get_or_set(
+                f'{prefix}:{cache_key}', lambda: func(*args, **kwargs), ttl, _resolve_tags(tags, args, kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def _resolve(template, args, kwargs):
+    return template(*args, **kwargs) if callable(template) else template.format(*args, **kwargs)
+
+
+def _resolve_tags(tags, args, kwargs):
+    if callable(tags):
+        return tags(*args, **kwargs)
+    return [tag.format(*args, **kwargs) for tag in tags]
+
+
+def cached_queryset(queryset, ttl=None, tags=()):
+    """Список об'єктів QuerySet з кешу; ключ — SQL з параметрами та БД запиту"""
+    sql, params = queryset.query.sql_with_params()
+    return tiered_cache.get_or_set(
+        f'queryset:{queryset.db}:{_digest(sql, params)}', lambda: list(queryset), ttl, tags
+    )
+
+
+def cache_response(ttl=None, tags=(), per_user=False):
+    """
+    Кешує дані успішної GET-відповіді методу DRF-view за повним шляхом із query string.
+    Теги — шаблони з kwargs маршруту і `user` (id користувача), напр. 'property:{property_id}',
+    або функція від тих самих іменованих аргументів.
+    """
+    def decorator(method):
+        prefix = f'{method.__module__}.{method.__qualname__}'
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return method(view, request, *args, **kwargs)
+            user = request.user.pk if request.user.is_authenticated else None
+            key = f'{prefix}:{_digest(request.get_full_path(), user if per_user else None)}'
+            context = {**kwargs, 'user': user}
+
+            def compute():
+                response = method(view, request, *args, **kwargs)
+                return response.status_code, response.data
+
+            status, data = tiered_cache.get_or_set(
+                key, compute, ttl, _resolve_tags(tags, (), context),
+                cacheable=lambda result: result[0] == 200,
+            )
+            return Response(data, status=status)
+        return wrapper
+    return decorator
@@ -0,0 +1,206 @@
+import datetime
+import threading
+import weakref
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+# Рядки згенерованого коду → поле серіалізатора, для звітів query_inspection про N+1
+FIELD_LINES = weakref.WeakKeyDictionary()
+# Набір полів задає клієнт (?fields=, rental_project/sparse_fields.py), тож кеш коду обмежений
+MAX_COMPILED = 256
+
+_SCALARS = {
+    drf_fields.IntegerField.to_representation: 'int',
+    drf_fields.CharField.to_representation: 'str',
+    drf_fields.FloatField.to_representation: 'float',
+}
+_codes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _model_field(serializer, field):
+    """Поле моделі ModelSerializer, з якого поле серіалізатора читає значення напряму, або None"""
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None or len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    return model_field if model_field.concrete else None
+
+
+def _plan(serializer, field):
+    """Як читати й перетворювати поле: кожен швидкий шлях повторює відповідний код DRF без диспетчеризації"""
+    kind = type(field)
+    model_field = _model_field(serializer, field)
+    if isinstance(field, serializers.SerializerMethodField) and kind.get_attribute is drf_fields.Field.get_attribute \
+            and kind.to_representation is serializers.SerializerMethodField.to_representation:
+        return 'method', None
+    if isinstance(field, relations.PrimaryKeyRelatedField) and model_field is not None and model_field.is_relation \
+            and kind.get_attribute is relations.RelatedField.get_attribute and field.pk_field is None \
+            and kind.to_representation is relations.PrimaryKeyRelatedField.to_representation \
+            and field.use_pk_only_optimization():
+        return 'pk', model_field.attname
+    if isinstance(field, serializers.ListSerializer) and kind.to_representation is \
+            serializers.ListSerializer.to_representation:
+        return 'many', None
+    if isinstance(field, serializers.Serializer) and kind.to_representation is serializers.Serializer.to_representation:
+        return 'nested', None
+    direct = model_field is not None and not model_field.is_relation and \
+        kind.get_attribute is drf_fields.Field.get_attribute
+    return ('attribute' if direct else 'generic'), _SCALARS.get(kind.to_representation) if direct else None
+
+
+def _iso_format(field, default):
+    output_format = getattr(field, 'format', default)
+    return output_format is not None and output_format.lower() == drf_fields.ISO_8601
+
+
+def _converter(field):
+    """
+    to_representation для дат і часу в ISO 8601 без повторного пошуку поточного часового поясу на кожне значення.
+    Нетипові значення (рядки, naive datetime, підкласи) обробляє сам метод поля.
+    """
+    kind = type(field)
+    represent = field.to_representation
+    if kind.to_representation is drf_fields.DateTimeField.to_representation and \
+            kind.enforce_timezone is drf_fields.DateTimeField.enforce_timezone and \
+            _iso_format(field, api_settings.DATETIME_FORMAT):
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return represent
+
+        def convert(value):
+            if value.__class__ is not datetime.datetime or value.utcoffset() is None:
+                return represent(value)
+            try:
+                value = value.astimezone(field_timezone).isoformat()
+            except OverflowError:
+                return represent(value)
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+
+    if kind.to_representation is drf_fields.DateField.to_representation and \
+            _iso_format(field, api_settings.DATE_FORMAT):
+        return lambda value: value.isoformat() if value.__class__ is datetime.date else represent(value)
+    return represent
+
+
+def _signature(serializer, fields):
+    return type(serializer), tuple((field.field_name, type(field), field.source) for field in fields)
+
+
+def _generate(serializer, fields, plans):
+    name = type(serializer).__name__
+    lines, labels = ['def serialize(instance):'], [None]
+
+    def emit(line, label=None):
+        lines.append(line)
+        labels.append(label)
+
+    if getattr(getattr(serializer, 'Meta', None), 'model', None) is not None:
+        # Інший клас (наприклад, проксі чи підклас) серіалізує звичайний шлях DRF
+        emit('    if instance.__class__ is not model:')
+        emit('        return stock(instance)')
+    emit('    data = {}')
+    for index, (field, (kind, extra)) in enumerate(zip(fields, plans)):
+        label = f'{name}.{field.field_name}'
+        key = repr(field.field_name)
+        if kind == 'method':
+            emit(f'    data[{key}] = method_{index}(instance)', label)
+        elif kind == 'pk':
+            emit(f'    data[{key}] = instance.{extra}', label)
+        elif kind == 'attribute':
+            convert = f'{extra}(value)' if extra else f'rep_{index}(value)'
+            emit(f'    value = instance.{field.source_attrs[0]}', label)
+            emit(f'    data[{key}] = None if value is None else {convert}', label)
+        else:
+            if kind == 'many':
+                convert = (f'[child_{index}(item) for item in '
+                           f'(value.all() if isinstance(value, Manager) else value)]')
+            elif kind == 'nested':
+                convert = f'child_{index}(value)'
+            else:
+                convert = f'rep_{index}(value)'
+            emit('    try:', label)
+            emit(f'        value = get_{index}(instance)', label)
+            emit('    except SkipField:', label)
+            emit('        pass', label)
+            emit('    else:', label)
+            emit(f'        data[{key}] = None if (value.pk if isinstance(value, PKOnlyObject) else value) is None '
+                 f'else {convert}', label)
+    emit('    return data')
+
+    module = compile('\n'.join(lines), f'<compiled {name}>', 'exec')
+    code = next(const for const in module.co_consts if isinstance(const, type(module)))
+    FIELD_LINES[code] = {number: label for number, label in enumerate(labels, start=1) if label}
+    return module
+
+
+def compile_serializer(serializer):
+    """
+    Функція instance → dict з тим самим виводом, що й serializer.to_representation, згенерована під набір полів.
+    Прості поля моделі читаються атрибутом і перетворюються вбудованими int/str/float, FK — через *_id,
+    вкладені серіалізатори компілюються рекурсивно; решта полів викликає власні get_attribute/to_representation.
+    Згенерований код кешується (LRU) за класом серіалізатора й набором полів, прив'язка до полів — на кожен виклик.
+    """
+    fields = list(serializer._readable_fields)
+    plans = [_plan(serializer, field) for field in fields]
+    signature = _signature(serializer, fields)
+    with _lock:
+        module = _codes.get(signature)
+        if module is not None:
+            _codes.move_to_end(signature)
+    if module is None:
+        module = _generate(serializer, fields, plans)
+        with _lock:
+            module = _codes.setdefault(signature, module)
+            while len(_codes) > MAX_COMPILED:
+                _codes.popitem(last=False)
+
+    namespace = {
+        'model': getattr(getattr(serializer, 'Meta', None), 'model', None),
+        'stock': serializer.to_representation,
+        'Manager': models.Manager, 'SkipField': SkipField, 'PKOnlyObject': PKOnlyObject,
+    }
+    for index, (field, (kind, _)) in enumerate(zip(fields, plans)):
+        if kind == 'method':
+            namespace[f'method_{index}'] = getattr(field.parent, field.method_name)
+        elif kind == 'many':
+            namespace[f'get_{index}'] = field.get_attribute
+            namespace[f'child_{index}'] = compile_serializer(field.child)
+        elif kind == 'nested':
+            namespace[f'get_{index}'] = field.get_attribute
+            namespace[f'child_{index}'] = compile_serializer(field)
+        else:
+            namespace[f'get_{index}'] = field.get_attribute
+            namespace[f'rep_{index}'] = _converter(field)
+    exec(module, namespace)
+    return namespace['serialize']
+
+
+def compiled_enabled():
+    return getattr(settings, 'COMPILED_SERIALIZERS', True)
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer, що серіалізує список скомпільованою функцією дочірнього серіалізатора.
+    Підключається через Meta.list_serializer_class; COMPILED_SERIALIZERS = False повертає звичайний шлях DRF.
+    """
+
+    def to_representation(self, data):
+        if not compiled_enabled():
+            return super().to_representation(data)
+        serialize = compile_serializer(self.child)
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        return [serialize(item) for item in iterable]
@@ -0,0 +1,162 @@
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Після запису читання поточного запиту (і потоку/задачі) йдуть на primary
+_pinned = contextvars.ContextVar('db_pinned_to_primary', default=False)
+_wrote = contextvars.ContextVar('db_wrote_to_primary', default=False)
+_unpinned = contextvars.ContextVar('db_writes_unpinned', default=False)
+
+# app_label службової моделі django.core.cache.backends.db.DatabaseCache
+CACHE_APP_LABEL = 'django_cache'
+
+
+def pin_to_primary():
+    _pinned.set(True)
+    _wrote.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+@contextmanager
+def primary_reads(pinned=True):
+    """
+    Окрема область маршрутизації (наприклад, один HTTP-запит): з pinned=True читання йдуть на primary,
+    з pinned=False — на репліки до першого запису. Після виходу стан попередньої області відновлюється.
+    """
+    pinned_token = _pinned.set(pinned)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned_token)
+        _wrote.reset(wrote_token)
+
+
+@contextmanager
+def no_pin():
+    """
+    Записи всередині (лічильники переглядів, аналітика на GET) не закріплюють клієнта за primary:
+    їх результат він не мусить бачити одразу. Читання всередині йдуть на primary — для read-modify-write.
+    """
+    token = _unpinned.set(True)
+    try:
+        yield
+    finally:
+        _unpinned.reset(token)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def check_replica(alias):
+    """Репліка здорова, якщо до неї є з'єднання і на ній є схема (для SQLite порожній файл створюється сам)"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+
+
+class ReplicaHealth:
+    """
+    Кешує результат перевірки кожної репліки на `interval` секунд, щоб не робити запит на кожне читання.
+    Репліку, що впала, виключають з ротації до наступної перевірки.
+    """
+
+    def __init__(self, check=check_replica, interval=None):
+        self.check = check
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._status = {}
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, 'DATABASE_REPLICA_HEALTH_INTERVAL', 10)
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        status = self._status.get(alias)
+        if status is not None and status[1] > now:
+            return status[0]
+
+        with self._lock:
+            status = self._status.get(alias)
+            if status is not None and status[1] > now:
+                return status[0]
+            try:
+                self.check(alias)
+                healthy = True
+            except DatabaseError:
+                healthy = False
+            self._status[alias] = (healthy, now + self.interval)
+            return healthy
+
+    def mark_failed(self, alias):
+        with self._lock:
+            self._status[alias] = (False, time.monotonic() + self.interval)
+
+    def reset(self):
+        with self._lock:
+            self._status.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    """
+    Записи йдуть на primary (`default`), читання — на випадкову здорову репліку з DATABASE_REPLICAS.
+    На primary лишаються читання, якщо: репліки не налаштовані або всі недоступні; запит закріплено
+    за primary після запису (read-your-writes); триває транзакція на primary.
+    """
+
+    def __init__(self, replicas=None, health=None):
+        self._replicas = replicas
+        self.health = health or replica_health
+
+    @property
+    def replicas(self):
+        return self._replicas if self._replicas is not None else replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        # Таблиця DatabaseCache: версії тегів кешу мають читатися без відставання репліки
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        if _pinned.get() or _unpinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        # Пов'язані об'єкти читаються з тієї ж бази, що й екземпляр
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        healthy = [alias for alias in self.replicas if self.health.is_healthy(alias)]
+        if not healthy:
+            return DEFAULT_DB_ALIAS
+        return random.choice(healthy)
+
+    def db_for_write(self, model, **hints):
+        # Запис у кеш і записи в no_pin() не змінюють даних, які клієнт має одразу побачити
+        if model._meta.app_label != CACHE_APP_LABEL and not _unpinned.get():
+            pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Репліки містять ті самі дані, що й primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплік приходить з реплікацією
+        return db not in self.replicas
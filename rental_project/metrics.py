@@ -0,0 +1,273 @@
+import contextvars
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestStats:
+    """Лічильники одного запиту; оновлюються з потоку view, async ORM і рендерингу"""
+
+    __slots__ = ('queries', 'db_time', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+def current_stats():
+    return _current.get()
+
+
+def track_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def stop_tracking(token):
+    _current.reset(token)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+def install_execute_wrapper(wrapper):
+    """
+    Додає execute-wrapper до кожного з'єднання, зокрема відкритих пізніше в інших потоках.
+    Обгортки читають стан запиту з контекстних змінних, які переходять і в потоки sync_to_async.
+    """
+    def instrument(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(instrument, weak=False, dispatch_uid=f'{wrapper.__module__}.{wrapper.__qualname__}')
+    # З'єднання, відкриті до підключення сигналу (міграції, тестова БД)
+    for connection in connections.all(initialized_only=True):
+        instrument(connection)
+
+
+def instrument_connections():
+    install_execute_wrapper(_timed_execute)
+
+
+class Histogram:
+    """Гістограма Prometheus: кумулятивні кошики, сума й кількість для кожного набору міток"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labels=('route',)):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self.values = {}
+
+    def observe(self, label_values, value):
+        series = self.values.get(label_values)
+        if series is None:
+            # Кошики (не кумулятивні) + sum + count
+            series = self.values.setdefault(label_values, [0] * (len(self.buckets) + 1) + [0.0, 0])
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self, values):
+        for label_values, series in sorted(values.items()):
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                yield f'{self.name}_bucket', {**labels, 'le': _format_bound(bound)}, cumulative
+            yield f'{self.name}_sum', labels, series[-2]
+            yield f'{self.name}_count', labels, series[-1]
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self, values):
+        for label_values, value in sorted(values.items()):
+            yield f'{self.name}_total', dict(zip(self.labels, label_values)), value
+
+
+def _format_bound(bound):
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _merge(target, values):
+    for label_values, series in values.items():
+        if label_values not in target:
+            target[label_values] = series if not isinstance(series, list) else list(series)
+        elif isinstance(series, list):
+            target[label_values] = [left + right for left, right in zip(target[label_values], series)]
+        else:
+            target[label_values] += series
+
+
+class MetricsRegistry:
+    """
+    Метрики процесу. З METRICS_MULTIPROC_DIR кожен воркер періодично скидає свій знімок у файл
+    <pid>.json, а endpoint підсумовує файли всіх воркерів (зокрема завершених — лічильники не спадають).
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self.requests = Counter('http_requests', 'HTTP-запити за маршрутом, методом і статусом',
+                                ('route', 'method', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', 'Повний час обробки запиту', LATENCY_BUCKETS)
+        self.db_time = Histogram('http_request_db_seconds', 'Сумарний час SQL-запитів за запит', LATENCY_BUCKETS)
+        self.db_queries = Histogram('http_request_db_queries', 'Кількість SQL-запитів за запит', QUERY_BUCKETS)
+        self.render_time = Histogram('http_response_render_seconds', 'Рендеринг відповіді DRF у байти',
+                                     LATENCY_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', 'Розмір тіла відповіді', SIZE_BUCKETS)
+        self.cache_events = Counter('cache_events', 'Звернення до кешу: hit_local, hit_shared, miss, refresh, '
+                                    'stale, invalidation', ('cache', 'result'))
+        self.metrics = (self.requests, self.latency, self.db_time, self.db_queries, self.render_time,
+                        self.response_size, self.cache_events)
+
+    def observe(self, route, method, status, duration, stats, size):
+        key = (route,)
+        with self._lock:
+            self.requests.inc((route, method, str(status)))
+            self.latency.observe(key, duration)
+            self.db_time.observe(key, stats.db_time)
+            self.db_queries.observe(key, stats.queries)
+            self.render_time.observe(key, stats.render_time)
+            if size is not None:
+                self.response_size.observe(key, size)
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_cache(self, cache, result):
+        with self._lock:
+            self.cache_events.inc((cache, result))
+
+    def snapshot(self):
+        with self._lock:
+            return {metric.name: {key: list(value) if isinstance(value, list) else value
+                                  for key, value in metric.values.items()}
+                    for metric in self.metrics}
+
+    def flush(self):
+        """Атомарно записує знімок процесу, щоб endpoint ніколи не прочитав наполовину записаний файл"""
+        self._last_flush = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = {name: [[list(key), value] for key, value in values.items()]
+                for name, values in self.snapshot().items()}
+        path = self.directory / f'{os.getpid()}.json'
+        temporary = path.with_name(f'{os.getpid()}.{threading.get_ident()}.tmp')
+        temporary.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Значення всіх процесів (або лише поточного без METRICS_MULTIPROC_DIR)"""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        merged = {metric.name: {} for metric in self.metrics}
+        for path in self.directory.glob('*.json'):
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            for name, rows in data.items():
+                if name in merged:
+                    _merge(merged[name], {tuple(key): value for key, value in rows})
+        return merged
+
+    def render(self):
+        values = self.collect()
+        lines = []
+        for metric in self.metrics:
+            name = metric.name + ('_total' if metric.kind == 'counter' else '')
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for sample, labels, value in metric.samples(values[metric.name]):
+                rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f'{sample}{{{rendered}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(
+    directory=getattr(settings, 'METRICS_MULTIPROC_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0),
+)
+
+
+def server_timing(duration, stats):
+    """Заголовок Server-Timing для вкладки Network у dev tools браузера"""
+    return (
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+        f'render;dur={stats.render_time * 1000:.1f}, '
+        f'app;dur={max(duration - stats.db_time - stats.render_time, 0) * 1000:.1f}, '
+        f'total;dur={duration * 1000:.1f}'
+    )
+
+
+class MetricsAccess(permissions.BasePermission):
+    """Prometheus передає METRICS_TOKEN у заголовку Authorization; адміністратори заходять зі своїм JWT"""
+
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and hmac.compare_digest(header, f'Bearer {token}'):
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    """
+    Метрики в текстовому форматі Prometheus
+    """
+    permission_classes = [MetricsAccess]
+
+    def perform_authentication(self, request):
+        # Лінива автентифікація: токен Prometheus не є JWT і не повинен доходити до ClaimsJWTAuthentication
+        pass
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,296 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .db_router import primary_reads, wrote_to_primary
+from .metrics import current_stats, instrument_connections, registry, server_timing, stop_tracking, track_request
+from .profiling import Profile, get_store, profile_trigger
+from .query_inspection import (
+    QueryBudgetExceeded, inspect_queries, logger as query_logger, report, start_inspection, stop_inspection,
+    view_budget,
+)
+from .traffic import TrafficRecorder, recording_path, request_body, request_principal, sanitize_query
+
+PIN_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReadYourWritesMiddleware:
+    """
+    Після успішного запису клієнт отримує cookie, і протягом DATABASE_READ_YOUR_WRITES_WINDOW секунд
+    його читання йдуть на primary — наприклад, щойно створене бронювання одразу видно у списку,
+    навіть якщо репліка ще не наздогнала primary. Cookie працює з будь-яким воркером, спільний кеш не потрібен.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with primary_reads(self._pinned(request)):
+            response = self.get_response(request)
+            wrote = wrote_to_primary()
+        return self._remember_write(response, wrote)
+
+    async def __acall__(self, request):
+        # Контекстні змінні async ORM повертає з потоку виконання запитів, тому запис тут теж видно
+        with primary_reads(self._pinned(request)):
+            response = await self.get_response(request)
+            wrote = wrote_to_primary()
+        return self._remember_write(response, wrote)
+
+    def _pinned(self, request):
+        return self._recently_wrote(request) or request.method not in SAFE_METHODS
+
+    def _remember_write(self, response, wrote):
+        window = getattr(settings, 'DATABASE_READ_YOUR_WRITES_WINDOW', 5)
+        if wrote and window and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + window)), max_age=window, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def _recently_wrote(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class TrafficRecordingMiddleware:
+    """
+    Записує санітизовані запити (метод, шлях, query, тіло, id користувача, статус, тривалість) у JSONL
+    для подальшого відтворення командою replay_traffic. Паролі й токени маскуються, заголовки, cookie
+    та файли не записуються. Вмикається TRAFFIC_RECORDING; інакше не входить у ланцюжок middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRAFFIC_RECORDING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.recorder = TrafficRecorder(recording_path())
+        self.sample_rate = getattr(settings, 'TRAFFIC_RECORDING_SAMPLE_RATE', 1.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        entry = self._entry(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.recorder.record(self._finish(entry, response, started))
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        entry = self._entry(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        # Дописування у файл не блокує event loop
+        await sync_to_async(self.recorder.record, thread_sensitive=False)(self._finish(entry, response, started))
+        return response
+
+    def _entry(self, request):
+        # Тіло читається до view, поки потік запиту ще не спожито
+        return {
+            'ts': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'query': sanitize_query(request.META.get('QUERY_STRING', '')),
+            'body': request_body(request),
+            'principal': request_principal(request),
+        }
+
+    def _finish(self, entry, response, started):
+        entry['status'] = response.status_code
+        entry['duration_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return entry
+
+
+class MetricsMiddleware:
+    """
+    Гістограми по маршрутах (url_name): повний час, час і кількість SQL-запитів, рендеринг DRF-відповіді,
+    розмір відповіді. Ті самі цифри поточного запиту віддаються в заголовку Server-Timing.
+    Вимикається METRICS_ENABLED = False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument_connections()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = track_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_tracking(token)
+        return self._observe(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token = track_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_tracking(token)
+        return self._observe(request, response, stats, started)
+
+    def process_template_response(self, request, response):
+        # Викликається перед response.render(): DRF-відповідь ще не перетворена на байти
+        stats = current_stats()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _observe(self, request, response, stats, started):
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.route) if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        registry.observe(route, request.method, response.status_code, duration, stats, size)
+        response['Server-Timing'] = server_timing(duration, stats)
+        return response
+
+
+class QueryInspectionMiddleware:
+    """
+    Перевіряє SQL кожного запиту: бюджет view (@query_budget) і повтори однакових за формою SELECT (N+1)
+    з полем серіалізатора та рядком коду, що їх спричинив. QUERY_INSPECTION: 'raise' — виняток
+    (тести), 'log' — попередження в лог для частки QUERY_INSPECTION_SAMPLE_RATE запитів, 'off'.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'QUERY_INSPECTION', 'off')
+        if self.mode not in ('raise', 'log'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = 1.0 if self.mode == 'raise' else getattr(settings, 'QUERY_INSPECTION_SAMPLE_RATE', 1.0)
+        self.threshold = getattr(settings, 'QUERY_INSPECTION_REPEAT_THRESHOLD', 3)
+        start_inspection()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        log, token = inspect_queries()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_inspection(token)
+        return self._check(request, response, log)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        log, token = inspect_queries()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_inspection(token)
+        return self._check(request, response, log)
+
+    def _check(self, request, response, log):
+        problems = report(request, log, view_budget(request), self.threshold)
+        if problems:
+            if self.mode == 'raise':
+                raise QueryBudgetExceeded(problems)
+            query_logger.warning(problems)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профілює окремі запити: на вимогу адміністратора (підписаний токен у X-Profile або ?_profile=) і
+    випадкову частку PROFILING_SAMPLE_RATE. Стеки потоку запиту й SQL-журнал зберігаються у PROFILING_DIR,
+    переглядаються через /api/profiles/.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.interval = getattr(settings, 'PROFILING_INTERVAL', 0.005)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profile = Profile(self.interval)
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = profile.finish()
+        return self._save(request, response, profile, trigger, duration)
+
+    async def __acall__(self, request):
+        trigger = profile_trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+        # Під ASGI семплюється потік event loop; синхронний ORM потрапляє лише в SQL-журнал
+        profile = Profile(self.interval)
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = profile.finish()
+        return await sync_to_async(self._save, thread_sensitive=False)(request, response, profile, trigger, duration)
+
+    def _save(self, request, response, profile, trigger, duration):
+        match = getattr(request, 'resolver_match', None)
+        profile_id = get_store().save({
+            'created_at': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'route': (match.url_name or match.route) if match else 'unresolved',
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'trigger': trigger,
+        }, profile.sampler.folded(), profile.sql)
+        if trigger == 'token':
+            response['X-Profile-Id'] = profile_id
+        return response
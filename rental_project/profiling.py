@@ -0,0 +1,231 @@
+import contextvars
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.http import Http404, HttpResponse
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .metrics import install_execute_wrapper
+
+TOKEN_SALT = 'rental_project.profiling'
+PROFILE_ID = re.compile(r'^\d+-[0-9a-f]{8}$')
+
+
+def profiling_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def make_token(user):
+    """Підписаний токен для заголовка X-Profile або параметра ?_profile= (діє PROFILING_TOKEN_MAX_AGE секунд)"""
+    return signing.dumps({'user': user.pk}, salt=TOKEN_SALT)
+
+
+def check_token(token):
+    try:
+        signing.loads(token, salt=TOKEN_SALT, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def profile_trigger(request):
+    """'token' — профілювання замовив адміністратор, 'sample' — випадкова вибірка, None — не профілювати"""
+    token = request.META.get('HTTP_X_PROFILE') or request.GET.get('_profile')
+    if token and check_token(token):
+        return 'token'
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+    if rate and random.random() < rate:
+        return 'sample'
+    return None
+
+
+@lru_cache(maxsize=8192)
+def _frame_name(code):
+    filename = code.co_filename
+    for prefix in (str(settings.BASE_DIR), *(path for path in sys.path if 'site-packages' in path)):
+        if prefix and filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    # ';' розділяє кадри у folded-форматі
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler:
+    """
+    Семплюючий профайлер одного потоку: кожні `interval` секунд знімає стек через sys._current_frames()
+    і рахує однакові стеки. Результат — folded stacks, які читають flamegraph.pl, speedscope та inferno.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+_sql_log = contextvars.ContextVar('profiled_sql', default=None)
+
+
+def _log_sql(execute, sql, params, many, context):
+    log = _sql_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        # Лише текст із плейсхолдерами: параметри можуть містити персональні дані
+        log.append({'sql': sql, 'ms': round((time.perf_counter() - started) * 1000, 3)})
+
+
+class Profile:
+    """Профіль одного запиту: семпли стеків поточного потоку й SQL-журнал"""
+
+    def __init__(self, interval):
+        install_execute_wrapper(_log_sql)
+        self.sql = []
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.started = time.perf_counter()
+        self._token = _sql_log.set(self.sql)
+        self.sampler.start()
+
+    def finish(self):
+        self.sampler.stop()
+        _sql_log.reset(self._token)
+        return time.perf_counter() - self.started
+
+
+class ProfileStore:
+    """
+    Профілі у файлах <id>.json. Після кожного збереження видаляються профілі, старші за `max_age` секунд,
+    і найстаріші понад `max_profiles`.
+    """
+
+    def __init__(self, directory, max_profiles=200, max_age=7 * 24 * 3600):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self.max_age = max_age
+
+    def save(self, meta, folded, sql):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f'{time.time_ns()}-{secrets.token_hex(4)}'
+        data = {'id': profile_id, **meta, 'samples': sum(int(line.rsplit(' ', 1)[1]) for line in folded.splitlines()),
+                'sql': sql, 'folded': folded}
+        path = self.directory / f'{profile_id}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(temporary, path)
+        self.prune()
+        return profile_id
+
+    def paths(self):
+        # id починається з часу в наносекундах, тож сортування за назвою — хронологічне
+        return sorted(self.directory.glob('*.json'), reverse=True) if self.directory.exists() else []
+
+    def prune(self):
+        cutoff = time.time() - self.max_age
+        for index, path in enumerate(self.paths()):
+            if index >= self.max_profiles or path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+    def get(self, profile_id):
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            return json.loads((self.directory / f'{profile_id}.json').read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+
+    def list(self):
+        entries = []
+        for path in self.paths():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            data.pop('folded')
+            data['sql_queries'] = len(data.pop('sql'))
+            entries.append(data)
+        return entries
+
+
+def get_store():
+    return ProfileStore(
+        profiling_dir(),
+        max_profiles=getattr(settings, 'PROFILING_MAX_PROFILES', 200),
+        max_age=getattr(settings, 'PROFILING_MAX_AGE', 7 * 24 * 3600),
+    )
+
+
+class ProfileListView(APIView):
+    """
+    Збережені профілі запитів (без стеків і SQL)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_store().list())
+
+
+class ProfileTokenView(APIView):
+    """
+    Токен для профілювання окремих запитів: заголовок X-Profile або параметр ?_profile=
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        return Response({
+            'token': make_token(request.user),
+            'expires_in': getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600),
+        })
+
+
+class ProfileDetailView(APIView):
+    """
+    Профіль із SQL-журналом; ?download=folded віддає стеки файлом для flamegraph.pl, speedscope або inferno
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profile_id):
+        profile = get_store().get(profile_id)
+        if profile is None:
+            raise Http404
+        if request.query_params.get('download') == 'folded':
+            response = HttpResponse(profile['folded'], content_type='text/plain; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{profile_id}.folded"'
+            return response
+        return Response(profile)
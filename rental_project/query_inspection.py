@@ -0,0 +1,152 @@
+import contextvars
+import logging
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.serializers import Serializer
+
+from .compiled_serializers import FIELD_LINES
+from .metrics import install_execute_wrapper
+
+logger = logging.getLogger(__name__)
+
+# Кадри інфраструктури, які ніколи не є причиною запиту
+_OWN_FILES = {
+    str(Path(__file__).with_name(name))
+    for name in ('query_inspection.py', 'metrics.py', 'middleware.py', 'compiled_serializers.py')
+}
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r'\s+')
+# Керування транзакціями не рахується в бюджет: кількість BEGIN/SAVEPOINT залежить від бекенду й тестового оточення
+_TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """У режимі raise (тести) перевищення бюджету або N+1 валить запит, а з ним і тест"""
+
+
+def fingerprint(sql):
+    """Форма запиту без значень: однакові запити з різними id або довжиною IN (...) збігаються"""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _LITERALS.sub('?', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _serializer_path(frame):
+    """Ланцюжок полів серіалізаторів від зовнішнього до внутрішнього, напр. ViewHistorySerializer.property_details"""
+    fields = []
+    while frame is not None:
+        if frame.f_code.co_name == 'to_representation':
+            owner, field = frame.f_locals.get('self'), frame.f_locals.get('field')
+            if isinstance(owner, Serializer) and field is not None:
+                fields.append(f'{type(owner).__name__}.{field.field_name}')
+        elif frame.f_code in FIELD_LINES:
+            # Скомпільований серіалізатор: поле визначається за рядком згенерованого коду
+            field = FIELD_LINES[frame.f_code].get(frame.f_lineno)
+            if field:
+                fields.append(field)
+        frame = frame.f_back
+    return ' > '.join(reversed(fields))
+
+
+def _caller(frame):
+    """Найглибший кадр коду проєкту (не бібліотек і не цього модуля)"""
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and filename not in _OWN_FILES and 'site-packages' not in filename:
+            return f'{Path(filename).relative_to(base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'невідомо'
+
+
+class QueryLog:
+    """SQL-запити одного HTTP-запиту з формою, місцем виклику й полем серіалізатора для SELECT"""
+
+    def __init__(self):
+        self.count = 0
+        self.selects = defaultdict(list)
+
+    def add(self, sql, frame):
+        statement = sql.lstrip()[:9].upper()
+        if statement.startswith(_TRANSACTION_CONTROL):
+            return
+        self.count += 1
+        if statement.startswith('SELECT'):
+            self.selects[fingerprint(sql)].append((_serializer_path(frame), _caller(frame)))
+
+    def repeated(self, threshold):
+        """Форми, що повторилися щонайменше threshold разів, — найчастіші першими"""
+        findings = [
+            (shape, len(calls), Counter(calls).most_common(1)[0][0])
+            for shape, calls in self.selects.items() if len(calls) >= threshold
+        ]
+        return sorted(findings, key=lambda finding: -finding[1])
+
+
+_current = contextvars.ContextVar('query_log', default=None)
+
+
+def _inspect_execute(execute, sql, params, many, context):
+    log = _current.get()
+    if log is not None:
+        log.add(sql, sys._getframe(1))
+    return execute(sql, params, many, context)
+
+
+def start_inspection():
+    install_execute_wrapper(_inspect_execute)
+
+
+def inspect_queries():
+    log = QueryLog()
+    return log, _current.set(log)
+
+
+def stop_inspection(token):
+    _current.reset(token)
+
+
+def query_budget(max_queries):
+    """
+    Оголошує бюджет SQL-запитів для view: число або словник {дія viewset'а: число}.
+
+        @query_budget(4)
+        class PropertyListView(generics.ListAPIView): ...
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def view_budget(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None) or match.func
+    budget = getattr(view, 'query_budget', None)
+    if isinstance(budget, dict):
+        # Для viewset бюджет задається на дію: list, retrieve, confirm...
+        actions = getattr(match.func, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
+
+
+def report(request, log, budget, threshold):
+    """Текст порушень або None, якщо бюджет дотримано й повторів немає"""
+    problems = []
+    if budget is not None and log.count > budget:
+        problems.append(f'{log.count} SQL-запитів при бюджеті {budget}')
+    for shape, count, (field, caller) in log.repeated(threshold):
+        source = f'{field} — {caller}' if field else caller
+        problems.append(f'N+1: {count}× {shape[:200]}\n    {source}')
+    if not problems:
+        return None
+    match = getattr(request, 'resolver_match', None)
+    route = (match.url_name or match.route) if match else request.path
+    return f'{request.method} {route}: ' + '\n  '.join(problems)
@@ -0,0 +1,56 @@
+from io import BytesIO
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Необов'язкова залежність: без неї працюють стандартні JSONRenderer/JSONParser DRF
+    orjson = None
+
+# Дати й час — ISO 8601 з 'Z' для UTC, як у JSONEncoder DRF; int-ключі словників — як у json
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Decimal → float, лінивий переклад → str, QuerySet → список тощо — так само, як у JSONRenderer
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson з тим самим компактним UTF-8 виводом. Відступи (?indent / Accept: ...; indent=4),
+    ensure_ascii і дані, яких orjson не приймає (цілі понад 64 біти), віддаються стандартному рендереру.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendered = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Як і JSONRenderer, екрануємо роздільники рядків, які ламають вбудовування JSON у JavaScript
+        return rendered.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser на orjson. Тіло не в UTF-8 і невалідний JSON розбирає стандартний парсер — з тими самими
+    повідомленнями про помилки. Цілі понад 64 біти orjson повертає як float.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer
+from drf_spectacular.views import SpectacularAPIView
+
+logger = logging.getLogger(__name__)
+
+_ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+@dataclass(frozen=True)
+class RenderedSchema:
+    content_type: str
+    content: bytes
+    gzipped: bytes
+    etag: str
+
+
+def render_schema_file(schema):
+    """Схема у форматі файлу build_openapi_schema: JSON, з якого її можна відрендерити в будь-який формат"""
+    return OpenApiJsonRenderer().render(schema)
+
+
+class SchemaCache:
+    """
+    OpenAPI-схема в пам'яті процесу: згенерована один раз на мову (або прочитана з файлу SCHEMA_FILE,
+    який пише build_openapi_schema під час деплою) і відрендерена один раз на формат — разом із gzip-версією
+    й ETag за вмістом
+    """
+
+    def __init__(self):
+        self._schemas = {}
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def schema(self, lang, generate):
+        schema = self._schemas.get(lang)
+        if schema is None:
+            with self._lock:
+                schema = self._schemas.get(lang)
+                if schema is None:
+                    schema = self._schemas[lang] = self._load(lang) or generate()
+        return schema
+
+    def rendered(self, lang, renderer, indent, generate):
+        key = (lang, type(renderer), indent)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            content = renderer.render(self.schema(lang, generate), renderer.media_type, {'indent': indent})
+            media_type = renderer.media_type
+            rendered = RenderedSchema(
+                content_type=f'{media_type}; charset={renderer.charset}' if renderer.charset else media_type,
+                content=content,
+                gzipped=gzip.compress(content, compresslevel=9, mtime=0),
+                etag=hashlib.sha256(content).hexdigest()[:32],
+            )
+            with self._lock:
+                rendered = self._rendered.setdefault(key, rendered)
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+            self._rendered.clear()
+
+    def _load(self, lang):
+        path = getattr(settings, 'SCHEMA_FILE', None)
+        if not path or lang != translation.get_supported_language_variant(settings.LANGUAGE_CODE):
+            return None
+        try:
+            with open(path, 'rb') as schema_file:
+                return json.load(schema_file)
+        except (OSError, ValueError):
+            logger.warning('Файл схеми %s недоступний, схема генерується заново', path, exc_info=True)
+            return None
+
+
+schema_cache = SchemaCache()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView, що віддає схему з SchemaCache: без повторної інтроспекції view і серіалізаторів,
+    з ETag (304 на If-None-Match) і gzip, якщо клієнт його приймає. Запити з ?version= і мовами,
+    яких немає в LANGUAGES, генеруються як раніше.
+    """
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        try:
+            lang = translation.get_supported_language_variant(translation.get_language())
+        except LookupError:
+            lang = None
+        if version or lang is None or self.custom_settings or self.urlconf or self.patterns:
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        indent = renderer.get_indent(request.accepted_media_type, {}) if hasattr(renderer, 'get_indent') else None
+        rendered = schema_cache.rendered(
+            lang, renderer, indent, lambda: super(CachedSpectacularAPIView, self)._get_schema_response(request).data
+        )
+
+        gzipped = bool(_ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        # Стиснене й нестиснене подання — різні байти, тож і різні сильні ETag
+        etag = f'"{rendered.etag}-gzip"' if gzipped else f'"{rendered.etag}"'
+        response = HttpResponse(rendered.gzipped if gzipped else rendered.content, content_type=rendered.content_type)
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'public, no-cache'
+        response.headers['Content-Disposition'] = f'inline; filename="{self._get_filename(request, version)}"'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return get_conditional_response(request, etag=etag, response=response) or response
@@ -31,6 +31,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'rental_project.middleware.MetricsMiddleware',
+    'rental_project.middleware.QueryInspectionMiddleware',
+    'rental_project.middleware.ProfilingMiddleware',
+    'rental_project.middleware.TrafficRecordingMiddleware',
+    'rental_project.middleware.ReadYourWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,6 +48,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'rental_project.urls'
 
+# Async-версії read-heavy view; вмикаються ASGI-точкою входу (rental_project/asgi.py)
+ASYNC_VIEWS = bool(os.environ.get('RENTAL_ASYNC_VIEWS'))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -69,6 +77,62 @@ DATABASES = {
     }
 }
 
+# Профіль для навантажених SQLite-розгортань (WAL, прагми, черга записів у процесі) вмикається явно;
+# прагми можна перевизначити ключем 'PRAGMAS' у налаштуваннях бази
+if os.environ.get('SQLITE_CONCURRENT'):
+    DATABASES['default']['ENGINE'] = 'rental_project.sqlite_backend'
+
+# Локальна перевірка реплікації з двома SQLite-файлами: репліка — копія primary
+# (sqlite3 db.sqlite3 ".backup db_replica.sqlite3"), що оновлюється вручну і тому "відстає"
+if os.environ.get('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SQLITE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# default — локальний кеш процесу; shared — спільний для воркерів одного хоста рівень TieredCache
+# (rental_project/cache.py). Файловий бекенд не додає SQL-запитів до запитів API; для кількох хостів
+# достатньо замінити його на django.core.cache.backends.redis.RedisCache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+# LOCAL_* — in-process LRU (TTL обмежує відставання інших воркерів після інвалідації), TTL — час життя
+# записів за замовчуванням, EARLY_REFRESH_BETA — агресивність раннього оновлення (XFetch)
+TIERED_CACHE = {
+    'BACKEND': 'shared',
+    'LOCAL_SIZE': 2000,
+    'LOCAL_TTL': 5,
+    'TTL': 300,
+    'EARLY_REFRESH_BETA': 1.0,
+}
+# Знімок довідника типів житла в пам'яті процесу (properties/reference_data.py): версія — у спільному кеші,
+# воркер звіряє її не частіше ніж раз на CHECK_INTERVAL секунд, тож бачить чужі зміни не пізніше
+REFERENCE_DATA = {
+    'BACKEND': 'shared',
+    'CHECK_INTERVAL': 2,
+}
+
+# Записи йдуть на primary (default), читання — на здорові репліки
+DATABASE_ROUTERS = ['rental_project.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Скільки секунд після запису читання клієнта йдуть на primary
+DATABASE_READ_YOUR_WRITES_WINDOW = 5
+# Як часто перевіряти доступність реплік; недоступна репліка виключається до наступної перевірки
+DATABASE_REPLICA_HEALTH_INTERVAL = 10
+
+# Запис санітизованих запитів для відтворення командою replay_traffic
+TRAFFIC_RECORDING = bool(os.environ.get('TRAFFIC_RECORDING'))
+TRAFFIC_RECORDING_PATH = BASE_DIR / 'traffic' / 'recorded.jsonl'
+TRAFFIC_RECORDING_SAMPLE_RATE = 1.0
+
 # Валідація паролів
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -85,6 +149,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = [
+    'users.backends.PooledModelBackend',
+]
+
+# Пул для хешування паролів: кількість потоків, ліміт черги і таймаут очікування, с (після обох — 503).
+# PBKDF2 займає ~0.4 с, тож черга з 16 задач на 2 потоки розбирається за ~3 с — у межах таймауту
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_MAX_PENDING = 16
+PASSWORD_HASHING_TIMEOUT = 5
+
 # Міжнародні налаштування
 LANGUAGE_CODE = 'ru-ru'
 TIME_ZONE = 'Europe/Berlin'
@@ -97,15 +171,44 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Фонова обробка завантажених зображень (properties/image_pipeline.py): WORKERS процесів Pillow
+# (0 — у потоці, без окремих процесів), повтори із затримкою RETRY_DELAY·2ⁿ с, варіанти — рамки (ширина, висота).
+# WEBP_METHOD — компроміс libwebp між часом і розміром (0–6): 2 утричі швидший за 4 при файлах на ~7% більших.
+# RENTAL_IMAGE_PIPELINE=0 вимикає обробку після завантаження: тоді її запускає команда process_property_images
+PROPERTY_IMAGE_PIPELINE = {
+    'ENABLED': os.environ.get('RENTAL_IMAGE_PIPELINE', '1') != '0',
+    'WORKERS': min(os.cpu_count() or 1, 4),
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 5,
+    'VARIANTS': {'thumbnail': (320, 320), 'card': (800, 800), 'full': (1920, 1920)},
+    'JPEG_QUALITY': 82,
+    'WEBP_QUALITY': 80,
+    'WEBP_METHOD': 4,
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Зберігання аналітики: сирі рядки старші за вікно архівуються командою apply_retention
+ANALYTICS_RETENTION = {
+    'SearchHistory': {'days': 30},
+    'ViewHistory': {'days': 180},
+}
+ANALYTICS_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')
+
 # Користувацька модель
 AUTH_USER_MODEL = 'users.User'
 
+# JSON через orjson (rental_project/renderers.py): RENTAL_FAST_JSON=0 повертає стандартні рендерер і парсер DRF.
+# Без встановленого orjson швидкі класи самі працюють як стандартні
+FAST_JSON = os.environ.get('RENTAL_FAST_JSON', '1') != '0'
+
+# Списки серіалізуються згенерованими під набір полів функціями (rental_project/compiled_serializers.py)
+COMPILED_SERIALIZERS = os.environ.get('RENTAL_COMPILED_SERIALIZERS', '1') != '0'
+
 # Налаштування DRF
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -117,6 +220,15 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_RENDERER_CLASSES': [
+        'rental_project.renderers.ORJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rental_project.renderers.ORJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -127,9 +239,48 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Розмір LRU-кешу перевірених access-токенів (на процес)
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+# Дедуплікація оновлення access-токенів: час життя результату, с, та спільний кеш між воркерами
+# (аліас із CACHES; default — LocMem окремого процесу, тож між воркерами не працює)
+JWT_REFRESH_DEDUP_TTL = 30
+JWT_REFRESH_SHARED_CACHE = False
+JWT_REFRESH_CACHE_ALIAS = 'shared'
+
+# Як часто воркери підтягують нові відкликані токени у фільтр Блума, с
+JWT_REVOCATION_SYNC_INTERVAL = 5
+
+
+# Метрики по маршрутах (/api/metrics/). Під gunicorn з кількома воркерами задайте спільний каталог
+# METRICS_MULTIPROC_DIR і очищайте його при перезапуску; METRICS_TOKEN — Bearer-токен для Prometheus
+METRICS_ENABLED = True
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Бюджети SQL-запитів і пошук N+1: у розробці — попередження в лог, у продакшні — попередження
+# для вибірки запитів; у тестах (settings_test.py) порушення валить тест
+QUERY_INSPECTION = os.environ.get('QUERY_INSPECTION', 'log')
+QUERY_INSPECTION_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+QUERY_INSPECTION_REPEAT_THRESHOLD = 3
+
+# Профілювання запитів на вимогу (токен з POST /api/profiles/token/) і випадкова вибірка
+PROFILING_ENABLED = True
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL = 0.005
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_PROFILES = 200
+PROFILING_MAX_AGE = 7 * 24 * 3600
+
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Готова OpenAPI-схема (python manage.py build_openapi_schema --file ... під час деплою). Без файлу схема
+# генерується під час першого запиту до /api/schema/ і далі віддається з пам'яті процесу
+SCHEMA_FILE = os.environ.get('RENTAL_SCHEMA_FILE')
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Rental API',
     'DESCRIPTION': 'Документація для API сервісу оренди житла',
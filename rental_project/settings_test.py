@@ -0,0 +1,20 @@
+"""
+Налаштування для тестів: manage.py test підставляє їх, якщо DJANGO_SETTINGS_MODULE не задано;
+інші запускачі — --settings=rental_project.settings_test
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, PROPERTY_IMAGE_PIPELINE
+
+# Тести не повинні бачити кеш попередніх прогонів
+CACHES = {
+    **CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+}
+
+# Зображення обробляються в потоці-диспетчері, без пулу процесів
+PROPERTY_IMAGE_PIPELINE = {**PROPERTY_IMAGE_PIPELINE, 'WORKERS': 0}
+
+# Перевищення бюджету запитів чи N+1 валить тест
+QUERY_INSPECTION = os.environ.get('QUERY_INSPECTION', 'raise')
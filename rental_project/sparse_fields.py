@@ -0,0 +1,268 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        FIELDS_PARAM, OpenApiTypes.STR,
+        description='Поля відповіді через кому; вкладені — через крапку, напр. id,title,location.city,images.image',
+    ),
+    OpenApiParameter(
+        EXPAND_PARAM, OpenApiTypes.STR,
+        description='Які вкладені об\'єкти розгортати (через кому, вкладені — через крапку). '
+                    'Без параметра розгортаються всі, порожнє значення — жоден',
+    ),
+]
+
+
+def parse_selection(value):
+    """
+    'id,title,location.city' → {'id': None, 'title': None, 'location': {'city': None}}.
+    None на місці піддерева — усі поля; None замість усього дерева — параметр не передано.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for item in value.split(','):
+        *parents, name = [part.strip() for part in item.split('.')]
+        if not name or not all(parents):
+            continue
+        node = tree
+        for part in parents:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[name] = None
+    return tree
+
+
+def selection(field):
+    """
+    Вибрані поля й розгорнуті зв'язки для (вкладеного) серіалізатора або поля: шлях від кореня береться
+    з ланцюжка parent/field_name, параметри — з request у контексті кореня
+    """
+    path, root = [], field
+    while root.parent is not None:
+        if root.field_name:
+            path.append(root.field_name)
+        root = root.parent
+    selected = root.__dict__.get('_sparse_selection')
+    if selected is None:
+        request = root.context.get('request')
+        params = request.query_params if request is not None else {}
+        selected = root._sparse_selection = (
+            parse_selection(params.get(FIELDS_PARAM)), parse_selection(params.get(EXPAND_PARAM))
+        )
+    fields, expand = selected
+    for name in reversed(path):
+        fields = None if fields is None else fields.get(name)
+        expand = None if expand is None else expand.get(name, {})
+    return fields, expand
+
+
+class SparseFieldsMixin:
+    """
+    Міксин ModelSerializer для ?fields= і ?expand=. Невибрані поля не серіалізуються (запис і валідацію
+    це не зачіпає). Поля з Meta.expandable_fields — важкі вкладені об'єкти: вони потрапляють у відповідь,
+    якщо названі у fields чи expand або якщо жоден із параметрів їх не обмежує.
+    Meta.sparse_dependencies — лукапи, які читають поля поза моделлю (SerializerMethodField тощо), для only().
+    """
+
+    @property
+    def _readable_fields(self):
+        readable = self.__dict__.get('_sparse_readable')
+        if readable is None:
+            readable = self._sparse_readable = list(self._select_fields())
+        return iter(readable)
+
+    def _select_fields(self):
+        fields, expand = selection(self)
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for field in super()._readable_fields:
+            name = field.field_name
+            if fields is not None and name in fields:
+                yield field
+            elif name in expandable and expand is not None:
+                if name in expand:
+                    yield field
+            elif fields is None:
+                yield field
+
+
+def _readable_names(serializer):
+    return [name for name, field in serializer.fields.items() if not field.write_only]
+
+
+def _selection_errors(serializer, tree, prefix=''):
+    readable = _readable_names(serializer)
+    unknown = [name for name in tree if name not in readable]
+    if unknown:
+        where = f' в {prefix[:-1]}' if prefix else ''
+        yield f'Неизвестные поля{where}: {", ".join(unknown)}. Допустимые поля: {", ".join(readable)}'
+    for name, subtree in tree.items():
+        if subtree is None or name in unknown:
+            continue
+        field = serializer.fields[name]
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, SparseFieldsMixin):
+            yield from _selection_errors(nested, subtree, f'{prefix}{name}.')
+        elif not getattr(nested, 'sparse_subfields', False):
+            # Вкладений серіалізатор без міксина віддав би всі свої поля попри вибір
+            yield f'Поле {prefix}{name} не поддерживает выбор вложенных полей'
+
+
+def validate_selection(serializer):
+    """
+    Перевіряє ?fields= кореневого серіалізатора: порожній вибір, невідомі поля та вкладені шляхи,
+    які не можна застосувати, дають 400 з переліком допустимих полів замість порожніх об'єктів у відповіді.
+    Поле, що саме звужує своє значення за selection(), позначається атрибутом sparse_subfields = True.
+    """
+    fields, _ = selection(serializer)
+    if fields is None:
+        return
+    if not fields:
+        raise ValidationError({FIELDS_PARAM: [
+            f'Не выбрано ни одного поля. Допустимые поля: {", ".join(_readable_names(serializer))}'
+        ]})
+    errors = list(_selection_errors(serializer, fields))
+    if errors:
+        raise ValidationError({FIELDS_PARAM: errors})
+
+
+def _requirements(serializer, model, prefix, columns, relations):
+    """
+    Збирає лукапи колонок і зв'язків, які прочитає серіалізатор. Повертає False, якщо якесь поле
+    читає невідомо що (тоді only() не застосовується, але зайві зв'язки все одно відкидаються).
+    """
+    known = True
+    dependencies = getattr(getattr(serializer, 'Meta', None), 'sparse_dependencies', {})
+    for field in serializer._readable_fields:
+        if field.field_name in dependencies:
+            for lookup in dependencies[field.field_name]:
+                *path, _ = lookup.split('__')
+                relations.update(prefix + '__'.join(path[:depth]) for depth in range(1, len(path) + 1))
+                if columns is not None:
+                    columns.add(prefix + lookup)
+            continue
+        if field.source == '*':
+            known = False
+            continue
+
+        current, path = model, []
+        for position, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                known = False
+                break
+            path.append(attr)
+            lookup = prefix + '__'.join(path)
+            last = position == len(field.source_attrs) - 1
+            if not model_field.is_relation:
+                if not last:
+                    # Атрибут значення поля (напр. file.url) — що саме читається, невідомо
+                    known = False
+                elif columns is not None:
+                    columns.add(lookup)
+                break
+            if not last:
+                relations.add(lookup)
+                current = model_field.related_model
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                # Набір об'єктів довантажує prefetch: у only() батька потрібен лише pk
+                relations.add(lookup)
+                _requirements(field.child, model_field.related_model, lookup + '__', None, relations)
+            elif isinstance(field, serializers.BaseSerializer):
+                relations.add(lookup)
+                known &= _requirements(field, model_field.related_model, lookup + '__', columns, relations)
+            elif model_field.concrete:
+                # PrimaryKeyRelatedField, ReferenceField тощо: достатньо FK
+                if columns is not None:
+                    columns.add(lookup)
+            else:
+                known = False
+    return known
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        yield prefix + name
+        yield from _select_related_paths(subtree, f'{prefix}{name}__')
+
+
+def _only_lookup(model, lookup, selected):
+    """
+    Лукап для only(), що забезпечує читання lookup: колонки моделей із select_related — як є,
+    через інші зв'язки — лише FK на них (сам зв'язок довантажиться окремим запитом, як і без only())
+    """
+    parts = lookup.split('__')
+    for position, part in enumerate(parts):
+        model_field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        path = '__'.join(parts[:position] + [model_field.name])
+        if not model_field.is_relation:
+            return path
+        if path in selected and position < len(parts) - 1:
+            model = model_field.related_model
+            continue
+        if model_field.concrete:
+            return path
+        # Зворотний зв'язок читається prefetch'ем за pk моделі
+        return '__'.join(parts[:position] + [model._meta.pk.name])
+    return None
+
+
+def sparse_queryset(view, queryset, always=()):
+    """
+    Підлаштовує запит view під ?fields= / ?expand=: відкидає select_related і prefetch_related зв'язків,
+    які серіалізатор не читатиме, і завантажує лише потрібні колонки через only().
+    always — поля, які view читає сам (напр. лічильник переглядів). Без параметрів запит не змінюється,
+    некоректний ?fields= дає 400 (validate_selection).
+    """
+    request = getattr(view, 'request', None)
+    if request is None or request.method not in SAFE_METHODS or not (
+            FIELDS_PARAM in request.query_params or EXPAND_PARAM in request.query_params):
+        return queryset
+    serializer = view.get_serializer()
+    if not isinstance(serializer, SparseFieldsMixin):
+        return queryset
+    validate_selection(serializer)
+
+    columns, relations = set(always), set()
+    known = _requirements(serializer, queryset.model, '', columns, relations)
+
+    selected = queryset.query.select_related
+    if selected is True:
+        # select_related() без аргументів: набір JOIN'ів визначає Django, колонки не обмежуємо
+        known = False
+    elif selected:
+        kept = {path for path in _select_related_paths(selected) if path in relations}
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+        selected = kept
+    else:
+        selected = set()
+
+    lookups = queryset._prefetch_related_lookups
+    prefetches = [
+        lookup for lookup in lookups
+        if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup) in relations
+    ]
+    if len(prefetches) != len(lookups):
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+
+    if not known:
+        return queryset
+    # Моделі з select_related мають лишитися в SELECT хоча б своїм pk, інакше Django не дозволить JOIN
+    lookups = columns | relations | {f'{path}__pk' for path in selected}
+    only = {_only_lookup(queryset.model, lookup, selected) for lookup in lookups} - {None}
+    return queryset.only(*only or [queryset.model._meta.pk.name])
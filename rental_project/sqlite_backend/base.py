@@ -0,0 +1,99 @@
+import threading
+
+from django.db.backends.sqlite3 import base
+
+# Прагми для конкурентного доступу: WAL дозволяє читачам не чекати на записувача,
+# synchronous=NORMAL у режимі WAL синхронізує диск лише на контрольних точках
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLAC')
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    """Один замок запису на файл бази в межах процесу"""
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.RLock())
+
+
+class SerializedWriteCursorWrapper(base.SQLiteCursorWrapper):
+    """Окремі записи поза транзакцією теж чекають своєї черги на замку, а не в busy_timeout SQLite"""
+
+    def execute(self, query, params=None):
+        if self.database.in_atomic_block or not query.lstrip()[:6].upper().startswith(WRITE_STATEMENTS):
+            return super().execute(query, params)
+        with self.database.write_lock:
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        if self.database.in_atomic_block or not query.lstrip()[:6].upper().startswith(WRITE_STATEMENTS):
+            return super().executemany(query, param_list)
+        with self.database.write_lock:
+            return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite для навантажених розгортань: прагми з PRAGMAS застосовуються до кожного нового з'єднання,
+    а транзакції запису в межах процесу виконуються по черзі. Потоки чекають на замку в порядку черги
+    замість того, щоб конкурувати за блокування файлу через busy_timeout; читачі замок не беруть.
+    Транзакція починається з BEGIN IMMEDIATE, тому блокування запису береться одразу і
+    не буває взаємоблокувань при переході від читання до запису між процесами.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_lock = write_lock(self.settings_dict['NAME'])
+        self._holds_write_lock = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SerializedWriteCursorWrapper)
+        cursor.database = self
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.write_lock.acquire()
+        self._holds_write_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self.write_lock.release()
+
+    def _commit(self):
+        # Якщо COMMIT не вдався, замок звільнить наступний ROLLBACK
+        result = super()._commit()
+        self._release_write_lock()
+        return result
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
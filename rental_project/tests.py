@@ -0,0 +1,488 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import redirect_stderr
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connections, transaction
+from django.db.utils import load_backend
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from analytics.models import SearchHistory
+from bookings.models import Booking
+from bookings.views import BookingViewSet
+from properties.models import Location, Property, PropertyType
+from properties.reference_data import reference_data
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+from .async_views import wait_for_side_effects
+from .db_router import PrimaryReplicaRouter, ReplicaHealth, primary_reads, replica_health
+from .metrics import MetricsRegistry, RequestStats
+from .middleware import PIN_COOKIE
+from .profiling import ProfileStore
+from .renderers import ORJSONParser, ORJSONRenderer
+from .schema import schema_cache
+from .traffic import sanitize
+
+
+class HealthyReplicas:
+    def __init__(self, *down):
+        self.down = set(down)
+
+    def is_healthy(self, alias):
+        return alias not in self.down
+
+
+# TestCase загортає кожен тест у транзакцію, а в транзакції маршрутизатор завжди читає з primary
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    def test_reads_go_to_healthy_replicas(self):
+        router = PrimaryReplicaRouter(replicas=['replica1', 'replica2'], health=HealthyReplicas('replica1'))
+        with primary_reads(pinned=False):
+            self.assertEqual(router.db_for_read(Booking), 'replica2')
+            # Транзакція на primary бачить власні незафіксовані зміни лише на primary
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Booking), 'default')
+
+            self.assertEqual(router.db_for_write(Booking), 'default')
+            self.assertEqual(router.db_for_read(Booking), 'default')
+
+        router = PrimaryReplicaRouter(replicas=['replica1'], health=HealthyReplicas('replica1'))
+        with primary_reads(pinned=False):
+            self.assertEqual(router.db_for_read(Booking), 'default')
+        self.assertFalse(router.allow_migrate('replica1', 'bookings'))
+
+    def test_unhealthy_replica_is_excluded_until_next_check(self):
+        checks = []
+
+        def check(alias):
+            checks.append(alias)
+            if len(checks) == 1:
+                raise OperationalError('replica is down')
+
+        health = ReplicaHealth(check=check, interval=60)
+        self.assertFalse(health.is_healthy('replica'))
+        self.assertFalse(health.is_healthy('replica'))
+        self.assertEqual(len(checks), 1)
+
+        health.reset()
+        self.assertTrue(health.is_healthy('replica'))
+        health.mark_failed('replica')
+        self.assertFalse(health.is_healthy('replica'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadYourWritesTests(TransactionTestCase):
+    def setUp(self):
+        landlord = User.objects.create_user(
+            username='landlord', email='landlord@example.com', password='pass12345', user_type='landlord'
+        )
+        self.tenant = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass12345', user_type='tenant'
+        )
+        self.property = Property.objects.create(
+            owner=landlord, title='Flat', description='-', property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'), price=100, rooms=1, area=30,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.tenant)
+
+        # Репліки в тестах немає: "читання з репліки" перенаправляються на default і підраховуються
+        patcher = mock.patch.object(replica_health, 'is_healthy', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('rental_project.db_router.random.choice', return_value='default')
+        self.replica_reads = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_booking_is_read_from_primary_right_after_creation(self):
+        check_in = timezone.localdate() + timedelta(days=10)
+        response = self.client.post('/api/bookings/bookings/', {
+            'property': self.property.pk, 'check_in_date': check_in,
+            'check_out_date': check_in + timedelta(days=2), 'guests_count': 1,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.replica_reads.reset_mock()
+
+        response = self.client.get('/api/bookings/bookings/')
+        self.assertEqual(len(response.data['results']), 1)
+        self.replica_reads.assert_not_called()
+
+        # Після закінчення вікна читання повертаються на репліку
+        self.client.cookies.pop(PIN_COOKIE)
+        response = self.client.get('/api/bookings/bookings/')
+        self.assertTrue(self.replica_reads.called)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_analytics_writes_on_reads_do_not_pin(self):
+        response = self.client.get(reverse('property-detail', args=[self.property.pk]))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('property-list'), {'search': 'flat'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+
+        wait_for_side_effects(timeout=5)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.views_count, 1)
+        self.assertEqual(SearchHistory.objects.count(), 1)
+
+
+class ConcurrentSQLiteBackendTests(SimpleTestCase):
+    def test_pragmas_and_serialized_write_transactions(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        engine = 'rental_project.sqlite_backend'
+        settings_dict = connections.configure_settings({
+            'default': {'ENGINE': engine, 'NAME': Path(directory.name) / 'db.sqlite3', 'PRAGMAS': {'cache_size': -1024}},
+        })['default']
+        database = load_backend(engine).DatabaseWrapper(settings_dict, alias='concurrent')
+        self.addCleanup(database.close)
+
+        with database.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+            cursor.execute('CREATE TABLE counter (value INTEGER)')
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'cache_size': -1024})
+
+        def lock_is_free():
+            result = []
+
+            def try_acquire():
+                result.append(database.write_lock.acquire(blocking=False))
+                if result[0]:
+                    database.write_lock.release()
+
+            thread = threading.Thread(target=try_acquire)
+            thread.start()
+            thread.join()
+            return result[0]
+
+        # Транзакція запису тримає замок процесу від BEGIN IMMEDIATE до COMMIT/ROLLBACK
+        database._start_transaction_under_autocommit()
+        database.cursor().execute('INSERT INTO counter VALUES (1)')
+        self.assertFalse(lock_is_free())
+        database.commit()
+        self.assertTrue(lock_is_free())
+
+        database._start_transaction_under_autocommit()
+        database.rollback()
+        self.assertTrue(lock_is_free())
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_INTERVAL=0.001)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass12345', is_staff=True
+        )
+        self.landlord = User.objects.create_user(
+            username='landlord', email='landlord@example.com', password='pass12345', user_type='landlord'
+        )
+        tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='pass12345')
+        flat = Property.objects.create(
+            owner=self.landlord, title='Flat', description='-', property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'), price=100, rooms=1, area=30,
+        )
+        check_in = timezone.localdate() + timedelta(days=5)
+        Booking.objects.create(property=flat, tenant=tenant, check_in_date=check_in,
+                               check_out_date=check_in + timedelta(days=2), total_price=200)
+
+        admin_client = APIClient()
+        admin_client.force_authenticate(self.admin)
+        self.admin_client = admin_client
+        self.token = admin_client.post('/api/profiles/token/').data['token']
+
+    def slow_list(self):
+        # Запит має тривати кілька інтервалів семплювання, інакше стеків може не бути
+        original = BookingViewSet.get_queryset
+
+        def get_queryset(view):
+            time.sleep(0.03)
+            return original(view)
+        return mock.patch.object(BookingViewSet, 'get_queryset', get_queryset)
+
+    def test_requests_are_not_profiled_without_token(self):
+        client = APIClient()
+        client.force_authenticate(self.landlord)
+        client.get('/api/bookings/bookings/', HTTP_X_PROFILE='forged')
+        self.assertEqual(list(self.directory.glob('*.json')), [])
+
+    def test_token_profiles_request_and_admin_downloads_flamegraph(self):
+        client = APIClient()
+        client.force_authenticate(self.landlord)
+        with self.slow_list():
+            response = client.get('/api/bookings/bookings/', HTTP_X_PROFILE=self.token)
+        profile_id = response['X-Profile-Id']
+
+        listing = self.admin_client.get('/api/profiles/').data
+        self.assertEqual([entry['id'] for entry in listing], [profile_id])
+        self.assertEqual((listing[0]['route'], listing[0]['trigger']), ('booking-list', 'token'))
+
+        detail = self.admin_client.get(f'/api/profiles/{profile_id}/').data
+        self.assertTrue(any('bookings_booking' in entry['sql'] for entry in detail['sql']))
+
+        folded = self.admin_client.get(f'/api/profiles/{profile_id}/', {'download': 'folded'})
+        self.assertIn('attachment', folded['Content-Disposition'])
+        lines = folded.content.decode().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r'^[^ ].* \d+$')
+        self.assertTrue(any(re.search(r'list \(bookings/views\.py:\d+\)', line) for line in lines))
+
+        self.assertEqual(client.get('/api/profiles/').status_code, 403)
+
+    def test_store_retention(self):
+        store = ProfileStore(self.directory, max_profiles=2)
+        ids = [store.save({'route': 'booking-list'}, 'main 1\n', []) for _ in range(3)]
+        self.assertEqual([entry['id'] for entry in store.list()], ids[:0:-1])
+        self.assertIsNone(store.get('../secrets'))
+
+
+class FastJSONTests(TestCase):
+    payload = {
+        'total_price': Decimal('1234.50'),
+        'check_in_date': date(2024, 5, 1),
+        'created_at': datetime(2024, 5, 1, 12, 30, 0, 250000, tzinfo=dt_timezone.utc),
+        'updated_at': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=3))),
+        'status': gettext_lazy('Активно'),
+        'detail': ErrorDetail('Ошибка', code='invalid'),
+        'notes': 'рядок\u2028з роздільником',
+        'counts': {1: 2},
+        'nested': [(1, 2.5, None, True)],
+    }
+
+    def test_renders_same_bytes_as_stock_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+        # Запит із відступами обслуговує стандартний рендерер
+        indented = ORJSONRenderer().render(self.payload, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(self.payload, 'application/json; indent=2'))
+
+    def test_parses_like_stock_parser(self):
+        body = JSONRenderer().render(self.payload)
+        context = {'encoding': 'utf-8'}
+        self.assertEqual(ORJSONParser().parse(BytesIO(body), parser_context=context),
+                         JSONParser().parse(BytesIO(body), parser_context=context))
+
+        for invalid in (b'{"price": NaN}', b'{"price": '):
+            errors = []
+            for parser in (ORJSONParser(), JSONParser()):
+                with self.assertRaises(ParseError) as raised:
+                    parser.parse(BytesIO(invalid), parser_context=context)
+                errors.append(str(raised.exception))
+            self.assertEqual(errors[0], errors[1])
+
+    @skipUnless(settings.FAST_JSON, 'швидкий JSON вимкнено (RENTAL_FAST_JSON=0)')
+    def test_api_uses_fast_renderer_and_parser(self):
+        landlord = User.objects.create_user(
+            username='landlord', email='landlord@example.com', password='pass12345', user_type='landlord'
+        )
+        tenant = User.objects.create_user(username='tenant', email='tenant@example.com', password='pass12345')
+        flat = Property.objects.create(
+            owner=landlord, title='Flat', description='-', property_type=PropertyType.objects.create(name='Flat'),
+            location=Location.objects.create(city='Berlin'), price=100, rooms=1, area=30,
+        )
+        client = APIClient()
+        client.force_authenticate(tenant)
+        check_in = timezone.localdate() + timedelta(days=5)
+        response = client.post('/api/bookings/bookings/', {
+            'property': flat.pk, 'check_in_date': check_in.isoformat(),
+            'check_out_date': (check_in + timedelta(days=2)).isoformat(), 'guests_count': 2,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+        response = client.get('/api/bookings/bookings/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(response.data['results'][0]['total_price'], '200.00')
+
+
+class CachedSchemaTests(TestCase):
+    formats = ('application/vnd.oai.openapi', 'application/vnd.oai.openapi+json')
+
+    def setUp(self):
+        schema_cache.clear()
+        self.addCleanup(schema_cache.clear)
+        self.client = APIClient()
+
+    def get(self, **headers):
+        # Генератор drf-spectacular друкує попередження про view без серіалізаторів
+        with redirect_stderr(StringIO()):
+            return self.client.get('/api/schema/', **headers)
+
+    def stock(self, accept):
+        with redirect_stderr(StringIO()):
+            response = SpectacularAPIView.as_view()(APIRequestFactory().get('/api/schema/', HTTP_ACCEPT=accept))
+            return response.render()
+
+    def test_schema_is_generated_once_and_matches_spectacular(self):
+        with mock.patch.object(SchemaGenerator, 'get_schema', autospec=True,
+                               side_effect=SchemaGenerator.get_schema) as generate:
+            responses = {accept: self.get(HTTP_ACCEPT=accept) for accept in self.formats}
+            self.get(HTTP_ACCEPT=self.formats[0])
+        self.assertEqual(generate.call_count, 1)
+
+        for accept, response in responses.items():
+            stock = self.stock(accept)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], stock['Content-Type'])
+            self.assertEqual(response.content, stock.content)
+
+    def test_etag_and_compression(self):
+        plain = self.get()
+        compressed = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content) / 5)
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        not_modified = self.get(HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_prebuilt_file_replaces_generation(self):
+        expected = self.stock(self.formats[0]).content
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'schema.json'
+            with redirect_stderr(StringIO()):
+                call_command('build_openapi_schema', file=str(path), stdout=StringIO())
+            with override_settings(SCHEMA_FILE=str(path)), \
+                    mock.patch.object(SchemaGenerator, 'get_schema') as generate:
+                response = self.get()
+        generate.assert_not_called()
+        self.assertEqual(response.content, expected)
+
+
+class TrafficReplayTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.log = self.directory / 'recorded.jsonl'
+        self.user = User.objects.create_user(username='tenant', email='tenant@example.com', password='pass12345')
+
+    def record(self):
+        token = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+        with override_settings(TRAFFIC_RECORDING=True, TRAFFIC_RECORDING_PATH=self.log):
+            client = APIClient()
+            client.post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'}, format='json')
+            client.get(reverse('property-list'), {'page': 1, 'access_token': 'x', '_profile': 'profile-token'},
+                       HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_X_PROFILE='profile-token')
+            client.get(reverse('property-types'))
+
+    def test_recorded_requests_are_sanitized(self):
+        self.record()
+        login, listing, types = [json.loads(line) for line in self.log.read_text().splitlines()]
+
+        self.assertEqual(login['body'], {'email': 'tenant@example.com', 'password': '***'})
+        self.assertIsNone(login['principal'])
+        self.assertEqual((listing['method'], listing['path'], listing['status']), ('GET', '/api/properties/', 200))
+        self.assertEqual(listing['query'], 'page=1&access_token=%2A%2A%2A&_profile=%2A%2A%2A')
+        self.assertEqual(listing['principal'], self.user.pk)
+        self.assertNotIn('pass12345', self.log.read_text())
+        self.assertNotIn('profile-token', self.log.read_text())
+        # Точні імена не зачіпають схожих полів
+        self.assertEqual(sanitize({'X-Profile': 't', 'profile_image': 'a.jpg'}), {'X-Profile': '***', 'profile_image': 'a.jpg'})
+
+    def test_replay_reports_routes_and_flags_regressions(self):
+        self.record()
+        baseline = self.directory / 'baseline.json'
+        out = StringIO()
+        call_command('replay_traffic', input=str(self.log), save_baseline=str(baseline), stdout=out)
+
+        summary = json.loads(baseline.read_text())
+        self.assertEqual(set(summary['routes']), {'property-list', 'property-types'})
+        self.assertEqual(summary['routes']['property-list']['error_rate'], 0)
+        self.assertGreater(summary['routes']['property-list']['queries_per_request'], 0)
+
+        # Штучно "кращий" baseline: менше запитів до БД і нульова латентність
+        for stats in summary['routes'].values():
+            stats['queries_per_request'] -= 1
+            stats['p95_ms'] = 0
+        baseline.write_text(json.dumps(summary))
+        with self.assertRaisesMessage(CommandError, 'Знайдено регресій'):
+            call_command('replay_traffic', input=str(self.log), compare=str(baseline), stdout=StringIO())
+
+
+class RouteMetricsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass12345', is_staff=True
+        )
+        self.client = APIClient()
+
+    def test_server_timing_and_route_histograms(self):
+        # Довідник віддається зі знімка в пам'яті — запит обходиться без SQL
+        reference_data.current()
+        response = self.client.get(reverse('property-types'))
+
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'render;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertIn('desc="0 queries"', timing)
+
+        self.client.force_authenticate(self.admin)
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{route="property-types",method="GET",status="200"}', body)
+        self.assertIn('http_request_db_queries_bucket{route="property-types",le="0.0"}', body)
+        self.assertIn('# TYPE http_response_size_bytes histogram', body)
+
+    def test_metrics_endpoint_access(self):
+        self.assertIn(self.client.get(reverse('metrics')).status_code, (401, 403))
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_multiprocess_aggregation(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        stats = RequestStats()
+        stats.queries, stats.db_time = 3, 0.002
+
+        # "Інший воркер": його знімок лежить у файлі з чужим pid
+        other = MetricsRegistry(directory.name)
+        other.observe('property-list', 'GET', 200, 0.03, stats, 2048)
+        other.flush()
+        own_file = Path(directory.name) / f'{os.getpid()}.json'
+        own_file.rename(own_file.with_name('999999.json'))
+
+        current = MetricsRegistry(directory.name)
+        current.observe('property-list', 'GET', 200, 0.2, stats, 100)
+        body = current.render()
+
+        self.assertIn('http_requests_total{route="property-list",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{route="property-list"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="property-list",le="0.05"} 1', body)
+        self.assertIn('http_request_db_queries_sum{route="property-list"} 6', body)
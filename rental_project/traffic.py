@@ -0,0 +1,291 @@
+import json
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from http.client import HTTPConnection
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.exceptions import TokenError
+
+from users.tokens import verify_access_token
+
+SENSITIVE_KEYS = ('password', 'token', 'refresh', 'access', 'secret')
+# Точні імена без підрядків-маркерів: токен профілювання (?_profile= і заголовок X-Profile, profiling.py)
+SENSITIVE_NAMES = ('_profile', 'x_profile', 'http_x_profile')
+MAX_BODY_BYTES = 64 * 1024
+MASK = '***'
+SERVER_TIMING_QUERIES = re.compile(r'\bdb;[^,]*desc="(\d+) queries"')
+
+
+def recording_path():
+    return Path(getattr(settings, 'TRAFFIC_RECORDING_PATH', Path(settings.BASE_DIR) / 'traffic' / 'recorded.jsonl'))
+
+
+def _is_sensitive(key):
+    key = str(key).lower().replace('-', '_')
+    return key in SENSITIVE_NAMES or any(marker in key for marker in SENSITIVE_KEYS)
+
+
+def sanitize(value):
+    """Маскує паролі й токени (зокрема токен профілювання) на будь-якому рівні вкладеності"""
+    if isinstance(value, dict):
+        return {key: MASK if _is_sensitive(key) else sanitize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    return value
+
+
+def sanitize_query(query_string):
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    return urlencode([(key, MASK if _is_sensitive(key) else value) for key, value in pairs])
+
+
+def request_body(request):
+    """Тіло JSON або форми як словник; файли та завеликі тіла не записуються"""
+    content_type = request.content_type or ''
+    if request.method in ('GET', 'HEAD', 'OPTIONS') or content_type.startswith('multipart/'):
+        return None
+    if int(request.META.get('CONTENT_LENGTH') or 0) > MAX_BODY_BYTES:
+        return None
+    if content_type == 'application/json':
+        try:
+            return sanitize(json.loads(request.body or b'null'))
+        except ValueError:
+            return None
+    if content_type == 'application/x-www-form-urlencoded':
+        return sanitize(dict(parse_qsl(request.body.decode('utf-8', 'replace'), keep_blank_values=True)))
+    return None
+
+
+def request_principal(request):
+    """id користувача з JWT у заголовку або cookie; сам токен не записується"""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    raw_token = header[7:] if header.startswith('Bearer ') else request.COOKIES.get('access_token')
+    if not raw_token:
+        return None
+    try:
+        return verify_access_token(raw_token).get('user_id')
+    except TokenError:
+        return None
+
+
+class TrafficRecorder:
+    """Дописує санітизовані запити у JSONL; запис з кількох потоків серіалізується"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as log:
+                log.write(line)
+
+
+def load_requests(path, limit=None):
+    entries = []
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+            if limit and len(entries) >= limit:
+                break
+    return entries
+
+
+def route_name(path):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return 'unresolved'
+    return match.url_name or match.route
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(int(round(len(ordered) * fraction)) - 1, 0)]
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class TestClientTarget:
+    """Відтворення в тому ж процесі через django.test.Client; рахує запити до БД кожного запиту"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self._local = threading.local()
+
+    @staticmethod
+    def host():
+        # Перший явний хост з ALLOWED_HOSTS; при порожньому списку DEBUG дозволяє localhost
+        hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+        return hosts[0] if hosts else 'localhost'
+
+    def send(self, entry):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            from django.test import Client
+
+            client = self._local.client = Client(HTTP_HOST=self.host())
+
+        headers = {}
+        token = self.tokens.get(entry.get('principal'))
+        if token:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        path = entry['path'] + (f"?{entry['query']}" if entry.get('query') else '')
+        body = json.dumps(entry['body']) if entry.get('body') is not None else ''
+
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = client.generic(entry['method'], path, body, content_type='application/json', **headers)
+        return response.status_code, counter.count
+
+
+class HttpTarget:
+    """
+    Відтворення на запущеному сервері (наприклад, runserver або gunicorn). Кількість запитів до БД
+    береться із заголовка Server-Timing, якщо сервер його віддає (MetricsMiddleware).
+    """
+
+    def __init__(self, base_url, tokens, timeout=30):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.prefix = url.path.rstrip('/')
+        self.tokens = tokens
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, entry):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+        headers = {'Content-Type': 'application/json'}
+        token = self.tokens.get(entry.get('principal'))
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        path = self.prefix + entry['path'] + (f"?{entry['query']}" if entry.get('query') else '')
+        body = json.dumps(entry['body']) if entry.get('body') is not None else None
+        try:
+            conn.request(entry['method'], path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except OSError:
+            # Нове з'єднання для наступного запиту; цей рахується як помилка
+            conn.close()
+            self._local.conn = None
+            raise
+        queries = SERVER_TIMING_QUERIES.search(response.getheader('Server-Timing') or '')
+        return response.status, int(queries.group(1)) if queries else None
+
+
+def replay(entries, target, concurrency=1, rate=0):
+    """
+    Відтворює запити з `concurrency` потоками. З rate > 0 запити рівномірно розподіляються у часі
+    (rate запитів за секунду сумарно), інакше відправляються якомога швидше.
+    Повертає (список результатів, тривалість у секундах).
+    """
+    jobs = queue.Queue()
+    for index, entry in enumerate(entries):
+        jobs.put((index, entry))
+    results = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def worker():
+        local = []
+        while True:
+            try:
+                index, entry = jobs.get_nowait()
+            except queue.Empty:
+                break
+            if rate:
+                delay = started + index / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            began = time.perf_counter()
+            try:
+                status, queries = target.send(entry)
+            except OSError:
+                status, queries = None, None
+            local.append({
+                'route': route_name(entry['path']),
+                'status': status,
+                'latency': time.perf_counter() - began,
+                'queries': queries,
+            })
+        with lock:
+            results.extend(local)
+
+    if concurrency <= 1:
+        # В одному потоці — без додаткових з'єднань з БД (потрібно, наприклад, у тестах)
+        worker()
+    else:
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed):
+    """Зведення по маршрутах: пропускна здатність, p50/p95/p99 (мс), частка помилок, запити до БД"""
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result['route']].append(result)
+
+    routes = {}
+    for route, items in sorted(by_route.items()):
+        latencies = [item['latency'] * 1000 for item in items]
+        errors = sum(1 for item in items if item['status'] is None or item['status'] >= 500)
+        queries = [item['queries'] for item in items if item['queries'] is not None]
+        routes[route] = {
+            'requests': len(items),
+            'throughput': len(items) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'error_rate': errors / len(items),
+            'queries_per_request': sum(queries) / len(queries) if queries else None,
+        }
+    return {'requests': len(results), 'elapsed_s': elapsed, 'routes': routes}
+
+
+def compare(baseline, current, latency_threshold=0.2, min_latency_delta_ms=1.0, error_threshold=0.01):
+    """
+    Порівнює два зведення. Регресія: p95 зріс більше ніж на `latency_threshold` (і щонайменше на
+    `min_latency_delta_ms`), частка помилок зросла більше ніж на `error_threshold` або зросла
+    середня кількість запитів до БД.
+    """
+    regressions = []
+    for route, now in current['routes'].items():
+        before = baseline['routes'].get(route)
+        if before is None:
+            continue
+        delta = now['p95_ms'] - before['p95_ms']
+        if delta > min_latency_delta_ms and delta > before['p95_ms'] * latency_threshold:
+            regressions.append((route, 'p95_ms', before['p95_ms'], now['p95_ms']))
+        if now['error_rate'] - before['error_rate'] > error_threshold:
+            regressions.append((route, 'error_rate', before['error_rate'], now['error_rate']))
+        if (before['queries_per_request'] is not None and now['queries_per_request'] is not None
+                and now['queries_per_request'] > before['queries_per_request'] + 1e-9):
+            regressions.append((route, 'queries_per_request', before['queries_per_request'],
+                                now['queries_per_request']))
+    return regressions
@@ -3,15 +3,28 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+
+from .metrics import MetricsView
+from .profiling import ProfileDetailView, ProfileListView, ProfileTokenView
+from .schema import CachedSpectacularAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
-    # API документація через drf-spectacular
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    # API документація через drf-spectacular; схема генерується раз на процес (або береться з SCHEMA_FILE),
+    # Swagger UI читає її з того самого кешованого endpoint'а
+    path('api/schema/', CachedSpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
 
+    # Метрики у форматі Prometheus
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+
+    # Профілі запитів (лише адміністратори)
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/token/', ProfileTokenView.as_view(), name='profile-token'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+
     # Додатки
     path('api/users/', include('users.urls')),
     path('api/properties/', include('properties.urls')),
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rental_project.settings')
 
 application = get_wsgi_application()
+
+# Довідники завантажуються до першого запиту (у майстрі, якщо сервер імпортує застосунок до форку)
+from properties.reference_data import reference_data  # noqa: E402
+
+reference_data.warm_up()
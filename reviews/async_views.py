@@ -0,0 +1,35 @@
+from django.db.models import Avg
+from rest_framework import permissions
+from rest_framework.response import Response
+
+from rental_project.async_views import AsyncGenericAPIView
+from rental_project.sparse_fields import sparse_queryset
+from .models import Review
+from .serializers import ReviewSerializer
+from .views import PropertyReviewsView
+
+
+class PropertyReviewsAsyncView(AsyncGenericAPIView):
+    """
+    Async-версія PropertyReviewsView: середня оцінка й відгуки читаються через async ORM
+    """
+    serializer_class = ReviewSerializer
+    permission_classes = [permissions.AllowAny]
+    query_budget = PropertyReviewsView.query_budget
+
+    def get_queryset(self):
+        return sparse_queryset(
+            self, Review.objects.filter(property_id=self.kwargs.get('property_id')).select_related('user', 'property')
+        )
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        avg_rating = (await queryset.aaggregate(avg_rating=Avg('rating')))['avg_rating'] or 0
+        reviews = [review async for review in queryset]
+        serializer = self.get_serializer(reviews, many=True)
+
+        return Response({
+            'count': len(reviews),
+            'average_rating': round(avg_rating, 1),
+            'results': serializer.data
+        })
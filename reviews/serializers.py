@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from rental_project.compiled_serializers import CompiledListSerializer
+from rental_project.sparse_fields import SparseFieldsMixin
 from .models import Review
 from users.serializers import UserSerializer
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_details = UserSerializer(source='user', read_only=True)
     user_name = serializers.SerializerMethodField()
     property_title = serializers.StringRelatedField(source='property.title', read_only=True)
@@ -13,6 +15,9 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'property', 'user', 'user_details', 'user_name',
                   'property_title', 'rating', 'comment', 'created_at']
         read_only_fields = ['user']
+        list_serializer_class = CompiledListSerializer
+        expandable_fields = ['user_details']
+        sparse_dependencies = {'user_name': ['user__first_name', 'user__last_name']}
 
     def get_user_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
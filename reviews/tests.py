@@ -1,3 +1,61 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient
+
+from properties.models import Location, Property, PropertyType
+from rental_project.query_inspection import QueryBudgetExceeded, fingerprint
+from users.models import User
+from .models import Review
+
+
+class QueryInspectionTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.property = Property.objects.create(
+            owner=owner, title='Loft', description='-', property_type=PropertyType.objects.create(name='Loft'),
+            location=Location.objects.create(city='Berlin', district='Mitte'), price=100, rooms=2, area=50,
+        )
+        for index in range(4):
+            user = User.objects.create_user(
+                username=f'guest{index}', email=f'guest{index}@example.com', password='pass12345'
+            )
+            Review.objects.create(property=self.property, user=user, rating=5, comment='ok')
+        self.url = reverse('property-reviews', args=[self.property.pk])
+        # Синхронна або async-версія — залежно від RENTAL_ASYNC_VIEWS
+        self.view = resolve(self.url).func.view_class
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            fingerprint('SELECT  *  FROM t WHERE id IN (%s) AND name = \'y\' LIMIT 1'),
+        )
+
+    def test_prefetched_reviews_stay_within_budget(self):
+        response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 4)
+
+    def test_n_plus_one_reports_serializer_field(self):
+        unprefetched = lambda view: Review.objects.filter(property_id=view.kwargs['property_id'])
+        with mock.patch.object(self.view, 'get_queryset', unprefetched):
+            with self.assertRaises(QueryBudgetExceeded) as raised:
+                APIClient().get(self.url)
+
+        message = str(raised.exception)
+        self.assertIn('N+1: 4× SELECT "users_user"', message)
+        if not settings.ASYNC_VIEWS:
+            # Async-view виконує ORM в іншому потоці, тож поле серіалізатора видно лише для синхронного
+            self.assertIn('ReviewSerializer.user_details', message)
+            self.assertIn('reviews/views.py', message)
+
+    def test_budget_is_logged_in_sampling_mode(self):
+        with override_settings(QUERY_INSPECTION='log', QUERY_INSPECTION_SAMPLE_RATE=1.0):
+            with mock.patch.object(self.view, 'query_budget', 1), \
+                    self.assertLogs('rental_project.query_inspection', 'WARNING') as logs:
+                response = APIClient().get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('при бюджеті 1', logs.output[0])
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ReviewViewSet, PropertyReviewsView
 
+if settings.ASYNC_VIEWS:
+    from .async_views import PropertyReviewsAsyncView as PropertyReviewsView
+
 router = DefaultRouter()
 router.register(r'', ReviewViewSet)
 
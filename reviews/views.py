@@ -2,9 +2,13 @@ from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Avg
+from drf_spectacular.utils import extend_schema, extend_schema_view
 
 from .models import Review
 from .serializers import ReviewSerializer
+from rental_project.cache import cache_response, cached
+from rental_project.query_inspection import query_budget
+from rental_project.sparse_fields import SPARSE_FIELDS_PARAMETERS, sparse_queryset
 
 
 class ReviewPermission(permissions.BasePermission):
@@ -23,6 +27,11 @@ class ReviewPermission(permissions.BasePermission):
         return obj.user == request.user
 
 
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+)
+@query_budget({'list': 5, 'retrieve': 4})
 class ReviewViewSet(viewsets.ModelViewSet):
     """
     ViewSet для управління відгуками
@@ -32,7 +41,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     permission_classes = [ReviewPermission]
 
     def get_queryset(self):
-        queryset = Review.objects.all()
+        queryset = Review.objects.select_related('user', 'property')
 
         # Фільтрація за нерухомістю
         property_id = self.request.query_params.get('property_id')
@@ -44,12 +53,25 @@ class ReviewViewSet(viewsets.ModelViewSet):
         if min_rating and min_rating.isdigit():
             queryset = queryset.filter(rating__gte=int(min_rating))
 
-        return queryset
+        return sparse_queryset(self, queryset)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
+@cached(tags=('property:{0}',), key='{0}')
+def _reviewer_ids(property_id):
+    # Відгуки оголошення змінюються лише записом відгуку, який скидає тег оголошення
+    return list(Review.objects.filter(property_id=property_id).values_list('user_id', flat=True).distinct())
+
+
+def _reviews_tags(property_id):
+    # Відповідь містить дані авторів, тож несе і їхні теги — зміна профілю скидає її
+    return [f'property:{property_id}', *(f'user:{user_id}' for user_id in _reviewer_ids(property_id))]
+
+
+@extend_schema(parameters=SPARSE_FIELDS_PARAMETERS)
+@query_budget(5)
 class PropertyReviewsView(generics.ListAPIView):
     """
     Отримання всіх відгуків для конкретної нерухомості
@@ -59,8 +81,9 @@ class PropertyReviewsView(generics.ListAPIView):
 
     def get_queryset(self):
         property_id = self.kwargs.get('property_id')
-        return Review.objects.filter(property_id=property_id)
+        return sparse_queryset(self, Review.objects.filter(property_id=property_id).select_related('user', 'property'))
 
+    @cache_response(tags=lambda property_id, **_: _reviews_tags(property_id))
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         avg_rating = queryset.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
@@ -0,0 +1,46 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser
+from .revocation import is_user_revoked
+from .tokens import verify_access_token
+
+# Claims, які CustomTokenObtainPairSerializer додає до токена, та відповідні поля моделі
+CLAIM_FIELDS = ('username', 'email', 'first_name', 'user_type')
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT-автентифікація без запиту до БД: токен перевіряється через LRU-кеш,
+    а користувач будується з claims. Повний User довантажується, лише якщо view
+    звертається до полів, яких немає в токені.
+    Зміни профілю (email, user_type) потрапляють у claims після оновлення токена; деактивація
+    відкликає всі токени користувача (users/signals.py), тож is_active перевіряється через фільтр відкликань.
+    """
+
+    def get_validated_token(self, raw_token):
+        try:
+            return verify_access_token(raw_token)
+        except TokenError as e:
+            raise InvalidToken({
+                "detail": _("Given token not valid for any token type"),
+                "messages": [{"token_class": "AccessToken", "token_type": "access", "message": e.args[0]}],
+            })
+
+    def get_user(self, validated_token):
+        payload = validated_token.payload
+        if api_settings.USER_ID_CLAIM not in payload or any(claim not in payload for claim in CLAIM_FIELDS):
+            # Старі токени без додаткових claims — звичайний шлях через БД
+            return super().get_user(validated_token)
+
+        if is_user_revoked(payload[api_settings.USER_ID_CLAIM]):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        claims = {field: payload[field] for field in CLAIM_FIELDS}
+        claims[api_settings.USER_ID_FIELD] = payload[api_settings.USER_ID_CLAIM]
+        # from_db очікує значення у порядку полів моделі
+        field_names = [f.attname for f in ClaimsUser._meta.concrete_fields if f.attname in claims]
+        return ClaimsUser.from_db(None, field_names, [claims[name] for name in field_names])
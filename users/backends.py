@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+from .hashing import hashing_pool, must_update
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend, що перевіряє пароль у пулі PasswordHashingPool.
+    Використовується і LoginView, і TokenObtainPairView через authenticate().
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Хешуємо й для неіснуючого користувача, щоб час відповіді не видавав наявність email
+            hashing_pool.run(make_password, password)
+            return None
+
+        encoded = user.password
+        if not hashing_pool.run(check_password, password, encoded):
+            return None
+        if must_update(encoded):
+            hashing_pool.schedule_rehash(user.pk, password, encoded)
+        return user if self.user_can_authenticate(user) else None
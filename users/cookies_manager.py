@@ -1,14 +1,17 @@
 from datetime import datetime
 from django.contrib.auth import get_user_model
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import CustomTokenObtainPairSerializer
+from .tokens import remember_access_token
 
 User = get_user_model()
 
 
 def set_jwt_cookies(response: Response, user: User) -> Response:
-    refresh_token = RefreshToken.for_user(user)
+    # Токени з claims дозволяють автентифікувати запити без завантаження User з БД
+    refresh_token = CustomTokenObtainPairSerializer.get_token(user)
     access_token = refresh_token.access_token
+    remember_access_token(access_token)
 
     access_expiry = datetime.fromtimestamp(access_token["exp"])
     refresh_expiry = datetime.fromtimestamp(refresh_token["exp"])
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.db import close_old_connections
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен запросами авторизации, попробуйте позже'
+    default_code = 'password_hashing_busy'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # Обробник винятків DRF віддає wait у заголовку Retry-After
+        self.wait = wait
+
+
+class PasswordHashingPool:
+    """
+    Окремий пул обмеженого розміру для PBKDF2. Кількість задач у черзі обмежена:
+    при насиченні запит одразу отримує 503 з Retry-After замість того, щоб займати воркер, потрібний
+    іншим endpoint'ам. Черга має бути такою, щоб задача з її кінця встигала за timeout.
+    """
+
+    def __init__(self, workers=2, max_pending=16, timeout=5, retry_after=1):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+        return self._executor
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy(wait=self.retry_after)
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """Виконує функцію в пулі та чекає на результат; не дочекавшись за timeout — 503"""
+        future = self.submit(fn, *args)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            # Задача, що ще не почалася, не займатиме пул після того, як клієнт отримав відмову
+            future.cancel()
+            raise PasswordHashingBusy(wait=self.retry_after)
+
+    def schedule_rehash(self, user_id, password, encoded):
+        """Оновлення хешу після входу виконується поза запитом; при насиченні просто пропускається"""
+        try:
+            self.submit(_rehash_password, user_id, password, encoded)
+        except PasswordHashingBusy:
+            pass
+
+
+def _rehash_password(user_id, password, encoded):
+    from .models import User
+
+    try:
+        # Оновлюємо, лише якщо пароль не змінився з моменту входу
+        User.objects.filter(pk=user_id, password=encoded).update(password=make_password(password))
+    finally:
+        close_old_connections()
+
+
+def must_update(encoded):
+    preferred = get_hasher('default')
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+hashing_pool = PasswordHashingPool(
+    workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 2),
+    max_pending=getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 16),
+    timeout=getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 5),
+)
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import ClaimsJWTAuthentication
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+from users.tokens import verified_tokens, verify_access_token
+
+
+class Command(BaseCommand):
+    help = 'Порівнює накладні витрати автентифікації на запит: стандартний JWT-шлях проти кешованого з claims'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        iterations = options['requests']
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username='bench-auth', email='bench-auth@example.com', password='bench-pass', first_name='Bench'
+            )
+            access = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+            request = factory.get('/api/properties/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+            def baseline():
+                # Middleware декодує токен, потім JWTAuthentication декодує ще раз і читає User
+                AccessToken(access)
+                JWTAuthentication().authenticate(request)
+
+            def optimized():
+                verify_access_token(access)
+                ClaimsJWTAuthentication().authenticate(request)
+
+            verified_tokens.clear()
+            for name, step in (('JWTAuthentication', baseline), ('ClaimsJWTAuthentication', optimized)):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        step()
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{name}: {elapsed / iterations * 1_000_000:.1f} мкс/запит, '
+                    f'{len(queries) / iterations:.2f} SQL-запитів/запит'
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,77 @@
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+
+from users.models import User
+
+EMAIL = 'loadtest-login@example.com'
+PASSWORD = 'loadtest-password-123'
+
+
+class Command(BaseCommand):
+    help = (
+        'Навантажувальний тест: латентність не-auth endpoint\'а (property-types) без і під час '
+        'потоку логінів. Використовує поточну БД; створює тестового користувача, якщо його немає.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flood-threads', type=int, default=32)
+        parser.add_argument('--probes', type=int, default=500)
+
+    def probe(self, count):
+        client = Client(HTTP_HOST='localhost')
+        url = reverse('property-types')
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        close_old_connections()
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+        self.stdout.write(f'{label}: p50={statistics.median(timings):.2f} мс, p99={p99:.2f} мс')
+
+    def handle(self, *args, **options):
+        if not User.objects.filter(email=EMAIL).exists():
+            User.objects.create_user(username='loadtest-login', email=EMAIL, password=PASSWORD, first_name='Load')
+
+        self.report('Без навантаження', self.probe(options['probes']))
+
+        stop = threading.Event()
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def flood():
+            client = Client(HTTP_HOST='localhost')
+            url = reverse('login')
+            while not stop.is_set():
+                response = client.post(url, {'email': EMAIL, 'password': PASSWORD})
+                with lock:
+                    statuses[response.status_code] += 1
+            close_old_connections()
+
+        threads = [threading.Thread(target=flood, daemon=True) for _ in range(options['flood_threads'])]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        timings = self.probe(options['probes'])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.report(f"Під час потоку логінів ({options['flood_threads']} потоків)", timings)
+        total = sum(statuses.values())
+        self.stdout.write(
+            f'Логінів: {total} за {elapsed:.1f} с; статуси: '
+            + ', '.join(f'{code}={count}' for code, count in sorted(statuses.items()))
+        )
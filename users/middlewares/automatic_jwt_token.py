@@ -2,8 +2,10 @@ from datetime import datetime
 from django.utils.deprecation import MiddlewareMixin
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.tokens import access_token_refresher, verify_access_token
 
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
@@ -13,9 +15,8 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
 
         if access_token:
             try:
-                token = AccessToken(access_token)
-                if datetime.fromtimestamp(token["exp"]) < datetime.now():
-                    raise TokenError("Token is expired")
+                # Перевірка підпису кешується, тому DRF-автентифікація не декодує токен повторно
+                verify_access_token(access_token)
                 request.META["HTTP_AUTHORIZATION"] = f"Bearer {access_token}"
 
             except TokenError:
@@ -43,8 +44,10 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
     def process_response(self, request: Request, response: Response, **kwargs):
         new_access_token = getattr(request, "_new_access_token", None)
 
-        if new_access_token:
-            access_expiry = AccessToken(new_access_token)["exp"]
+        # Якщо view сам встановив або видалив cookie (login, logout), не перезаписуємо його
+        if new_access_token and "access_token" not in response.cookies:
+            # Токен щойно випущено тут же; logout міг уже відкликати його, тож строк читаємо без перевірок
+            access_expiry = AccessToken(new_access_token, verify=False)["exp"]
             response.set_cookie(
                 key="access_token",
                 value=new_access_token,
@@ -57,10 +60,8 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
 
     def refresh_access_token(self, refresh_token):
         try:
-            refresh = RefreshToken(refresh_token)
-            new_access_token = str(refresh.access_token)
-
-            return new_access_token
+            # Паралельні запити з одним refresh-токеном отримують той самий новий access-токен
+            return access_token_refresher.refresh(refresh_token)
         except TokenError:
             return None
 
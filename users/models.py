@@ -28,4 +28,29 @@ class User(AbstractUser, PermissionsMixin):
         verbose_name_plural = _('пользователи')
 
     def __str__(self):
-        return f"{self.first_name} {self.last_name} ({self.email})"
\ No newline at end of file
+        return f"{self.first_name} {self.last_name} ({self.email})"
+
+class ClaimsUser(User):
+    """
+    Користувач, відновлений з claims JWT без запиту до БД.
+    Поля, яких немає в токені, довантажуються одним запитом при першому зверненні до будь-якого з них.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields)
+
+
+class RevokedToken(models.Model):
+    """Відкликані JWT (за jti) до завершення їхнього строку дії"""
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,166 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """Фільтр Блума з подвійним хешуванням blake2b; хибнопозитивні — так, хибнонегативні — ні"""
+
+    def __init__(self, capacity=100_000, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _hash(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def add(self, value):
+        first, second = self._hash(value)
+        for i in range(self.hashes):
+            position = (first + i * second) % self.size
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        # Для відсутніх значень перевірка зазвичай завершується після першого-другого біта
+        first, second = self._hash(value)
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (first + i * second) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationFilter:
+    """
+    Дзеркало таблиці RevokedToken у пам'яті процесу.
+    Промах фільтра означає "не відкликано" без звернення до БД; лише попадання перевіряється запитом.
+    Нові записи з інших воркерів підтягуються інкрементально раз на `sync_interval` секунд,
+    повна перебудова (щоб позбутися прострочених jti) — раз на `rebuild_interval`.
+    """
+
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self, sync_interval=5, rebuild_interval=3600, capacity=100_000):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_at = None
+        self._next_sync = 0.0
+        self._next_rebuild = 0.0
+
+    def _rebuild(self):
+        now = timezone.now()
+        active = RevokedToken.objects.filter(expires_at__gt=now)
+        capacity = self.capacity
+        total = active.count()
+        while capacity < total * 2:
+            capacity *= 2
+
+        bloom = BloomFilter(capacity)
+        for jti in active.values_list('jti', flat=True).iterator():
+            bloom.add(jti)
+        self._bloom = bloom
+        self._synced_at = now
+        self._next_rebuild = time.monotonic() + self.rebuild_interval
+
+    def _sync(self):
+        now = timezone.now()
+        # Невелике перекриття вікна, щоб не пропустити записи, закомічені із запізненням
+        new_jtis = RevokedToken.objects.filter(
+            revoked_at__gte=self._synced_at - self.SYNC_OVERLAP
+        ).values_list('jti', flat=True)
+        for jti in new_jtis:
+            self._bloom.add(jti)
+        self._synced_at = now
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild()
+
+    def maybe_refresh(self):
+        now = time.monotonic()
+        if self._bloom is not None and now < self._next_sync:
+            return
+        # Оновлює лише один потік; інші продовжують працювати з поточним фільтром
+        if not self._lock.acquire(blocking=self._bloom is None):
+            return
+        try:
+            if self._bloom is None or now >= self._next_rebuild:
+                self._rebuild()
+            elif now >= self._next_sync:
+                self._sync()
+            self._next_sync = time.monotonic() + self.sync_interval
+        finally:
+            self._lock.release()
+
+    def might_contain(self, jti):
+        self.maybe_refresh()
+        return jti in self._bloom
+
+    def add(self, jti):
+        self.maybe_refresh()
+        self._bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+
+revocation_filter = RevocationFilter(
+    sync_interval=getattr(settings, 'JWT_REVOCATION_SYNC_INTERVAL', 5),
+)
+
+
+def is_revoked(jti):
+    if not revocation_filter.might_contain(jti):
+        return False
+    return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+
+def revoke_token(token):
+    """Відкликає перевірений токен до завершення його строку дії"""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    # Один INSERT без попереднього SELECT; повторне відкликання того ж jti ігнорується
+    RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+    revocation_filter.add(jti)
+
+
+def user_revocation_key(user_id):
+    # Маркер у тому ж сховищі, що й jti: поки він є, жоден токен користувача не приймається
+    return f'user:{user_id}'
+
+
+def revoke_user_tokens(user_id):
+    """Відкликає всі випущені токени користувача (деактивація); маркер живе стільки, скільки refresh-токен"""
+    key = user_revocation_key(user_id)
+    with transaction.atomic():
+        # Новий рядок, а не оновлення: інші воркери підтягують відкликання за revoked_at
+        RevokedToken.objects.filter(jti=key).delete()
+        RevokedToken.objects.create(jti=key, expires_at=timezone.now() + api_settings.REFRESH_TOKEN_LIFETIME)
+    revocation_filter.add(key)
+
+
+def restore_user_tokens(user_id):
+    key = user_revocation_key(user_id)
+    # Промах фільтра — звичайний випадок, без запиту до БД
+    if is_revoked(key):
+        RevokedToken.objects.filter(jti=key).delete()
+
+
+def is_user_revoked(user_id):
+    return user_id is not None and is_revoked(user_revocation_key(user_id))
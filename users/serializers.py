@@ -1,9 +1,16 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import User
+from .hashing import hashing_pool
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rental_project.sparse_fields import SparseFieldsMixin
+from .revocation import is_revoked, is_user_revoked
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'user_type',
@@ -25,7 +32,13 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
+        # Хешування пароля виконується в окремому обмеженому пулі, а не у воркері запиту;
+        # create_user без пароля лише ставить непридатний хеш, готовий записується в тій самій транзакції
+        password = hashing_pool.run(make_password, validated_data.pop('password'))
+        with transaction.atomic():
+            user = User.objects.create_user(password=None, **validated_data)
+            user.password = password
+            user.save(update_fields=['password'])
         return user
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -40,6 +53,16 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """Відкликаний (після logout чи деактивації) refresh-токен не випускає нових access-токенів"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh[api_settings.JTI_CLAIM]) or is_user_revoked(refresh.get(api_settings.USER_ID_CLAIM)):
+            raise TokenError('Token is revoked')
+        return super().validate(attrs)
+
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.CharField(write_only=True)
     password = serializers.CharField(write_only=True)
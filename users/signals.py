@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from rental_project.cache import invalidate
+from .models import ClaimsUser, User
+from .revocation import restore_user_tokens, revoke_user_tokens
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def revoke_tokens_of_inactive_user(sender, instance, update_fields=None, **kwargs):
+    # Автентифікація з claims не читає is_active з БД, тож деактивація має відкликати вже випущені токени
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    if instance.is_active:
+        restore_user_tokens(instance.pk)
+    else:
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def invalidate_user_cache(sender, instance, update_fields=None, **kwargs):
+    # Дані користувача вбудовані в закешовані відповіді (відгуки); вхід оновлює лише last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate(f'user:{instance.pk}')
@@ -1,3 +1,276 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import ClaimsJWTAuthentication
+from .models import ClaimsUser, RevokedToken, User
+from .revocation import BloomFilter, is_revoked, revocation_filter, revoke_token
+from .serializers import CustomTokenObtainPairSerializer
+from .hashing import PasswordHashingPool, hashing_pool
+from .middlewares.automatic_jwt_token import JWTAuthenticationMiddleware
+from .tokens import SingleFlightRefresher, VerifiedTokenCache, verified_tokens, verify_access_token
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        verified_tokens.clear()
+        revocation_filter.reset()
+        self.user = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass12345',
+            first_name='Ten', last_name='Ant', phone_number='123'
+        )
+        self.access = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_user_is_built_from_claims_without_queries(self):
+        revocation_filter.maybe_refresh()
+        with self.assertNumQueries(0):
+            user, token = ClaimsJWTAuthentication().authenticate(self.request)
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertEqual(user, self.user)
+            self.assertEqual((user.email, user.user_type), ('tenant@example.com', 'tenant'))
+
+        # Решта полів довантажується одним запитом
+        with self.assertNumQueries(1):
+            self.assertEqual((user.last_name, user.phone_number), ('Ant', '123'))
+
+    def test_deactivated_user_is_rejected(self):
+        revocation_filter.maybe_refresh()
+        self.assertEqual(ClaimsJWTAuthentication().authenticate(self.request)[0], self.user)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            ClaimsJWTAuthentication().authenticate(self.request)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(client.get(reverse('user-profile')).status_code, 401)
+        refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+        self.assertEqual(client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(client.get(reverse('user-profile')).status_code, 200)
+
+    def test_tokens_without_claims_fall_back_to_database(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        revocation_filter.maybe_refresh()
+        with self.assertNumQueries(1):
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertNotIsInstance(user, ClaimsUser)
+
+    def test_verified_tokens_are_cached(self):
+        token = verify_access_token(self.access)
+        self.assertIs(verify_access_token(self.access), token)
+
+        cache = VerifiedTokenCache(maxsize=1)
+        cache.put('a.b.c', 1)
+        cache.put('a.b.d', 2)
+        self.assertIsNone(cache.get('a.b.c'))
+        self.assertIsNone(cache.get('x.y.d'))
+        self.assertEqual(cache.get('a.b.d'), 2)
+
+    def test_cookie_login_authenticates_without_user_query(self):
+        client = APIClient()
+        response = client.post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('property-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'users_user' in query['sql']])
+
+
+class SingleFlightRefreshTests(SimpleTestCase):
+    def burst(self, refresher, raw_refresh, size=20):
+        barrier = threading.Barrier(size)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(refresher.refresh(raw_refresh))
+
+        threads = [threading.Thread(target=worker) for _ in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def slow_mint(self, refresher):
+        original = refresher.mint
+
+        def mint(refresh):
+            time.sleep(0.05)
+            return original(refresh)
+
+        return mock.patch.object(refresher, 'mint', side_effect=mint)
+
+    def test_parallel_requests_share_one_mint(self):
+        refresher = SingleFlightRefresher()
+        raw_refresh = str(RefreshToken())
+
+        with self.slow_mint(refresher) as mint:
+            results = self.burst(refresher, raw_refresh)
+
+        self.assertEqual(mint.call_count, 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(len(results), 20)
+
+    def test_shared_cache_deduplicates_across_refreshers(self):
+        raw_refresh = str(RefreshToken())
+        workers = [SingleFlightRefresher(shared=True), SingleFlightRefresher(shared=True)]
+
+        tokens = [worker.refresh(raw_refresh) for worker in workers]
+        self.assertEqual(tokens[0], tokens[1])
+        # Результат лежить у спільному між процесами кеші, а не в LocMem default
+        jti = RefreshToken(raw_refresh)['jti']
+        self.assertEqual(caches['shared'].get(f'jwt-refresh:{jti}'), tokens[0])
+        self.assertIsNone(caches['default'].get(f'jwt-refresh:{jti}'))
+
+    def test_middleware_uses_single_flight(self):
+        raw_refresh = str(RefreshToken())
+        middleware = JWTAuthenticationMiddleware(lambda request: None)
+        self.assertEqual(middleware.refresh_access_token(raw_refresh), middleware.refresh_access_token(raw_refresh))
+        self.assertIsNone(middleware.refresh_access_token('broken'))
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        verified_tokens.clear()
+        revocation_filter.reset()
+        User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass12345', first_name='Ten'
+        )
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_filter_miss_does_not_query_database(self):
+        revocation_filter.maybe_refresh()
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked('unknown-jti'))
+
+    def test_logout_revokes_cookie_tokens(self):
+        client = APIClient()
+        client.post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'})
+        access = client.cookies['access_token'].value
+        refresh = client.cookies['refresh_token'].value
+
+        response = client.get(reverse('logout'))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+        # Викрадені копії токенів більше не приймаються
+        stolen = APIClient()
+        stolen.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(stolen.get(reverse('user-profile')).status_code, 401)
+
+        stolen = APIClient()
+        stolen.cookies['refresh_token'] = refresh
+        self.assertEqual(stolen.get(reverse('user-profile')).status_code, 401)
+
+    def test_logout_with_expired_access_cookie(self):
+        client = APIClient()
+        client.post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'})
+        refresh = client.cookies['refresh_token'].value
+        client.cookies['access_token'] = 'expired-or-garbage'
+
+        # Middleware оновлює access-токен, а logout одразу відкликає його
+        response = client.get(reverse('logout'))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.cookies['access_token'].value, '')
+        self.assertEqual(response.cookies['access_token']['max-age'], 0)
+
+        stolen = APIClient()
+        stolen.cookies['refresh_token'] = refresh
+        self.assertEqual(stolen.get(reverse('user-profile')).status_code, 401)
+
+    def test_revoked_refresh_token_cannot_be_refreshed(self):
+        refresh = RefreshToken.for_user(User.objects.get(username='tenant'))
+        client = APIClient()
+        self.assertEqual(client.post(reverse('token_refresh'), {'refresh': str(refresh)}).status_code, 200)
+
+        revoke_token(refresh)
+        revocation_filter.reset()
+        response = client.post(reverse('token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('access', response.data)
+
+
+class PasswordHashingPoolTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tenant', email='tenant@example.com', password='pass12345', first_name='Ten'
+        )
+
+    def test_login_and_registration_hash_in_pool(self):
+        client = APIClient()
+        with mock.patch.object(hashing_pool, 'run', wraps=hashing_pool.run) as run:
+            response = client.post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'})
+            self.assertEqual(response.status_code, 200)
+            response = client.post(reverse('register'), {
+                'username': 'new', 'email': 'New@Example.com', 'password': 'Sup3r-secret!',
+                'password2': 'Sup3r-secret!', 'first_name': 'N', 'last_name': 'U',
+            })
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(run.call_count, 2)
+        self.assertTrue(User.objects.get(username='new').check_password('Sup3r-secret!'))
+
+        response = client.post(reverse('login'), {'email': 'tenant@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_saturated_pool_returns_503(self):
+        busy = PasswordHashingPool(workers=1, max_pending=1)
+        release = threading.Event()
+        busy.submit(release.wait)
+        self.addCleanup(release.set)
+
+        with mock.patch('users.backends.hashing_pool', busy):
+            response = APIClient().post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_hashing_timeout_returns_503(self):
+        slow = PasswordHashingPool(workers=1, max_pending=4, timeout=0.05)
+        release = threading.Event()
+        slow.submit(release.wait)
+        self.addCleanup(release.set)
+
+        with mock.patch('users.serializers.hashing_pool', slow):
+            response = APIClient().post(reverse('register'), {
+                'username': 'new', 'email': 'new@example.com', 'password': 'Sup3r-secret!',
+                'password2': 'Sup3r-secret!', 'first_name': 'N', 'last_name': 'U',
+            })
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(User.objects.filter(username='new').exists())
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_outdated_hash_is_rehashed_off_request_path(self):
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            self.user.set_password('pass12345')
+            self.user.save()
+
+        with mock.patch.object(hashing_pool, 'schedule_rehash') as schedule:
+            response = APIClient().post(reverse('login'), {'email': 'tenant@example.com', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 200)
+        schedule.assert_called_once_with(self.user.pk, 'pass12345', self.user.password)
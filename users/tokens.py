@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from .revocation import is_revoked, is_user_revoked
+
+
+class VerifiedTokenCache:
+    """
+    Обмежений LRU вже перевірених access-токенів, ключ — підпис JWT.
+    Повний рядок токена зберігається поруч і порівнюється при зверненні.
+    """
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(raw_token):
+        return raw_token.rsplit('.', 1)[-1]
+
+    def get(self, raw_token):
+        key = self._key(raw_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != raw_token:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, raw_token, token):
+        key = self._key(raw_token)
+        with self._lock:
+            self._entries[key] = (raw_token, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, raw_token):
+        with self._lock:
+            self._entries.pop(self._key(raw_token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+verified_tokens = VerifiedTokenCache(getattr(settings, 'JWT_VERIFIED_TOKEN_CACHE_SIZE', 10_000))
+
+
+def verify_access_token(raw_token):
+    """
+    Повертає перевірений AccessToken. Підпис перевіряється лише при першій появі токена,
+    далі — тільки строк дії та відкликання. Кидає TokenError для недійсних токенів.
+    """
+    if isinstance(raw_token, bytes):
+        raw_token = raw_token.decode()
+
+    token = verified_tokens.get(raw_token)
+    if token is not None:
+        try:
+            token.check_exp(current_time=aware_utcnow())
+        except TokenError:
+            verified_tokens.discard(raw_token)
+            raise
+    else:
+        token = AccessToken(raw_token)
+        verified_tokens.put(raw_token, token)
+
+    # Фільтр відкликаних токенів звертається до БД лише при попаданні
+    if is_revoked(token[api_settings.JTI_CLAIM]):
+        verified_tokens.discard(raw_token)
+        raise TokenError("Token is revoked")
+    return token
+
+
+def remember_access_token(token):
+    """Щойно випущений токен не потребує перевірки підпису"""
+    raw_token = str(token)
+    verified_tokens.put(raw_token, token)
+    return raw_token
+
+
+class SingleFlightRefresher:
+    """
+    Дедуплікація оновлення access-токена за jti refresh-токена.
+    Паралельні запити з тим самим refresh-токеном чекають на один випуск і отримують той самий
+    access-токен; результат коротко кешується в процесі та (опційно) у спільному cache-бекенді.
+    """
+
+    def __init__(self, ttl=30, wait_timeout=5, shared=False, cache_alias='shared'):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.shared = shared
+        self.cache_alias = cache_alias
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._results = {}
+
+    def _cached(self, jti):
+        result = self._results.get(jti)
+        if result and result[0] > time.monotonic():
+            return result[1]
+        return None
+
+    def _store(self, jti, access_token):
+        now = time.monotonic()
+        self._results[jti] = (now + self.ttl, access_token)
+        # Прибираємо прострочені результати, щоб словник не ріс необмежено
+        if len(self._results) > 1000:
+            self._results = {key: value for key, value in self._results.items() if value[0] > now}
+
+    def mint(self, refresh):
+        return remember_access_token(refresh.access_token)
+
+    def _mint_shared(self, refresh, jti):
+        cache = caches[self.cache_alias]
+        key = f'jwt-refresh:{jti}'
+        access_token = cache.get(key)
+        if access_token is None:
+            access_token = self.mint(refresh)
+            if not cache.add(key, access_token, self.ttl):
+                # Інший воркер встиг першим — використовуємо його токен
+                access_token = cache.get(key) or access_token
+        return access_token
+
+    def refresh(self, raw_refresh_token):
+        """Повертає рядок нового access-токена; кидає TokenError для недійсного refresh-токена"""
+        refresh = RefreshToken(raw_refresh_token)
+        jti = refresh[api_settings.JTI_CLAIM]
+        if is_revoked(jti) or is_user_revoked(refresh.get(api_settings.USER_ID_CLAIM)):
+            raise TokenError("Token is revoked")
+
+        with self._lock:
+            access_token = self._cached(jti)
+            if access_token is not None:
+                return access_token
+            event = self._inflight.get(jti)
+            leader = event is None
+            if leader:
+                event = self._inflight[jti] = threading.Event()
+
+        if not leader:
+            event.wait(self.wait_timeout)
+            with self._lock:
+                access_token = self._cached(jti)
+            if access_token is not None:
+                return access_token
+            # Лідер не впорався вчасно — випускаємо токен самостійно
+            return self.mint(refresh)
+
+        try:
+            access_token = self._mint_shared(refresh, jti) if self.shared else self.mint(refresh)
+            with self._lock:
+                self._store(jti, access_token)
+            return access_token
+        finally:
+            with self._lock:
+                self._inflight.pop(jti, None)
+            event.set()
+
+
+access_token_refresher = SingleFlightRefresher(
+    ttl=getattr(settings, 'JWT_REFRESH_DEDUP_TTL', 30),
+    shared=getattr(settings, 'JWT_REFRESH_SHARED_CACHE', False),
+    cache_alias=getattr(settings, 'JWT_REFRESH_CACHE_ALIAS', 'shared'),
+)
@@ -1,12 +1,13 @@
 
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
-from .views import RegisterView, CustomTokenObtainPairView, UserProfileView, LoginView, logout
+from .views import (
+    RegisterView, CustomTokenObtainPairView, RevocationAwareTokenRefreshView, UserProfileView, LoginView, logout,
+)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', RevocationAwareTokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', logout, name='logout'),
@@ -4,10 +4,16 @@ from rest_framework.decorators import api_view
 from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .cookies_manager import set_jwt_cookies
+from .revocation import revoke_token
 from .models import User
-from .serializers import UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer, LoginSerializer
+from .serializers import (
+    UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer, LoginSerializer,
+    RevocationAwareTokenRefreshSerializer,
+)
 
 
 class RegisterView(generics.CreateAPIView):
@@ -20,6 +26,10 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
+class RevocationAwareTokenRefreshView(TokenRefreshView):
+    serializer_class = RevocationAwareTokenRefreshSerializer
+
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -50,6 +60,18 @@ class LoginView(CreateAPIView):
 
 @api_view(["GET"])
 def logout(request, *args, **kwargs):
+    # Відкликаємо токени, щоб викрадені копії перестали діяти одразу, а не після закінчення строку
+    for token_class, cookie in ((AccessToken, "access_token"), (RefreshToken, "refresh_token")):
+        raw_token = request.COOKIES.get(cookie)
+        if not raw_token:
+            continue
+        try:
+            revoke_token(token_class(raw_token))
+        except TokenError:
+            continue
+    if isinstance(request.auth, AccessToken):
+        revoke_token(request.auth)
+
     response = Response(
         status=status.HTTP_204_NO_CONTENT, data={"massage": "Successful logout"}
     )